@@ -5,13 +5,19 @@ Run: streamlit run app.py
 import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime
+from plotly.subplots import make_subplots
+from calendar import isleap, monthcalendar
+from datetime import datetime, date, timedelta
+from functools import lru_cache
+from types import SimpleNamespace
 
 from src.hevy_client import fetch_bbd_workouts, workouts_to_dataframe, fetch_all_workouts
 from src.analytics_531 import (
     fetch_bbb_workouts as _fetch_bbb_workouts,
+    fetch_latest_bbb_workout as _fetch_latest_bbb_workout,
     workouts_to_dataframe_531, add_cycle_info,
     global_summary_531, amrap_tracking, bbb_compliance,
     accessory_volume, accessory_summary, tm_progression,
@@ -27,22 +33,26 @@ from src.analytics_531 import (
 from src.config_531 import (
     DAY_CONFIG_531, TRAINING_MAX, CYCLE_WEEKS, STRENGTH_STANDARDS_531,
     PROGRAM_START_531, EXERCISE_DB_531,
+    # Calendario / Plan Forever
+    get_plan_position, get_block_weeks, get_effective_tm,
+    YEARLY_PLAN, SUPPLEMENTAL_TEMPLATES, MAIN_WORK_MODES,
+    PLAN_START_SESSION, SESSIONS_PER_WEEK,
 )
 from src.analytics import (
     add_derived_columns, global_summary, weekly_breakdown,
     pr_table, pr_history, muscle_volume, weekly_muscle_volume,
-    session_summary, session_detail, key_lifts_progression,
+    session_summary, key_lifts_progression,
     recovery_indicators, day_adherence, vs_targets,
     # v2 — new
     relative_intensity, bbd_ratios, estimate_dl_1rm, dominadas_progress,
-    intra_session_fatigue, fatigue_trend,
+    intra_session_fatigue, weekly_rollups,
     session_density, density_trend,
     strength_standards, dots_coefficient,
     # v3 — Phase 1
     plateau_detection, acwr, mesocycle_summary, calc_mesocycle,
     strength_profile, historical_comparison,
     # Gamification
-    gamification_status,
+    gamification_status, LEVEL_TABLE,
 )
 from src.config import DAY_CONFIG, MUSCLE_GROUP_COLORS, KEY_LIFTS, KEY_LIFT_IDS, PROGRAM_START, NOTION_TOKEN, NOTION_HALL_OF_TITANS_DB, BODYWEIGHT, EXERCISE_DB
 from src.shared_analytics import (
@@ -62,10 +72,107 @@ from src.config_candito import (
 )
 import requests as _requests
 import re as _re
+import html as _html
+import hashlib as _hashlib
+import json as _json
+import os as _os
+import stat as _stat
+import tempfile as _tempfile
 
 # ── Page Config ──────────────────────────────────────────────────────
 st.set_page_config(page_title="BBD Analytics", page_icon="🔥", layout="wide", initial_sidebar_state="expanded")
 
+
+@st.cache_resource(show_spinner=False)
+def _notion_http() -> _requests.Session:
+    """Shared keep-alive session for the Notion probes.
+
+    A module-level Session would be rebuilt on every script rerun; as a
+    cached resource the pooled TLS connection survives across reruns.
+    """
+    session = _requests.Session()
+    adapter = _requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("https://", adapter)
+    return session
+
+
+_NOTION_CACHE_DIR = _os.environ.get("CACHE_DIR", _os.path.join(_tempfile.gettempdir(), "bbd-notion"))
+
+
+def _notion_cache_dir() -> str | None:
+    """The ETag cache directory, or None when it is not private to this user.
+
+    The default lives under the shared temp dir, so a directory someone else
+    created first (or left group/world accessible, or a symlink) is refused
+    and disk caching is skipped rather than reading or leaking page bodies.
+    """
+    try:
+        _os.makedirs(_NOTION_CACHE_DIR, mode=0o700, exist_ok=True)
+        st_ = _os.lstat(_NOTION_CACHE_DIR)
+    except OSError:
+        return None
+    if not _stat.S_ISDIR(st_.st_mode):
+        return None
+    getuid = getattr(_os, "getuid", None)  # POSIX only
+    if getuid is not None and (st_.st_uid != getuid() or st_.st_mode & 0o077):
+        return None
+    return _NOTION_CACHE_DIR
+
+
+def _notion_fetch(method: str, url: str, **kwargs) -> dict | None:
+    """Notion request; GETs are revalidated against an on-disk ETag copy.
+
+    st.cache_data is per process, so a restarted app refetches everything;
+    the last GET body is kept on disk and a 304 reply reuses it. Other
+    methods go straight through: a matching If-None-Match on a POST query is
+    answered with 412, not 304. Returns None on any failure, like the
+    callers' own error paths.
+    """
+    cache_dir = _notion_cache_dir() if method == "get" else None
+    key = _hashlib.sha1(
+        f"{method} {url} {_json.dumps(kwargs.get('json'), sort_keys=True)}".encode()
+    ).hexdigest()
+    path = _os.path.join(cache_dir, f"{key}.json") if cache_dir else None
+    cached = None
+    if cache_dir:
+        try:
+            with open(path, encoding="utf-8") as fh:
+                cached = _json.load(fh)
+        except (OSError, ValueError):
+            pass
+
+    headers = dict(kwargs.pop("headers", {}))
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    try:
+        r = getattr(_notion_http(), method)(url, headers=headers, **kwargs)
+        if r.status_code == 304 and cached:
+            return cached["body"]
+        if not r.ok:
+            return None
+        body = r.json()
+    except Exception:
+        return None
+
+    etag = r.headers.get("ETag")
+    if cache_dir and etag:
+        # mkstemp creates the file 0o600; os.replace means a concurrent reader
+        # sees the old or the new copy, never a truncated one
+        tmp = None
+        try:
+            fd, tmp = _tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with _os.fdopen(fd, "w", encoding="utf-8") as fh:
+                _json.dump({"etag": etag, "body": body}, fh)
+            _os.replace(tmp, path)
+        except OSError:
+            if tmp:
+                try:
+                    _os.unlink(tmp)
+                except OSError:
+                    pass
+    return body
+
+
 @st.cache_data(ttl=120)
 def _notion_last_edit() -> pd.Timestamp | None:
     """Check when the Notion analytics page was last updated (= last successful cron)."""
@@ -73,21 +180,35 @@ def _notion_last_edit() -> pd.Timestamp | None:
         token = NOTION_TOKEN or st.secrets.get("NOTION_TOKEN", "")
         if not token:
             return None
-        r = _requests.get(
+        page = _notion_fetch(
+            "get",
             "https://api.notion.com/v1/pages/306cbc499cfe81b08aedce82d40289f6",
             headers={
                 "Authorization": f"Bearer {token}",
                 "Notion-Version": "2022-06-28",
             },
-            timeout=5,
+            timeout=(3, 5),
         )
-        if r.ok:
-            return pd.Timestamp(r.json()["last_edited_time"])
+        if page is not None:
+            return pd.Timestamp(page["last_edited_time"])
     except Exception:
         pass
     return None
 
 
+@st.fragment(run_every="120s")
+def _sidebar_cron_health():
+    """Notion cron health (last edit of the analytics page), refreshed on its own."""
+    notion_edit = _notion_last_edit()
+    if notion_edit is not None:
+        # Both are absolute instants: subtract epoch nanoseconds, no tz conversion
+        hours_since = (pd.Timestamp.now(tz="UTC").value - notion_edit.value) / 3.6e12
+        if hours_since > 24:
+            st.error(f"⚠️ Notion sync hace {int(hours_since)}h — revisa GitHub Actions")
+        else:
+            st.caption(f"✅ Notion sync: hace {int(hours_since)}h")
+
+
 @st.cache_data(ttl=120)
 def load_hall_of_titans() -> list[dict]:
     """Fetch Hall of Titans entries from Notion database."""
@@ -95,7 +216,8 @@ def load_hall_of_titans() -> list[dict]:
     if not token or not NOTION_HALL_OF_TITANS_DB:
         return []
     try:
-        r = _requests.post(
+        result = _notion_fetch(
+            "post",
             f"https://api.notion.com/v1/databases/{NOTION_HALL_OF_TITANS_DB}/query",
             headers={
                 "Authorization": f"Bearer {token}",
@@ -103,52 +225,167 @@ def load_hall_of_titans() -> list[dict]:
                 "Content-Type": "application/json",
             },
             json={"sorts": [{"property": "Fecha", "direction": "descending"}]},
-            timeout=10,
+            timeout=(3, 10),
         )
-        if not r.ok:
+        if result is None:
             return []
-        entries = []
-        for page in r.json().get("results", []):
-            props = page.get("properties", {})
-            title_parts = props.get("Lift", {}).get("title", [])
-            title = title_parts[0]["plain_text"] if title_parts else ""
-            url_obj = props.get("YouTube URL", {}).get("url")
-            peso = props.get("Peso (kg)", {}).get("number")
-            fecha_obj = props.get("Fecha", {}).get("date")
-            fecha = fecha_obj.get("start") if fecha_obj else None
-            ejercicio_obj = props.get("Ejercicio", {}).get("select")
-            ejercicio = ejercicio_obj.get("name") if ejercicio_obj else ""
-            epico_obj = props.get("Épico", {}).get("select")
-            epico = epico_obj.get("name") if epico_obj else ""
-            comment_parts = props.get("Comentario", {}).get("rich_text", [])
-            comentario = comment_parts[0]["plain_text"] if comment_parts else ""
-            bw_ratio_obj = props.get("×BW", {}).get("formula")
-            bw_ratio = bw_ratio_obj.get("number") if bw_ratio_obj else None
-
-            if url_obj:
-                entries.append({
-                    "title": title, "url": url_obj, "peso": peso,
-                    "fecha": fecha, "ejercicio": ejercicio, "epico": epico,
-                    "comentario": comentario, "bw_ratio": bw_ratio,
-                })
-        return entries
+        pages = result.get("results", [])
+        if not pages:
+            return []
+        # Flatten every page's properties into columns in one pass instead
+        # of walking eight nested .get() chains per row.
+        flat = pd.json_normalize(pages, sep=".")
+
+        def _col(key: str) -> pd.Series:
+            name = f"properties.{key}"
+            if name not in flat:
+                return pd.Series(None, index=flat.index, dtype=object)
+            col = flat[name].astype(object)
+            return col.where(col.notna(), None)
+
+        def _first_text(key: str) -> pd.Series:
+            return _col(key).str[0].astype(object).str["plain_text"].fillna("")
+
+        titans = pd.DataFrame({
+            "title": _first_text("Lift.title"),
+            "url": _col("YouTube URL.url"),
+            "peso": _col("Peso (kg).number"),
+            "fecha": _col("Fecha.date.start"),
+            "ejercicio": _col("Ejercicio.select.name").fillna(""),
+            "epico": _col("Épico.select.name").fillna(""),
+            "comentario": _first_text("Comentario.rich_text"),
+            "bw_ratio": _col("×BW.formula.number"),
+        })
+        titans = titans[titans["url"].fillna("").astype(bool)]
+        return titans.astype(object).where(titans.notna(), None).to_dict("records")
     except Exception:
         return []
 
 
+_YT_RE = _re.compile(
+    r"(?:youtu\.be/|youtube\.com/(?:watch\?v=|shorts/|embed/))([a-zA-Z0-9_-]{11})"
+)
+
+
+@lru_cache(maxsize=512)
 def _youtube_embed_url(url: str) -> str | None:
     """Extract YouTube video ID and return embed URL."""
     if not url:
         return None
-    patterns = [
-        r"(?:youtu\.be/|youtube\.com/watch\?v=|youtube\.com/shorts/)([a-zA-Z0-9_-]{11})",
-        r"youtube\.com/embed/([a-zA-Z0-9_-]{11})",
-    ]
-    for pattern in patterns:
-        match = _re.search(pattern, url)
-        if match:
-            return f"https://www.youtube.com/embed/{match.group(1)}"
-    return None
+    match = _YT_RE.search(url)
+    return f"https://www.youtube.com/embed/{match.group(1)}" if match else None
+
+
+_TITAN_BADGE_COLORS = {
+    "🔥 PR": "#ef4444", "💪 Heavy": "#f59e0b",
+    "🎯 Técnica": "#3b82f6", "😤 Grind": "#a855f7",
+    "⭐ Hito": "#eab308",
+}
+
+_TITAN_GRID_STYLE = (
+    "<style>"
+    ".titan-grid{display:grid;grid-template-columns:repeat(2,minmax(0,1fr));column-gap:16px;row-gap:8px;}"
+    "@media (max-width:640px){.titan-grid{grid-template-columns:1fr;}}"
+    "</style>"
+)
+
+_TITAN_CARD_HTML = (
+    '<div>'
+    '<div style="background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);'
+    'border: 1px solid #2d3748; border-radius: 12px; padding: 16px; margin-bottom: 16px;">'
+    '<div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 8px;">'
+    '<span style="font-weight: 700; font-size: 1.1rem; color: #f1f5f9;">{title}</span>'
+    '<span style="background: {badge}; color: white; padding: 2px 10px;'
+    'border-radius: 12px; font-size: 0.8rem; font-weight: 600;">{epico}</span>'
+    '</div>'
+    '<div style="color: #94a3b8; font-size: 0.85rem; margin-bottom: 10px;">{meta}</div>'
+    '</div>'
+    '{video}{comment}'
+    '</div>'
+)
+
+_TITAN_IFRAME_HTML = (
+    '<iframe width="100%" height="280" src="{src}" '
+    'frameborder="0" allow="accelerometer; autoplay; clipboard-write; '
+    'encrypted-media; gyroscope; picture-in-picture" '
+    'allowfullscreen style="border-radius: 8px;"></iframe>'
+)
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _titans_grid_html(titans: list[dict]) -> str:
+    """Every Hall of Titans card as one 2-column grid (header, video, comment).
+
+    Cards are formatted in a single pass so the page emits one markdown
+    element instead of a column pair plus three elements per titan.
+    """
+    cards = []
+    for t in titans:
+        peso_str = f"{t['peso']:.0f}kg" if t.get("peso") else ""
+        bw_str = f" ({t['bw_ratio']:.2f}×BW)" if t.get("bw_ratio") else ""
+        embed = _youtube_embed_url(t["url"])
+        cards.append(_TITAN_CARD_HTML.format(
+            title=_html.escape(t["title"]),
+            badge=_TITAN_BADGE_COLORS.get(t["epico"], "#6b7280"),
+            epico=_html.escape(t["epico"]),
+            meta=_html.escape(f"{t['ejercicio']} · {peso_str}{bw_str} · {t.get('fecha') or ''}"),
+            video=(_TITAN_IFRAME_HTML.format(src=embed) if embed
+                   else f'<a href="{_html.escape(t["url"])}" target="_blank">🔗 Ver vídeo</a>'),
+            comment=(f'<div style="color: #94a3b8; font-size: 0.85rem; margin-top: 6px;">'
+                     f'💬 "{_html.escape(t["comentario"])}"</div>' if t.get("comentario") else ""),
+        ))
+    return f'{_TITAN_GRID_STYLE}<div class="titan-grid">{"".join(cards)}</div>'
+
+
+_CAL_LEGEND_ITEMS = (
+    ("#3b82f6", "", "5s"),
+    ("#f59e0b", "", "3s"),
+    ("#ef4444", "", "531"),
+    ("#22c55e", "", "Deload"),
+    ("#6b7280", "border:3px solid #2563eb;", "Semana actual"),
+)
+_CAL_LEGEND_MD = "### Leyenda\n\n" + (
+    '<div style="display:flex;flex-wrap:wrap;gap:14px;margin-top:4px;">'
+    + "".join(
+        '<div style="display:flex;align-items:center;gap:5px;">'
+        f'<div style="width:14px;height:14px;border-radius:50%;background:{color};{border}flex-shrink:0;"></div>'
+        f'<span>{label}</span></div>'
+        for color, border, label in _CAL_LEGEND_ITEMS
+    )
+    + '</div>'
+)
+
+
+# Day cells share their fixed styling through classes; only the colour,
+# border, day and week number are interpolated per cell.
+_CAL_CELL_STYLE = (
+    "<style>"
+    ".cal-td{padding:3px;text-align:center;}"
+    ".cal-day{width:30px;height:30px;border-radius:50%;display:flex;align-items:center;"
+    "justify-content:center;margin:0 auto;font-size:11px;}"
+    ".cal-day.on{font-weight:bold;color:white;text-shadow:0 0 2px black;}"
+    ".cal-day.off{background:#1f2937;border:1px solid #374151;color:#6b7280;}"
+    ".cal-wk{font-size:8px;color:#a8a29e;margin-top:1px;font-family:monospace;}"
+    "</style>"
+)
+_CAL_BLANK_CELL = '<td class="cal-td"></td>'
+_CAL_WEEK_CELL = (
+    '<td class="cal-td"><div class="cal-day on" style="background:{color};border:{border};">{day}</div>'
+    '<div class="cal-wk">W{week}</div></td>'
+)
+_CAL_OFF_CELL = '<td class="cal-td"><div class="cal-day off">{day}</div></td>'
+
+
+@lru_cache(maxsize=4)
+def _year_matrix(year: int) -> tuple[list[list[int]], ...]:
+    """monthcalendar() for each month of ``year`` (0-based month index)."""
+    return tuple(monthcalendar(year, m + 1) for m in range(12))
+
+
+@lru_cache(maxsize=4)
+def _abs_weeks(year: int) -> np.ndarray:
+    """Fixed-offset week number (1-based) for each day of ``year``, by day-of-year."""
+    return np.arange(366 if isleap(year) else 365) // 7 + 1
 
 
 def render_monthly_calendar(cal_data: dict, focus_month: int | None = None, show_all_toggle: bool = True):
@@ -159,9 +396,6 @@ def render_monthly_calendar(cal_data: dict, focus_month: int | None = None, show
         focus_month: 0-based month index to show (None = all months).
         show_all_toggle: show the "ver todo el año" toggle when focus_month is set.
     """
-    from calendar import monthcalendar
-    from datetime import date, timedelta
-
     weeks = cal_data["weeks"]
     year = cal_data.get("year", 2026)
     week_data = {w["abs_week"]: w for w in weeks}
@@ -203,10 +437,16 @@ def render_monthly_calendar(cal_data: dict, focus_month: int | None = None, show
         "text-align:center;padding:4px 2px;font-size:0.72rem;"
         "color:#a8a29e;font-weight:600;width:14.28%;"
     )
+    thead = "".join(f'<th style="{th_style}">{d}</th>' for d in days_header)
 
+    # Every month goes into one HTML string so the whole calendar is a
+    # single markdown element instead of one per month.
+    html: list[str] = [_CAL_CELL_STYLE]
+    year_matrix = _year_matrix(year)
     for m_idx in months_to_show:
         month_name = month_names[m_idx]
-        cal_matrix = monthcalendar(year, m_idx + 1)
+        cal_matrix = year_matrix[m_idx]
+        month_doy = date(year, m_idx + 1, 1).timetuple().tm_yday - 1
 
         # Month subtitle from enriched data (block context)
         meta = months_meta.get(m_idx)
@@ -218,96 +458,152 @@ def render_monthly_calendar(cal_data: dict, focus_month: int | None = None, show
         else:
             subtitle_html = ""
 
-        html = (
+        html.append(
             f'<div style="margin-bottom:24px;">'
             f'<div style="font-size:1rem;font-weight:700;margin-bottom:2px;color:#fafaf9;">'
             f'{month_name} {year}</div>'
             f'{subtitle_html}'
             f'<table style="border-collapse:collapse;width:100%;table-layout:fixed;">'
-            f'<thead><tr>'
+            f'<thead><tr>{thead}</tr></thead><tbody>'
         )
-        for d in days_header:
-            html += f'<th style="{th_style}">{d}</th>'
-        html += '</tr></thead><tbody>'
 
         for week in cal_matrix:
-            html += '<tr>'
+            html.append('<tr>')
             for day in week:
                 if day == 0:
-                    html += '<td style="padding:3px;"></td>'
+                    html.append(_CAL_BLANK_CELL)
                 else:
-                    current_date = date(year, m_idx + 1, day)
                     if has_date_info:
-                        abs_week = date_to_week.get(current_date)
+                        abs_week = date_to_week.get(date(year, m_idx + 1, day))
                     else:
                         # Fallback: old fixed-offset logic
-                        abs_week = ((current_date - date(year, 1, 1)).days // 7) + 1
+                        abs_week = int(_abs_weeks(year)[month_doy + day - 1])
 
                     if abs_week and abs_week in week_data:
                         w = week_data[abs_week]
                         color = color_map.get(w["type"], "#6b7280")
                         is_current = w["status"] == "current"
                         border = "3px solid #2563eb" if is_current else f"2px solid {color}"
-                        html += (
-                            f'<td style="padding:3px;text-align:center;">'
-                            f'<div style="width:30px;height:30px;border-radius:50%;'
-                            f'background:{color};border:{border};'
-                            f'display:flex;align-items:center;justify-content:center;'
-                            f'margin:0 auto;font-size:11px;font-weight:bold;'
-                            f'color:white;text-shadow:0 0 2px black;">{day}</div>'
-                            f'<div style="font-size:8px;color:#a8a29e;margin-top:1px;'
-                            f'font-family:monospace;">W{abs_week}</div>'
-                            f'</td>'
-                        )
+                        html.append(_CAL_WEEK_CELL.format(
+                            color=color, border=border, day=day, week=abs_week,
+                        ))
                     else:
-                        html += (
-                            f'<td style="padding:3px;text-align:center;">'
-                            f'<div style="width:30px;height:30px;border-radius:50%;'
-                            f'background:#1f2937;border:1px solid #374151;'
-                            f'display:flex;align-items:center;justify-content:center;'
-                            f'margin:0 auto;font-size:11px;color:#6b7280;">{day}</div>'
-                            f'</td>'
-                        )
-            html += '</tr>'
+                        html.append(_CAL_OFF_CELL.format(day=day))
+            html.append('</tr>')
 
-        html += '</tbody></table></div>'
-        st.markdown(html, unsafe_allow_html=True)
+        html.append('</tbody></table></div>')
+    st.markdown("".join(html), unsafe_allow_html=True)
 
     # Legend — flexbox HTML avoids mobile column-stacking issues
-    st.markdown("### Leyenda")
-    st.markdown(
-        '<div style="display:flex;flex-wrap:wrap;gap:14px;margin-top:4px;">'
-        '<div style="display:flex;align-items:center;gap:5px;">'
-        '<div style="width:14px;height:14px;border-radius:50%;background:#3b82f6;flex-shrink:0;"></div>'
-        '<span>5s</span></div>'
-        '<div style="display:flex;align-items:center;gap:5px;">'
-        '<div style="width:14px;height:14px;border-radius:50%;background:#f59e0b;flex-shrink:0;"></div>'
-        '<span>3s</span></div>'
-        '<div style="display:flex;align-items:center;gap:5px;">'
-        '<div style="width:14px;height:14px;border-radius:50%;background:#ef4444;flex-shrink:0;"></div>'
-        '<span>531</span></div>'
-        '<div style="display:flex;align-items:center;gap:5px;">'
-        '<div style="width:14px;height:14px;border-radius:50%;background:#22c55e;flex-shrink:0;"></div>'
-        '<span>Deload</span></div>'
-        '<div style="display:flex;align-items:center;gap:5px;">'
-        '<div style="width:14px;height:14px;border-radius:50%;background:#6b7280;'
-        'border:3px solid #2563eb;flex-shrink:0;"></div>'
-        '<span>Semana actual</span></div>'
-        '</div>',
-        unsafe_allow_html=True,
-    )
+    st.markdown(_CAL_LEGEND_MD, unsafe_allow_html=True)
 
 
-_CSS_LOADED = False
+_CAL_WEEK_DETAILS_HTML = (
+    '<details style="border:1px solid #292524;border-radius:8px;'
+    'padding:8px 14px;margin-bottom:8px;">'
+    '<summary style="cursor:pointer;color:#fafaf9;">{header}</summary>'
+    '<div style="margin-top:6px;">{body}</div>'
+    '</details>'
+)
+_CAL_CAPTION_HTML = '<div style="color:#a8a29e;font-size:0.85rem;margin:2px 0;">{}</div>'
+_WEEK_SCHEMES = {1: "65/75/85% × 5", 2: "70/80/90% × 3", 3: "75/85/95% × 5/3/1+"}
+_LIFT_LABELS_531 = {"ohp": "OHP", "deadlift": "Deadlift", "bench": "Bench", "squat": "Zercher"}
+# Spanish lift names used by Inteligencia and the Quality Score table
+_LIFT_NAMES_531 = {"ohp": "OHP", "deadlift": "Peso Muerto", "bench": "Banca", "squat": "Sentadilla"}
+# Fixed lift categories (alphabetical, as inferred categories would be) so every
+# 531 frame shares them and relabelling touches the categories, not the rows.
+_LIFT_CATEGORIES_531 = pd.CategoricalDtype(sorted(_LIFT_LABELS_531))
+
+
+def _label_lifts(lift: pd.Series) -> pd.Series:
+    """Display labels for a 531 lift column (OHP, Deadlift, ..., Zercher)."""
+    if isinstance(lift.dtype, pd.CategoricalDtype):
+        return lift.cat.rename_categories(lambda c: _LIFT_LABELS_531.get(c, c))
+    return lift.map(_LIFT_LABELS_531)
+
+
+# 531 display tables: source column → header, used as df[list(C)].rename(columns=C)
+_SUPPLEMENTAL_COLS_531 = {
+    "date": "Fecha", "lift": "Lift", "weight_kg": "Peso (kg)", "n_sets": "Sets",
+    "total_reps": "Total Reps", "avg_reps": "Avg Reps", "pct_of_tm": "% TM",
+}
+_TM_PROGRESSION_COLS_531 = {
+    "lift": "Lift", "date": "Fecha", "amrap_weight": "AMRAP Peso", "amrap_reps": "AMRAP Reps",
+    "e1rm": "e1RM", "estimated_tm": "TM Estimado", "current_tm": "TM Actual",
+}
+# e1rm_delta is only present once there are two cycles to compare
+_CYCLE_COLS_531 = {
+    "cycle_num": "Ciclo", "lift": "Lift", "amrap_avg_reps": "AMRAP Reps (avg)",
+    "amrap_best_e1rm": "Mejor e1RM", "bbb_total_volume": "BBB Volumen", "e1rm_delta": "Δ e1RM (kg)",
+}
+_AMRAP_PERF_COLS_531 = {
+    "date": "Fecha", "week_label": "Semana", "weight_kg": "Peso", "reps": "Reps",
+    "e1rm": "e1RM", "reps_delta": "Δ Reps", "e1rm_delta": "Δ e1RM",
+}
+_BBB_FATIGUE_COLS_531 = {
+    "date": "Fecha", "weight_kg": "Peso", "reps_str": "Reps", "avg_reps": "Media",
+    "rep_dropoff": "Dropoff", "pct_of_tm": "%TM", "fatigue_status": "Estado",
+}
+_QUALITY_COLS_531 = {
+    "date": "Fecha", "lift": "Lift", "quality_score": "Score", "grade": "Nota",
+    "amrap_score": "AMRAP /40", "bbb_score": "BBB /30", "acc_score": "Acc /15", "vol_score": "Vol /15",
+}
+
+
+def _upcoming_week_html(w: dict, header: str, tm_str: str, lift_labels: dict) -> str:
+    """Collapsible HTML block for a future calendar week: TMs + expected weights."""
+    body = [_CAL_CAPTION_HTML.format(f"TMs: {tm_str}")]
+    if w.get("supplemental_name"):
+        body.append(_CAL_CAPTION_HTML.format(
+            f"Template: {w['supplemental_name']} · "
+            f"Main: {w.get('main_work_name', '?')} · "
+            f"TM {w.get('tm_pct', 85)}%"
+        ))
+    ww = w.get("week_weights", {})
+    if w["is_deload"]:
+        body.append(_CAL_CAPTION_HTML.format("Semana ligera: 40/50/60% × 5 reps"))
+    elif ww:
+        for lift_key, lbl in lift_labels.items():
+            sets = ww.get(lift_key, [])
+            if sets:
+                parts = " → ".join(f"{s['weight']:.0f}kg ×{s['reps']}" for s in sets)
+                body.append(f'<div style="margin:2px 0 2px 16px;"><b>{lbl}:</b> {parts}</div>')
+    else:
+        body.append(_CAL_CAPTION_HTML.format(f"Esquema: {_WEEK_SCHEMES.get(w['week_type'], '?')}"))
+    return _CAL_WEEK_DETAILS_HTML.format(header=header, body="".join(body))
 
-def _inject_base_css():
-    global _CSS_LOADED
-    if _CSS_LOADED:
-        return
-    _CSS_LOADED = True
-    st.markdown("""
+
+def _tm_bump_table(weeks: list[dict]) -> pd.DataFrame:
+    """One row per TM bump level: the week it starts and the TMs in force."""
+    wdf = pd.DataFrame(weeks, columns=["tm_bumps", "abs_week", "tms"]).drop_duplicates("tm_bumps")
+    if wdf.empty:
+        return pd.DataFrame()
+    tms = pd.json_normalize(wdf["tms"].tolist()).map("{:.0f}".format)
+    return pd.DataFrame({
+        "Bumps": wdf["tm_bumps"].to_numpy(),
+        "Desde": ("W" + wdf["abs_week"].astype(str)).to_numpy(),
+        "OHP": tms["ohp"],
+        "DL": tms["deadlift"],
+        "Bench": tms["bench"],
+        "Squat": tms["squat"],
+    })
+
+
+# Preconnect + <link> lets the browser fetch fonts in parallel instead of
+# discovering them through a render-blocking @import inside <style>. Appended
+# after </style> so the markdown parser still sees one HTML block.
+_FONT_LINKS_HTML = (
+    '<link rel="preconnect" href="https://fonts.googleapis.com">'
+    '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+    '<link rel="stylesheet" href="{}">'
+)
+
+
+@st.cache_resource(show_spinner=False)
+def _base_css() -> str:
+    """Base stylesheet, built once per process rather than on every rerun."""
+    return """
     <style>
-        @import url('https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;500;600;700&family=JetBrains+Mono:wght@400;500&display=swap');
         .stApp { font-family: 'Space Grotesk', sans-serif; }
         code, .stCode { font-family: 'JetBrains Mono', monospace; }
         div[data-testid="stMetric"] {
@@ -330,20 +626,20 @@ def _inject_base_css():
             div[data-testid="stExpander"] summary { font-size: 0.9rem !important; }
         }
     </style>
-    """, unsafe_allow_html=True)
+    """ + _FONT_LINKS_HTML.format(
+        "https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;500;600;700&amp;family=JetBrains+Mono:wght@400;500&amp;display=swap"
+    )
 
 
-_531_CSS_LOADED = False
+def _inject_base_css():
+    st.markdown(_base_css(), unsafe_allow_html=True)
 
-def _inject_531_css():
-    """Inject Skull Forge aesthetic — brutalist/industrial identity for 531."""
-    global _531_CSS_LOADED
-    if _531_CSS_LOADED:
-        return
-    _531_CSS_LOADED = True
-    st.markdown("""
+
+@st.cache_resource(show_spinner=False)
+def _skull_forge_css() -> str:
+    """Skull Forge stylesheet, built once per process rather than on every rerun."""
+    return """
     <style>
-        @import url('https://fonts.googleapis.com/css2?family=Oswald:wght@400;500;600;700&family=IBM+Plex+Mono:wght@400;500;600&display=swap');
 
         /* ── 531 SKULL FORGE IDENTITY ─────────────────────── */
         h1, h2, h3 {
@@ -681,7 +977,14 @@ def _inject_531_css():
             .sf-gauge .pct { font-size: 2.2rem !important; }
         }
     </style>
-    """, unsafe_allow_html=True)
+    """ + _FONT_LINKS_HTML.format(
+        "https://fonts.googleapis.com/css2?family=Oswald:wght@400;500;600;700&amp;family=IBM+Plex+Mono:wght@400;500;600&amp;display=swap"
+    )
+
+
+def _inject_531_css():
+    """Inject Skull Forge aesthetic — brutalist/industrial identity for 531."""
+    st.markdown(_skull_forge_css(), unsafe_allow_html=True)
 
 
 # ── 531 HTML Rendering Helpers ────────────────────────────────────────
@@ -691,9 +994,14 @@ def _sf_header(text: str, emoji: str = "💀"):
     st.markdown(f'<div class="sf-header">{emoji} {text}</div>', unsafe_allow_html=True)
 
 
+def _sf_sub_html(text: str, emoji: str = "") -> str:
+    """Return HTML for a Skull Forge sub-header."""
+    return f'<div class="sf-subheader">{emoji} {text}</div>'
+
+
 def _sf_sub(text: str, emoji: str = ""):
     """Render a Skull Forge sub-header."""
-    st.markdown(f'<div class="sf-subheader">{emoji} {text}</div>', unsafe_allow_html=True)
+    st.markdown(_sf_sub_html(text, emoji), unsafe_allow_html=True)
 
 
 def _sf_metrics_row(metrics: list[dict]):
@@ -790,6 +1098,14 @@ PL = dict(
     font=dict(family="Space Grotesk", color="#e2e8f0"), margin=dict(l=40, r=20, t=40, b=40),
 )
 
+# Indicator gauges keep Streamlit's default template; only the paper and font are themed
+PL_GAUGE = dict(paper_bgcolor="rgba(0,0,0,0)", font=dict(color="#e2e8f0"))
+
+# Indexed by intra_session_fatigue's pattern_code: Estable, Moderada, Alta
+FATIGUE_COLORS = np.array(["#22c55e", "#f59e0b", "#ef4444"])
+
+DAY_COLORS = {num: cfg.get("color", "#666") for num, cfg in DAY_CONFIG.items()}
+
 PL_531 = dict(
     template="plotly_dark", paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
     font=dict(family="Oswald, sans-serif", color="#e7e5e4", size=13),
@@ -799,14 +1115,342 @@ PL_531 = dict(
     colorway=["#dc2626", "#3b82f6", "#fbbf24", "#22c55e", "#8b5cf6", "#ec4899", "#f97316"],
 )
 
+# ── 531 Inteligencia Tabs ─────────────────────────────────────────────
+# One function per tab body; the tabs hold no widgets, so they rerun with the page.
+
+_SF_GAUGE_HTML = (
+    '<div class="sf-gauge">'
+    '  <div class="pct {cls}">{pct:.0%}</div>'
+    '  <div class="label">{label}</div>'
+    '</div>'
+)
+_SF_INTEL_CARD_HTML = (
+    '<div class="sf-intel-card">'
+    '  <div class="title">{title}</div>'
+    '  <div class="verdict">{verdict}</div>'
+    '  <div style="margin-top:8px;font-family:IBM Plex Mono,monospace;'
+    'font-size:0.8rem;color:{color};">'
+    '    {icon} Reps {trend_txt}'
+    '  </div>'
+    '</div>'
+)
+_SF_VERDICT_CARD_HTML = (
+    '<div class="sf-card">'
+    '  <div style="font-family:Oswald,sans-serif;text-transform:uppercase;'
+    'letter-spacing:1px;color:#a8a29e;font-size:0.75rem;margin-bottom:6px;">{label}</div>'
+    '  <div style="font-family:IBM Plex Mono,monospace;font-size:0.9rem;'
+    'color:#fafaf9;">{text}</div>'
+    '</div>'
+)
+# trend → (icon, color, text)
+_REPS_TREND_STYLE = {
+    "declining": ("📉", "#ef4444", "en descenso"),
+    "improving": ("📈", "#22c55e", "mejorando"),
+}
+_REPS_TREND_DEFAULT = ("➡️", "#78716c", "estables")
+
+def _intel_tab_tm(df_531: pd.DataFrame, lift_names: dict):
+    """TM sustainability gauge, per-lift verdicts and TM recommendations."""
+    _sf_sub("¿Tu Training Max es sostenible?", "🎯")
+    st.markdown(
+        '<div class="sf-caption">Basado en reps AMRAP vs mínimos de Wendler. '
+        'Si no llegas al mínimo, el TM es demasiado alto.</div>',
+        unsafe_allow_html=True,
+    )
+
+    sus = _tm_sustainability(df_531)
+
+    if sus["system_health"] is not None:
+        health = sus["system_health"]
+        if health >= 0.8:
+            cls = "good"
+        elif health >= 0.4:
+            cls = "mid"
+        else:
+            cls = "bad"
+        st.markdown(
+            _SF_GAUGE_HTML.format(cls=cls, pct=health, label="Salud del sistema"),
+            unsafe_allow_html=True,
+        )
+
+    cols = st.columns(len(sus["lifts"]) or 1)
+    for i, (lift, data) in enumerate(sus["lifts"].items()):
+        with cols[i % len(cols)]:
+            icon, color, trend_txt = _REPS_TREND_STYLE.get(data["trend"], _REPS_TREND_DEFAULT)
+            st.markdown(
+                _SF_INTEL_CARD_HTML.format(
+                    title=lift_names.get(lift, lift), verdict=data["verdict"],
+                    color=color, icon=icon, trend_txt=trend_txt,
+                ),
+                unsafe_allow_html=True,
+            )
+            if data["alerts"]:
+                for alert in data["alerts"]:
+                    st.warning(alert)
+
+    # TM recommendations table
+    _sf_sub("Recomendaciones TM", "⚙️")
+    vtm = _validate_tm(df_531)
+    if vtm:
+        vtm_rows = []
+        for lift, info in vtm.items():
+            vtm_rows.append({
+                "Lift": lift_names.get(lift, lift),
+                "Estado": "✅" if info["status"] == "ok" else ("⬆️ Subir" if info["status"] == "too_light" else "⬇️ Bajar"),
+                "TM Actual": f"{info['current_tm']:.0f} kg",
+                "TM Recomendado": f"{info['recommended_tm']:.0f} kg",
+                "Delta": f"{info['tm_delta']:+.0f} kg",
+                "Avg Reps +Min": f"{info['avg_reps_over_min']:+.1f}",
+            })
+        st.dataframe(pd.DataFrame(vtm_rows), use_container_width=True, hide_index=True)
+
+
+def _intel_tab_perf(df_531: pd.DataFrame, lift_names: dict):
+    """AMRAP reps at the same %TM across mini-cycles, per lift."""
+    _sf_sub("Rendimiento AMRAP — Misma semana, ¿más reps?", "📊")
+    st.markdown(
+        '<div class="sf-caption">Compara tus AMRAP en el mismo tipo de semana (5s/3s/531) '
+        'a lo largo de los ciclos. Mantener o subir reps con más peso = progreso real.</div>',
+        unsafe_allow_html=True,
+    )
+
+    api = _amrap_performance_index(df_531)
+    if api.empty:
+        st.info("Necesitas al menos 2 ciclos para comparar.")
+    else:
+        for lift, lift_api in api.groupby("lift", sort=False, observed=True):
+            _sf_sub(lift_names.get(lift, lift), "")
+
+            st.plotly_chart(_amrap_perf_fig(lift_api), use_container_width=True, key=f"amrap_perf_{lift}")
+
+            display = (
+                lift_api[list(_AMRAP_PERF_COLS_531)]
+                .assign(date=_fmt_dates(lift_api["date"], "%d/%m"))
+                .rename(columns=_AMRAP_PERF_COLS_531)
+            )
+            st.dataframe(display, use_container_width=True, hide_index=True)
+
+
+def _intel_tab_joker(df_531: pd.DataFrame, lift_names: dict):
+    """Joker set frequency and per-lift bests."""
+    _sf_sub("Joker Sets — Uso y tendencia", "⚡")
+    st.markdown(
+        '<div class="sf-caption">Singles/doubles pesados después del AMRAP. '
+        'Bien usados aprovechan días buenos. Abusados acumulan fatiga.</div>',
+        unsafe_allow_html=True,
+    )
+
+    ja = _joker_analysis(df_531)
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Total Joker Sets", ja["total_joker_sets"])
+    c2.metric("Sesiones con Jokers", f"{ja['sessions_with_jokers']}/{ja['total_sessions']}")
+    c3.metric("Frecuencia", f"{ja['frequency_pct']}%")
+
+    # Assessment as styled card
+    st.markdown(
+        _SF_VERDICT_CARD_HTML.format(label="Valoración", text=ja["assessment"]),
+        unsafe_allow_html=True,
+    )
+
+    if ja["per_lift"]:
+        for lift, data in ja["per_lift"].items():
+            with st.expander(f"{lift_names.get(lift, lift)} — {data['count']} joker sets"):
+                jc1, jc2, jc3 = st.columns(3)
+                jc1.metric("Mejor peso", f"{data['best_weight']:.0f} kg")
+                jc2.metric("Mejor e1RM", f"{data['best_e1rm']:.0f} kg")
+                if data['avg_pct_of_tm']:
+                    jc3.metric("Media %TM", f"{data['avg_pct_of_tm']:.0f}%")
+
+
+def _intel_tab_bbb(df_531: pd.DataFrame, lift_names: dict):
+    """BBB 5×10 rep drop-off per lift."""
+    _sf_sub("Fatiga en BBB 5×10", "🏋️")
+    st.markdown(
+        '<div class="sf-caption">¿Pierdes reps en las últimas series del 5×10? '
+        'Si el dropoff es alto, el % BBB puede ser excesivo.</div>',
+        unsafe_allow_html=True,
+    )
+
+    bf = _bbb_fatigue_trend(df_531)
+    if bf.empty:
+        st.info("Sin datos BBB registrados.")
+    else:
+        avg_dropoff = bf["rep_dropoff"].mean()
+        pct_perfect = (bf["all_tens"].sum() / len(bf) * 100)
+        bc1, bc2, bc3 = st.columns(3)
+        bc1.metric("Drop-off medio", f"{avg_dropoff:+.1f} reps")
+        bc2.metric("5×10 completas", f"{pct_perfect:.0f}%")
+        bc3.metric("Sesiones BBB", len(bf))
+
+        for lift, lf in bf.groupby("lift", sort=False, observed=True):
+            lf = lf.sort_values("date")
+            _sf_sub(lift_names.get(lift, lift), "")
+
+            display = (
+                lf[list(_BBB_FATIGUE_COLS_531)]
+                .assign(date=_fmt_dates(lf["date"], "%d/%m"))
+                .rename(columns=_BBB_FATIGUE_COLS_531)
+            )
+            st.dataframe(display, use_container_width=True, hide_index=True)
+
+
+def _intel_tab_1rm(df_531: pd.DataFrame, lift_names: dict):
+    """Estimated true 1RM vs running max and TM, per lift."""
+    _sf_sub("1RM Real Estimado", "📈")
+    st.markdown(
+        '<div class="sf-caption">Tu 1RM real estimado desde AMRAPs — NO es tu Training Max. '
+        'El TM debería ser ~85-90% de este valor.</div>',
+        unsafe_allow_html=True,
+    )
+
+    t1rm = _true_1rm_trend(df_531)
+    if t1rm.empty:
+        st.info("Sin AMRAPs para estimar.")
+    else:
+        for lift, lt in t1rm.groupby("lift", sort=False, observed=True):
+            lt = lt.sort_values("date")
+            _sf_sub(lift_names.get(lift, lift), "")
+
+            st.plotly_chart(_true_1rm_fig(lt), use_container_width=True, key=f"true_1rm_{lift}")
+
+            latest = lt.iloc[-1]
+            rc1, rc2, rc3 = st.columns(3)
+            rc1.metric("e1RM actual", f"{latest['estimated_1rm']:.0f} kg",
+                      delta=f"{latest['e1rm_delta']:+.0f} kg" if pd.notna(latest.get("e1rm_delta")) else None)
+            rc2.metric("Running max", f"{latest['running_max']:.0f} kg")
+            if pd.notna(latest.get("tm_as_pct_of_1rm")):
+                pct = latest["tm_as_pct_of_1rm"]
+                rc3.metric("TM como % de 1RM",
+                          f"{pct:.0f}%",
+                          delta="OK" if 82 <= pct <= 92 else ("Alto" if pct > 92 else "Bajo"),
+                          delta_color="normal" if 82 <= pct <= 92 else "inverse")
+
+
+# ── BBD Niveles HTML ─────────────────────────────────────────────────
+_LEVEL_COLORS = {
+    1: "#6b7280", 2: "#6b7280", 3: "#22c55e", 4: "#22c55e",
+    5: "#3b82f6", 6: "#3b82f6", 7: "#a855f7", 8: "#f59e0b",
+    9: "#ef4444", 10: "#ef4444",
+}
+
+
+_ACH_GRID_HTML = (
+    '<div style="display:grid;grid-template-columns:repeat(3,minmax(0,1fr));column-gap:16px;">'
+    '{cards}</div>'
+)
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _gamification_html(gam: dict) -> tuple[str, dict]:
+    """Level banner and achievement card HTML for 🎮 Niveles.
+
+    Returns ``(banner_html, {category: grid_html})`` in achievement order; each
+    category's cards sit in one 3-column CSS grid so the page emits a single
+    markdown element per category.
+    """
+    color = _LEVEL_COLORS.get(gam["level"], "#6b7280")
+    banner = f"""
+    <div style="background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
+        border: 2px solid {color}; border-radius: 16px; padding: 24px; text-align: center;
+        margin-bottom: 20px;">
+        <div style="font-size: 3.5rem; margin-bottom: 4px;">⚔️</div>
+        <div style="font-size: 2rem; font-weight: 700; color: {color};">
+            Nivel {gam['level']} — {gam['title']}
+        </div>
+        <div style="color: #94a3b8; margin-top: 8px;">
+            {gam['xp']} XP · {gam['unlocked']}/{gam['total']} logros desbloqueados
+        </div>
+    </div>
+    """
+
+    cards = {}
+    for a in gam["achievements"]:
+        if a["unlocked"]:
+            border_color, icon, opacity = "#22c55e", "✅", "1"
+        else:
+            border_color, icon, opacity = "#2d3748", "🔒", "0.6"
+        pct = int(a["progress"] * 100)
+        bar_w = min(pct, 100)
+        cards.setdefault(a["cat"], []).append(f"""<div style="background: #1a1a2e; border: 1px solid {border_color};
+            border-radius: 12px; padding: 14px; margin-bottom: 10px; opacity: {opacity};">
+            <div style="display: flex; justify-content: space-between; align-items: center;">
+                <span style="font-weight: 600; color: #f1f5f9;">{icon} {a['name']}</span>
+                <span style="color: #fbbf24; font-size: 0.8rem; font-weight: 600;">{a['xp']} XP</span>
+            </div>
+            <div style="color: #94a3b8; font-size: 0.8rem; margin: 6px 0;">{a['desc']}</div>
+            <div style="background: #0f172a; border-radius: 4px; height: 8px; margin-top: 8px;">
+                <div style="background: {border_color}; width: {bar_w}%; height: 100%;
+                    border-radius: 4px;"></div>
+            </div>
+            <div style="color: #64748b; font-size: 0.75rem; margin-top: 4px;">
+                {a['current']} · {pct}%
+            </div>
+        </div>""")
+    grids = {cat: _ACH_GRID_HTML.format(cards="".join(cat_cards)) for cat, cat_cards in cards.items()}
+    return banner, grids
+
+
+# ── BBD Strength Standards HTML ───────────────────────────────────────
+_STD_STYLE = (
+    "<style>"
+    ".std-row{display:flex;gap:12px;align-items:center;padding:10px 0;"
+    "border-bottom:1px solid #2d3748;}"
+    ".std-ex{flex:3;min-width:0;}"
+    ".std-ex b{color:#f1f5f9;}"
+    ".std-sub{color:#94a3b8;font-size:0.8rem;}"
+    ".std-lvl{flex:1;font-size:1.4rem;font-weight:700;}"
+    ".std-pct{flex:1;}"
+    ".std-next{flex:2;font-size:1.4rem;font-weight:600;}"
+    ".std-lbl{color:#94a3b8;font-size:0.8rem;font-weight:400;}"
+    ".std-delta{color:#22c55e;font-size:0.85rem;}"
+    "</style>"
+)
+
+_STD_ROW_HTML = (
+    '<div class="std-row">'
+    '<div class="std-ex"><b>{exercise}</b><div class="std-sub">{detail}</div></div>'
+    '<div class="std-lvl">{level}</div>'
+    '<div class="std-pct"><div class="std-lbl">Percentil</div>~{percentile}%</div>'
+    '<div class="std-next"><div class="std-lbl">Siguiente nivel</div>{nxt}</div>'
+    '</div>'
+)
+
+
+# ── BBD Adherencia HTML ───────────────────────────────────────────────
+_ADH_CARD_HTML = (
+    '<div style="background: linear-gradient(135deg, #1a1a2e, #16213e);'
+    'border-left: 4px solid {color}; border-radius: 8px; padding: 16px; margin-bottom: 12px;">'
+    '<div style="font-size: 1.5rem;">{status}</div>'
+    '<div style="font-weight: 600; color: #f1f5f9;">{day}</div>'
+    '<div style="color: #94a3b8; font-size: 0.85rem;">{focus}</div>'
+    '<div style="color: #e2e8f0; margin-top: 8px;">{n}× · Última: {last}</div>'
+    '</div>'
+)
+
+
+# ── BBD PRs HTML ─────────────────────────────────────────────────────
+_PR_CARD_HTML = (
+    '<div style="font-size: 1.5rem; font-weight: 600; margin-bottom: 8px;">{medal} {exercise}</div>'
+    '<div style="color: #94a3b8; font-size: 0.85rem;">e1RM</div>'
+    '<div style="font-size: 2rem; color: #f1f5f9;">{e1rm} kg</div>'
+    '<div style="color: #94a3b8; font-size: 0.85rem; margin-top: 4px;">'
+    '{weight}kg × {reps} · {bw:.2f}×BW · {fecha}</div>'
+)
+
+
 # ── Data Loading ─────────────────────────────────────────────────────
 @st.cache_data(ttl=120)
 def load_raw_data():
-    """Cache raw Hevy data only — derived columns computed fresh each time."""
+    """Cache raw Hevy data only — derived columns are memoized by _add_derived_columns."""
     workouts = fetch_bbd_workouts()
     return workouts_to_dataframe(workouts)
 
 
+# Low-cardinality label columns: category codes make == filters and groupbys cheaper.
+# Groupbys on these columns must pass observed=True (pandas 2.x defaults to False).
+_CATEGORICAL_531 = ("lift", "set_type", "muscle_group", "week_name", "workout_title")
+
+
 @st.cache_data(ttl=120)
 def load_531_data():
     """Cache 531 BBB data."""
@@ -816,9 +1460,18 @@ def load_531_data():
     df = workouts_to_dataframe_531(workouts)
     if not df.empty:
         df = add_cycle_info(df)
+        df = df.astype({c: "category" for c in _CATEGORICAL_531 if c in df.columns})
+        df["lift"] = df["lift"].astype(_LIFT_CATEGORIES_531)
     return df
 
 
+@st.cache_data(ttl=120)
+def _last_531_date() -> pd.Timestamp:
+    """Date of the latest 531 session, without building the full 531 frame."""
+    workout = _fetch_latest_bbb_workout()
+    return pd.Timestamp(workout["start_time"][:10]) if workout else pd.Timestamp.min
+
+
 @st.cache_data(ttl=120)
 def load_candito_data():
     """Cache Candito LP data."""
@@ -828,27 +1481,682 @@ def load_candito_data():
     return workouts_to_dataframe_candito(workouts)
 
 
+# ── Derived analytics cache ──────────────────────────────────────────
+def _df_fingerprint(d: pd.DataFrame) -> tuple:
+    """Cheap cache key for a program DataFrame (Streamlit would hash every cell)."""
+    if d.empty:
+        return (d.shape, tuple(d.columns))
+    return (
+        d.shape,
+        tuple(d.columns),
+        d["date"].min() if "date" in d else None,
+        d["date"].max() if "date" in d else None,
+        d["hevy_id"].nunique() if "hevy_id" in d else None,
+        float(d["volume_kg"].sum()) if "volume_kg" in d else None,
+    )
+
+
+_DF_HASH = {pd.DataFrame: _df_fingerprint}
+
+
+def _cached(fn):
+    """Memoize a pure analytics function across reruns, keyed by df fingerprint."""
+    return st.cache_data(ttl=3600, max_entries=32, show_spinner=False, hash_funcs=_DF_HASH)(fn)
+
+
+# BBD — week/muscle-group columns for every page
+_add_derived_columns = _cached(add_derived_columns)
+# 531 — Hoy te toca
+_next_session_plan = _cached(next_session_plan)
+_full_week_plan = _cached(full_week_plan)
+# 531 — AMRAP Tracker / Progresión / Strength Standards / Sesiones / PRs
+_amrap_tracking = _cached(amrap_tracking)
+_lift_progression = _cached(lift_progression)
+_tm_progression = _cached(tm_progression)
+_weekly_volume_531 = _cached(weekly_volume_531)
+_cycle_comparison = _cached(cycle_comparison)
+_muscle_volume_531 = _cached(muscle_volume_531)
+_strength_level_531 = _cached(strength_level_531)
+_session_summary_531 = _cached(session_summary_531)
+_pr_table_531 = _cached(pr_table_531)
+# 531 — Inteligencia / Quality / Card / Sustituciones
+_validate_tm = _cached(validate_tm)
+_tm_sustainability = _cached(tm_sustainability)
+_amrap_performance_index = _cached(amrap_performance_index)
+_joker_analysis = _cached(joker_analysis)
+_bbb_fatigue_trend = _cached(bbb_fatigue_trend)
+_true_1rm_trend = _cached(true_1rm_trend)
+_workout_quality_531 = _cached(workout_quality_531)
+_build_card_data_531 = _cached(build_card_data_531)
+_quality_trend = _cached(quality_trend)
+_detect_unknown_exercises = _cached(detect_unknown_exercises)
+# BBD — Dashboard / Progresión
+_global_summary = _cached(global_summary)
+_estimate_dl_1rm = _cached(estimate_dl_1rm)
+_weekly_breakdown = _cached(weekly_breakdown)
+_muscle_volume = _cached(muscle_volume)
+_session_density = _cached(session_density)
+_vs_targets = _cached(vs_targets)
+_pr_history = _cached(pr_history)
+_weekly_muscle_volume = _cached(weekly_muscle_volume)
+# BBD — Sesiones / PRs / Adherencia
+_session_summary = _cached(session_summary)
+_pr_table = _cached(pr_table)
+_day_adherence = _cached(day_adherence)
+# BBD — Quality Score / Workout Card
+_workout_quality_bbd = _cached(workout_quality_bbd)
+_build_card_data_bbd = _cached(build_card_data_bbd)
+# BBD — widget-dependent (bodyweight input, weeks-ago slider)
+_strength_standards = _cached(strength_standards)
+_historical_comparison = _cached(historical_comparison)
+
+
+@st.cache_resource(ttl=3600, max_entries=4, show_spinner=False, hash_funcs=_DF_HASH)
+def _bbd_bundle(df: pd.DataFrame) -> SimpleNamespace:
+    """Every df-only BBD page analytic, computed once per dataset.
+
+    cache_resource hands back the same object on each rerun (no unpickling
+    copy), so page switches only pay for rendering. Pages must treat the
+    frames as read-only.
+    """
+    # Weekly breakdown + fatigue scan shared by recovery, ACWR and mesocycles
+    roll = weekly_rollups(df)
+    ri = relative_intensity(df)
+    ft = roll["trend"]
+    dens = session_density(df)
+    acwr_df = acwr(df, weekly=roll["weekly"])
+    # Display strings are formatted here once per dataset, not on every render
+    if not ri.empty:
+        ri = ri.assign(fecha_str=ri["date"].dt.strftime("%d %b"))
+    if not ft.empty:
+        ft = ft.assign(week_str="Sem " + ft["week"].astype(str))
+    if not dens.empty:
+        dens = dens.assign(fecha_str=dens["date"].dt.strftime("%d %b %Y"))
+    if not acwr_df.empty:
+        acwr_df = acwr_df.assign(week_str="Sem " + acwr_df["week"].astype(int).astype(str))
+    return SimpleNamespace(
+        rec=recovery_indicators(df, weekly=roll["weekly"], trend=roll["trend"]),
+        ratios=bbd_ratios(df),
+        dom=dominadas_progress(df),
+        ri=ri,
+        fatigue=roll["fatigue"],
+        ft=ft,
+        dens=dens,
+        plateaus=plateau_detection(df),
+        acwr=acwr_df,
+        meso=mesocycle_summary(df, weekly=roll["weekly"], trend=roll["trend"]),
+        gam=gamification_status(df, BODYWEIGHT),
+    )
+
+
+@st.cache_data(ttl=3600, max_entries=64, show_spinner=False)
+def _fmt_dates(ts: pd.Series, fmt: str) -> pd.Series:
+    """``ts.dt.strftime(fmt)`` memoized — strftime is a per-element Python loop."""
+    return ts.dt.strftime(fmt)
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False, hash_funcs=_DF_HASH)
+def _annual_calendar_531(df_531: pd.DataFrame, year: int, today: date) -> dict:
+    """Enriched 531 calendar; ``today`` is only part of the key so week status rolls over daily.
+
+    Adds ``active_idx``: index into ``weeks`` of the week in progress (None if none),
+    and a ``tm_str`` caption per week ("OHP 58 · Deadlift 140 · ...").
+    """
+    cal = build_enriched_annual_calendar(df_531, year=year)
+    for w in cal["weeks"]:
+        w["tm_str"] = " · ".join(f"{label} {w['tms'][lift]:.0f}" for lift, label in _LIFT_LABELS_531.items())
+    cal["active_idx"] = next(
+        (i for i, w in enumerate(cal["weeks"]) if w["status"] in ("partial", "current")),
+        None,
+    )
+    return cal
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False, hash_funcs=_DF_HASH)
+def _recent_sessions(df: pd.DataFrame, label_col: str, n: int = 20) -> pd.DataFrame:
+    """Latest ``n`` sessions (date, hevy_id, label) for the Workout Card selector."""
+    return (
+        df.drop_duplicates("hevy_id")
+        .sort_values("date", ascending=False)[["date", "hevy_id", label_col]]
+        .head(n)
+        .reset_index(drop=True)
+    )
+
+
+_SESSION_DETAIL_COLS = {
+    "exercise": "Ejercicio", "n_sets": "Series", "reps_str": "Reps", "max_weight": "Peso",
+    "volume_kg": "Volumen", "top_set": "Top Set", "e1rm": "e1RM",
+}
+
+
+@st.cache_data(ttl=3600, max_entries=4, show_spinner=False, hash_funcs=_DF_HASH)
+def _session_details(df: pd.DataFrame) -> dict:
+    """Per-session display table and fatigue captions for 💪 Sesiones, by hevy_id.
+
+    Every expander body runs on each rerun whether it is open or not, so the
+    per-session formatting and fatigue scan happen once per dataset here and
+    the page only looks results up.
+    """
+    fatigue = intra_session_fatigue(df)
+    fatigue_by_id = dict(tuple(fatigue.groupby("hevy_id", sort=False))) if not fatigue.empty else {}
+    # Format the whole frame once, then split it per session
+    disp_all = df[list(_SESSION_DETAIL_COLS)].rename(columns=_SESSION_DETAIL_COLS)
+    for col, fmt, fallback in (("Volumen", "{:,.0f}", "—"), ("e1RM", "{:.1f}", "—"), ("Peso", "{:.0f}", "BW")):
+        v = disp_all[col]
+        disp_all[col] = np.where(v > 0, v.map(fmt.format), fallback)
+    out = {}
+    for hid, disp in disp_all.groupby(df["hevy_id"], sort=False):
+        fr = fatigue_by_id.get(hid)
+        lines = [] if fr is None else [
+            f"{ex}: {pat} (dropoff {pct}%, CV {cv}%)"
+            for ex, pat, pct, cv in zip(fr["exercise"], fr["pattern"], fr["fatigue_pct"], fr["cv_reps"])
+        ]
+        out[hid] = (disp, lines)
+    return out
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False, hash_funcs=_DF_HASH)
+def _weekly_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-week sessions, volume, sets and mean duration for the BBD Dashboard."""
+    by_week = df.groupby("week")
+    return pd.DataFrame({
+        "n_sess": by_week["hevy_id"].nunique(),
+        "vol": by_week["volume_kg"].sum().astype(int),
+        "sets": by_week["n_sets"].sum().astype(int),
+        "dur_mean": df.groupby(["week", "hevy_id"])["duration_min"].first().groupby("week").mean().astype(int),
+    })
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False, hash_funcs=_DF_HASH)
+def _progression_options(df: pd.DataFrame, key_ids: tuple) -> list[str]:
+    """Exercises offered on 📈 Progresión: key lifts, else anything with an e1RM."""
+    key_df = df[df["exercise_template_id"].isin(key_ids)]
+    available = sorted(key_df["exercise"].unique().tolist()) if not key_df.empty else []
+    if not available:
+        available = sorted(df[df["e1rm"] > 0]["exercise"].unique())
+    return available
+
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def _card_png(hid: str, program: str, card_data: dict) -> bytes:
+    """Rendered workout card PNG — Pillow rasterization dominates the 📸 page."""
+    return generate_workout_card(card_data, program=program)
+
+
+@st.cache_data(ttl=120, show_spinner=False, hash_funcs=_DF_HASH)
+def _dashboard_bundle_531(df_531: pd.DataFrame) -> dict:
+    """All 531 Dashboard sections from a single split of df_531 by set_type.
+
+    Missing sections come back as empty DataFrames, so the page only has to
+    check ``.empty`` on ready-made results.
+    """
+    by_type = dict(tuple(df_531.groupby("set_type", sort=False, observed=True)))
+    empty = df_531.iloc[0:0]
+
+    def _latest(frame: pd.DataFrame) -> pd.DataFrame:
+        if frame.empty:
+            return frame
+        return frame.sort_values("date").drop_duplicates("lift", keep="last")
+
+    bbb_types = [k for k in by_type if str(k).startswith("bbb")]
+    bbb_rows = pd.concat([by_type[k] for k in bbb_types]) if bbb_types else empty
+    return {
+        "summary": global_summary_531(df_531),
+        "amraps": _latest(amrap_tracking(by_type.get("amrap", empty))),
+        "bbb": _latest(bbb_compliance(bbb_rows)),
+        "fsl": _latest(fsl_compliance(by_type.get("fsl", empty))),
+        "jokers": _latest(joker_sets_summary(by_type.get("joker", empty))),
+        "acc": accessory_summary(by_type.get("accessory", empty)),
+    }
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False, hash_funcs=_DF_HASH)
+def _supplemental_tables_531(df_531: pd.DataFrame) -> dict:
+    """BBB and FSL compliance tables (AMRAP Tracker), labelled and ready to show.
+
+    Returned as Arrow tables so st.dataframe skips its own pandas conversion;
+    a section with no sets comes back as None.
+    """
+    tables = {}
+    for kind, frame in (("bbb", bbb_compliance(df_531)), ("fsl", fsl_compliance(df_531))):
+        if frame.empty:
+            tables[kind] = None
+            continue
+        display = (
+            frame[list(_SUPPLEMENTAL_COLS_531)]
+            .assign(lift=_label_lifts(frame["lift"]))
+            .rename(columns=_SUPPLEMENTAL_COLS_531)
+        )
+        tables[kind] = pa.Table.from_pandas(display, preserve_index=False)
+    return tables
+
+
+@st.cache_data(ttl=3600, max_entries=4, show_spinner=False, hash_funcs=_DF_HASH)
+def _session_accessories_531(df_531: pd.DataFrame) -> dict:
+    """Accessory table per session for 💪 Sesiones, by hevy_id.
+
+    One groupby over every accessory set instead of a mask and groupby per
+    expander; sessions without accessories are simply absent.
+    """
+    acc = df_531[~df_531["is_main_lift"]]
+    if acc.empty:
+        return {}
+    by_ex = acc.groupby(["hevy_id", "exercise"], sort=False, observed=True)
+    table = by_ex.agg(
+        Grupo=("muscle_group", "first"),
+        Sets=("reps", "size"),
+        Reps=("reps", "sum"),
+        best_w=("weight_kg", "max"),
+        vol=("volume_kg", "sum"),
+    ).reset_index()
+    table["Reps"] = table["Reps"].astype(int)
+    table["Peso"] = np.where(table["best_w"] > 0, table["best_w"].map("{:.0f}kg".format), "BW")
+    table["Vol (kg)"] = table["vol"].astype(int)
+    table = table.rename(columns={"exercise": "Ejercicio"})
+    cols = ["Ejercicio", "Grupo", "Sets", "Reps", "Peso", "Vol (kg)"]
+    return {hid: grp[cols].reset_index(drop=True) for hid, grp in table.groupby("hevy_id", sort=False)}
+
+
+# ── Cached Plotly figures ────────────────────────────────────────────
+# Builders return fig.to_dict(); st.plotly_chart accepts the dict as-is.
+_SET_TYPE_COLORS_531 = {
+    "warmup": "#64748b", "working_531": "#dc2626",
+    "amrap": "#fbbf24", "bbb": "#3b82f6", "fsl": "#8b5cf6",
+    "joker": "#f59e0b", "accessory": "#22c55e",
+}
+_GRADE_COLORS = {"S": "#fbbf24", "A": "#22c55e", "B": "#3b82f6",
+                 "C": "#8b5cf6", "D": "#f97316", "F": "#dc2626"}
+
+
+# Per-trace point budget for long per-lift histories; beyond it the series is
+# downsampled with LTTB (largest-triangle-three-buckets) before it is shipped.
+_MAX_TRACE_POINTS = 1000
+
+
+def _lttb_index(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Row positions LTTB keeps when reducing (x, y) to ``n_out`` points.
+
+    First and last points always survive; every bucket in between keeps the
+    point forming the largest triangle with the previous pick and the mean of
+    the next bucket, which preserves peaks and troughs of the line.
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nx, ny = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            nx, ny = x[-1], y[-1]
+        area = np.abs((x[a] - nx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (ny - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+@st.cache_data(ttl=3600, max_entries=64, show_spinner=False)
+def _amrap_perf_fig(lift_api: pd.DataFrame) -> dict:
+    """e1RM scatter per week type for one lift (Inteligencia → AMRAP Performance)."""
+    fig = px.scatter(
+        lift_api, x="date", y="e1rm",
+        color="week_label", size="reps",
+        hover_data=["weight_kg", "reps", "reps_delta", "e1rm_delta"],
+        labels={"e1rm": "e1RM (kg)", "date": "", "week_label": "Semana"},
+    )
+    fig.update_layout(**PL_531, height=320)
+    fig.update_traces(marker=dict(line=dict(width=1, color="white")))
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=64, show_spinner=False)
+def _true_1rm_fig(lt: pd.DataFrame) -> dict:
+    """Estimated 1RM vs running max and TM for one lift (Inteligencia → 1RM)."""
+    if len(lt) > _MAX_TRACE_POINTS:
+        # Downsample on the e1RM line, but keep every new running max so the
+        # step trace still lands on each PR
+        keep = _lttb_index(lt["date"].astype("int64").to_numpy(dtype=float),
+                           lt["estimated_1rm"].to_numpy(dtype=float), _MAX_TRACE_POINTS)
+        new_max = np.flatnonzero(lt["running_max"].diff().fillna(1).to_numpy() != 0)
+        lt = lt.iloc[np.union1d(keep, new_max)]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=lt["date"], y=lt["estimated_1rm"],
+        mode="lines+markers", name="e1RM estimado",
+        line=dict(color="#dc2626", width=2.5),
+        marker=dict(size=8),
+    ))
+    fig.add_trace(go.Scatter(
+        x=lt["date"], y=lt["running_max"],
+        mode="lines", name="Máximo histórico",
+        line=dict(color="#fbbf24", dash="dot", width=1.5),
+    ))
+    if lt["effective_tm"].notna().any():
+        fig.add_trace(go.Scatter(
+            x=lt["date"], y=lt["effective_tm"],
+            mode="lines", name="Training Max",
+            line=dict(color="#64748b", dash="dash", width=1.5),
+        ))
+    fig.update_layout(**PL_531, height=320, showlegend=True)
+    fig.update_layout(legend=dict(orientation="h", y=-0.15))
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _quality_fig_531(qdf: pd.DataFrame, avg: float) -> dict:
+    """Quality score per session, coloured by grade, with the mean as a guide line."""
+    fig = px.bar(
+        qdf, x="date", y="quality_score", color="grade",
+        color_discrete_map=_GRADE_COLORS,
+        hover_data=["lift", "amrap_score", "bbb_score", "acc_score", "vol_score"],
+        labels={"quality_score": "Score", "date": "", "grade": "Nota"},
+    )
+    fig.update_layout(**PL_531, height=380, showlegend=True)
+    fig.add_hline(y=avg, line_dash="dot", line_color="#78716c",
+                  annotation_text=f"Media: {avg:.0f}",
+                  annotation_font=dict(family="IBM Plex Mono", size=11, color="#a8a29e"))
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _e1rm_fig_531(prog: pd.DataFrame) -> dict:
+    """e1RM per AMRAP, one line per lift (531 AMRAP Tracker)."""
+    fig = px.line(
+        prog, x="date", y="e1rm", color="lift",
+        markers=True,
+        labels={"date": "", "e1rm": "e1RM (kg)", "lift": ""},
+    )
+    fig.update_layout(**PL_531, height=380)
+    fig.update_traces(line=dict(width=2.5), marker=dict(size=8))
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _weekly_volume_fig_531(wv: pd.DataFrame) -> dict:
+    """Stacked weekly volume by set type (531 Progresión)."""
+    fig = px.bar(
+        wv, x="week_start", y="total_volume", color="set_type",
+        labels={"week_start": "", "total_volume": "Volumen (kg)", "set_type": "Tipo"},
+        color_discrete_map=_SET_TYPE_COLORS_531,
+    )
+    fig.update_layout(**PL_531, height=380)
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _cycle_fig_531(cyc_chart: pd.DataFrame) -> dict:
+    """Best AMRAP e1RM per lift, grouped by cycle (531 Progresión)."""
+    fig = px.bar(
+        cyc_chart, x="lift", y="amrap_best_e1rm", color="cycle_label",
+        barmode="group",
+        labels={"lift": "", "amrap_best_e1rm": "e1RM (kg)", "cycle_label": ""},
+    )
+    fig.update_layout(**PL_531, height=380)
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _muscle_pie_fig_531(mv: pd.DataFrame) -> dict:
+    """Volume share per muscle group (531 Progresión)."""
+    fig = px.pie(mv, values="total_volume", names="muscle_group")
+    fig.update_layout(**PL_531, height=380)
+    return fig.to_dict()
+
+
+# BBD — keyed by the exact inputs each chart draws
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _ratio_gauges_fig(ratios: pd.DataFrame) -> dict:
+    """All BBD ratios as % of DL 1RM gauges in one row of subplots (Ratios BBD).
+
+    Ratios without a logged weight keep their titled slot but get no gauge.
+    """
+    n = len(ratios)
+    fig = make_subplots(rows=1, cols=n, specs=[[{"type": "indicator"}] * n],
+                        subplot_titles=[f"<b>{label}</b>" for label in ratios["label"]])
+    for i, row in enumerate(ratios.itertuples(index=False), start=1):
+        if row.current_weight <= 0:
+            continue
+        fig.add_trace(go.Indicator(
+            mode="gauge+number",
+            value=row.pct_of_dl,
+            number={"suffix": "%", "font": {"size": 32, "color": "#f1f5f9"}},
+            gauge={
+                "axis": {"range": [0, 120], "tickcolor": "#4a5568"},
+                "bar": {"color": "#ef4444"},
+                "bgcolor": "#1a1a2e",
+                "steps": [
+                    {"range": [row.target_low, row.target_high], "color": "rgba(34, 197, 94, 0.19)"},
+                ],
+                "threshold": {
+                    "line": {"color": "#22c55e", "width": 3},
+                    "value": (row.target_low + row.target_high) / 2,
+                },
+            },
+        ), row=1, col=i)
+    fig.update_layout(**PL_GAUGE, height=240, margin=dict(l=20, r=20, t=50, b=20))
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _fatigue_bar_fig(fat: pd.DataFrame) -> dict:
+    """Rep dropoff per exercise with the stable/high thresholds (Fatiga Intra-sesión)."""
+    fig = go.Figure()
+    colors = FATIGUE_COLORS[fat["pattern_code"].to_numpy()]
+    fig.add_trace(go.Bar(
+        x=fat["exercise"], y=fat["fatigue_pct"],
+        marker_color=colors, text=fat["pattern"],
+        hovertemplate="%{x}<br>Fatiga: %{y:.1f}%<br>%{text}<extra></extra>",
+    ))
+    fig.add_hline(y=10, line_dash="dot", line_color="#22c55e", annotation_text="Umbral estable (10%)")
+    fig.add_hline(y=25, line_dash="dot", line_color="#ef4444", annotation_text="Umbral alto (25%)")
+    fig.update_layout(**PL, height=350, showlegend=False, yaxis_title="Fatiga (%)")
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)
+def _rep_curve_fig(reps: tuple, fatigue_pct: float) -> dict:
+    """Reps per set for one exercise, line coloured by fatigue band (Fatiga Intra-sesión)."""
+    reps = list(reps)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=list(range(1, len(reps) + 1)), y=reps,
+        mode="lines+markers+text", text=reps, textposition="top center",
+        line=dict(color="#ef4444" if fatigue_pct > 25 else "#fbbf24" if fatigue_pct > 10 else "#22c55e", width=3),
+        marker=dict(size=12),
+    ))
+    fig.add_hline(y=reps[0], line_dash="dot", line_color="#4a5568",
+                  annotation_text=f"Serie 1: {reps[0]} reps")
+    fig.update_layout(**PL, height=200, xaxis_title="Serie #", yaxis_title="Reps", showlegend=False)
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _fatigue_trend_fig(ft: pd.DataFrame) -> dict:
+    """Weekly mean and max fatigue (Fatiga Intra-sesión)."""
+    ft_x = ft["week_str"]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=ft_x, y=ft["avg_fatigue"],
+                              mode="lines+markers", name="Media", line=dict(color="#f59e0b", width=3)))
+    fig.add_trace(go.Scatter(x=ft_x, y=ft["max_fatigue"],
+                              mode="lines+markers", name="Máxima", line=dict(color="#ef4444", width=2, dash="dot")))
+    fig.update_layout(**PL, height=300, yaxis_title="Fatiga (%)")
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _density_fig(dens: pd.DataFrame) -> dict:
+    """kg/min per session coloured by program day (Densidad)."""
+    x_vals = (_fmt_dates(dens["date"], "%d %b") + " — " + dens["day_name"]).to_numpy()
+    colors = dens["day_num"].map(DAY_COLORS).fillna("#666")
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=x_vals,
+        y=dens["density_kg_min"],
+        marker_color=colors,
+        text=dens["density_kg_min"].map("{:.0f}".format),
+        textposition="outside",
+    ))
+    fig.update_layout(**PL, height=350, yaxis_title="kg/min", showlegend=False)
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _standards_bar_fig(standards: pd.DataFrame) -> dict:
+    """Bodyweight ratio per exercise coloured by level (Strength Standards)."""
+    fig = go.Figure()
+    lvl = standards["level"]
+    colors = np.select([lvl.str.contains("Avanzado|Elite"), lvl.str.contains("Intermedio")],
+                       ["#22c55e", "#f59e0b"], default="#94a3b8")
+    fig.add_trace(go.Bar(
+        x=standards["exercise"].str[:20],
+        y=standards["bw_ratio"],
+        marker_color=colors,
+        text=standards["bw_ratio"].map("{:.2f}×".format),
+        textposition="outside",
+    ))
+    fig.add_hline(y=1.0, line_dash="dot", line_color="#4a5568", annotation_text="1×BW")
+    fig.add_hline(y=2.0, line_dash="dot", line_color="#f59e0b", annotation_text="2×BW")
+    fig.update_layout(**PL, height=350, yaxis_title="×BW", showlegend=False)
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _acwr_gauge_fig(value: float) -> dict:
+    """Latest ACWR against the under/safe/caution/danger bands (Inteligencia)."""
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=value,
+        number={"font": {"size": 48, "color": "#f1f5f9"}},
+        delta={"reference": 1.0, "position": "bottom"},
+        gauge={
+            "axis": {"range": [0.4, 2.0], "tickcolor": "#4a5568"},
+            "bar": {"color": "#ef4444"},
+            "bgcolor": "#1a1a2e",
+            "steps": [
+                {"range": [0.4, 0.8], "color": "rgba(59, 130, 246, 0.2)"},
+                {"range": [0.8, 1.3], "color": "rgba(34, 197, 94, 0.2)"},
+                {"range": [1.3, 1.5], "color": "rgba(234, 179, 8, 0.2)"},
+                {"range": [1.5, 2.0], "color": "rgba(239, 68, 68, 0.2)"},
+            ],
+        },
+    ))
+    fig.update_layout(**PL_GAUGE, height=250, margin=dict(l=30, r=30, t=30, b=10))
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _acwr_trend_fig(valid: pd.DataFrame) -> dict:
+    """Weekly ACWR line over the zone bands (Inteligencia)."""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=valid["week_str"], y=valid["acwr"],
+        mode="lines+markers+text", text=valid["acwr"].map("{:.2f}".format),
+        textposition="top center", line=dict(color="#ef4444", width=3),
+        marker=dict(size=10),
+    ))
+    # Zone bands
+    fig.add_hrect(y0=0.8, y1=1.3, fillcolor="rgba(34,197,94,0.08)", line_width=0,
+                  annotation_text="Zona segura", annotation_position="top left")
+    fig.add_hrect(y0=1.3, y1=1.5, fillcolor="rgba(234,179,8,0.08)", line_width=0)
+    fig.add_hrect(y0=1.5, y1=2.0, fillcolor="rgba(239,68,68,0.08)", line_width=0)
+    fig.add_hline(y=1.0, line_dash="dot", line_color="#4a5568")
+    fig.update_layout(**PL, height=300, yaxis_title="ACWR", showlegend=False)
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _meso_volume_fig(meso: pd.DataFrame) -> dict:
+    """Average weekly volume per mesocycle (Inteligencia)."""
+    fig = go.Figure()
+    x_labels = [f"Meso {int(m)}" for m in meso["mesocycle"]]
+    fig.add_trace(go.Bar(
+        x=x_labels, y=meso["avg_weekly_volume"],
+        name="Vol. medio/sem", marker_color="#ef4444",
+        text=meso["avg_weekly_volume"].map("{:,.0f}".format),
+        textposition="outside",
+    ))
+    fig.update_layout(**PL, height=300, yaxis_title="Volumen (kg/sem)", showlegend=False)
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=16, show_spinner=False)
+def _profile_radar_fig(axes: tuple, now_vals: tuple, then_vals: tuple, weeks_ago: int) -> dict:
+    """Strength profile now vs N weeks ago (Inteligencia → Yo vs Yo)."""
+    axes, now_vals, then_vals = list(axes), list(now_vals), list(then_vals)
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=now_vals + [now_vals[0]], theta=axes + [axes[0]],
+        fill="toself", name="Ahora",
+        fillcolor="rgba(239, 68, 68, 0.2)", line_color="#ef4444",
+    ))
+    fig.add_trace(go.Scatterpolar(
+        r=then_vals + [then_vals[0]], theta=axes + [axes[0]],
+        fill="toself", name=f"Hace {weeks_ago} sem",
+        fillcolor="rgba(59, 130, 246, 0.2)", line_color="#3b82f6",
+    ))
+    fig.update_layout(
+        polar=dict(
+            bgcolor="rgba(0,0,0,0)",
+            radialaxis=dict(range=[0, 100], showticklabels=True,
+                            gridcolor="#2d3748", tickfont=dict(color="#94a3b8")),
+            angularaxis=dict(gridcolor="#2d3748",
+                             tickfont=dict(color="#e2e8f0", size=12)),
+        ),
+        **PL, height=450, showlegend=True,
+        legend=dict(x=0.85, y=1.1),
+    )
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _sessions_per_week_fig(wk: pd.DataFrame) -> dict:
+    """Sessions per week against the 5-6 target (Adherencia)."""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=("Sem " + wk["week"].astype(str)).to_numpy(), y=wk["sessions"],
+                          marker_color="#22c55e", text=wk["sessions"], textposition="outside"))
+    fig.add_hline(y=5, line_dash="dot", line_color="#ef4444", annotation_text="Objetivo: 5-6")
+    fig.update_layout(**PL, height=300, yaxis_title="Sesiones", showlegend=False)
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _quality_fig_bbd(qdf: pd.DataFrame, avg: float) -> dict:
+    """BBD quality score per session, coloured by grade, with the mean as a guide line."""
+    fig = px.bar(
+        qdf, x="date", y="quality_score", color="grade",
+        color_discrete_map={"S": "#f59e0b", "A": "#10b981", "B": "#3b82f6",
+                            "C": "#8b5cf6", "D": "#f97316", "F": "#ef4444"},
+        hover_data=["day_name", "lift_score", "vol_score", "cov_score", "dur_score"],
+        labels={"quality_score": "Score", "date": "", "grade": "Nota"},
+    )
+    fig.update_layout(**PL, height=350, showlegend=True)
+    fig.add_hline(y=avg, line_dash="dot", line_color="#94a3b8",
+                  annotation_text=f"Media: {avg:.0f}")
+    return fig.to_dict()
+
+
 _bbd_error = None
 _531_error = None
 _candito_error = None
 
 try:
     raw_df = load_raw_data()
-    df = add_derived_columns(raw_df)  # includes cycle-aware week assignment
+    df = _add_derived_columns(raw_df)  # includes cycle-aware week assignment
 except Exception as e:
     _bbd_error = str(e)
     df = pd.DataFrame()
 
-last_sync = pd.Timestamp.now(tz="Europe/Madrid")
-
 # ── Sidebar ──────────────────────────────────────────────────────────
 # Detect which program has the most recent session
 _last_bbd = df["date"].max() if not df.empty else pd.Timestamp.min
 try:
-    _df_531_check = load_531_data()
-    _last_531 = _df_531_check["date"].max() if not _df_531_check.empty else pd.Timestamp.min
-except Exception as e:
-    _531_error = str(e)
+    # Only the default-program heuristic needs this; the 531 pages load the full data
+    _last_531 = _last_531_date()
+except Exception:
     _last_531 = pd.Timestamp.min
 try:
     _df_candito_check = load_candito_data()
@@ -889,12 +2197,7 @@ with st.sidebar:
     if st.button("🔄 Actualizar datos", use_container_width=True):
         st.cache_data.clear()
         st.rerun()
-    now = pd.Timestamp.now(tz="Europe/Madrid")
-    mins_ago = int((now - last_sync).total_seconds() // 60)
-    if mins_ago < 1:
-        st.caption("📡 Datos actualizados ahora")
-    else:
-        st.caption(f"📡 Última carga: hace {mins_ago} min")
+    st.caption("📡 Datos actualizados ahora")
 
     # Session count indicator
     if is_531:
@@ -905,14 +2208,7 @@ with st.sidebar:
         except Exception:
             pass
 
-    # Cron health: check Notion analytics page last edit
-    notion_edit = _notion_last_edit()
-    if notion_edit is not None:
-        hours_since = (now - notion_edit.tz_convert("Europe/Madrid")).total_seconds() / 3600
-        if hours_since > 24:
-            st.error(f"⚠️ Notion sync hace {int(hours_since)}h — revisa GitHub Actions")
-        else:
-            st.caption(f"✅ Notion sync: hace {int(hours_since)}h")
+    _sidebar_cron_health()
 
     st.divider()
     if is_531:
@@ -964,15 +2260,18 @@ with st.sidebar:
 # ══════════════════════════════════════════════════════════════════════
 if is_531:
     _inject_531_css()
+    try:
+        df_531 = load_531_data()
+    except Exception as e:
+        _531_error = str(e)
     if _531_error:
         st.error(f"❌ Error cargando datos 531: {_531_error}")
         st.info("Puedes cambiar a BBD en el sidebar mientras se resuelve.")
         st.stop()
-    df_531 = load_531_data()
 
     # Planner works even with no data
     if page == "📋 Hoy te toca":
-        plan = next_session_plan(df_531)
+        plan = _next_session_plan(df_531)
 
         # ── Header ──
         _sf_header(f"Hoy te toca — {plan['lift_label']}", "📋")
@@ -991,47 +2290,48 @@ if is_531:
         if plan["tm"] is None:
             st.warning(f"⚠️ Training Max de {plan['lift_label']} no configurado. Dime tu TM y lo actualizo.")
         else:
-            st.markdown(
+            # The whole planner goes out as one markdown element
+            html = [
                 f'<div class="sf-caption">Training Max: <b style="color:#fafaf9">{plan["tm"]} kg</b></div>',
-                unsafe_allow_html=True,
-            )
+            ]
 
             # ── Warmup ──
-            _sf_sub("Calentamiento", "🔥")
-            warmup_html = ""
-            for s in plan["warmup"]:
-                warmup_html += _sf_set_html(s["weight"], s["reps"], s["pct"], s["plates_str"], css_class="warmup")
-            st.markdown(warmup_html, unsafe_allow_html=True)
+            html.append(_sf_sub_html("Calentamiento", "🔥"))
+            html.extend(
+                _sf_set_html(s["weight"], s["reps"], s["pct"], s["plates_str"], css_class="warmup")
+                for s in plan["warmup"]
+            )
 
             # ── Working sets ──
-            _sf_sub("Series de trabajo", "💀")
-            working_html = ""
-            for s in plan["working_sets"]:
-                tag = "AMRAP" if s["is_amrap"] else ""
-                cls = "amrap" if s["is_amrap"] else ""
-                working_html += _sf_set_html(s["weight"], s["reps"], s["pct"], s["plates_str"], css_class=cls, tag=tag)
-            st.markdown(working_html, unsafe_allow_html=True)
+            html.append(_sf_sub_html("Series de trabajo", "💀"))
+            html.extend(
+                _sf_set_html(
+                    s["weight"], s["reps"], s["pct"], s["plates_str"],
+                    css_class="amrap" if s["is_amrap"] else "",
+                    tag="AMRAP" if s["is_amrap"] else "",
+                )
+                for s in plan["working_sets"]
+            )
 
             # ── BBB Supplemental ──
             bbb = plan["bbb"]
             if bbb:
-                _sf_sub("BBB Supplemental", "📦")
+                html.append(_sf_sub_html("BBB Supplemental", "📦"))
                 pct_display = int(bbb["pct_tm"] * 100)
-                bbb_html = _sf_set_html(
+                html.append(_sf_set_html(
                     bbb["weight"], f'{bbb["reps"]} × {bbb["sets"]} sets',
                     pct_display, bbb["plates_str"], css_class="bbb", tag="BBB"
-                )
-                st.markdown(bbb_html, unsafe_allow_html=True)
+                ))
 
             # ── Full week overview (HTML grid) ──
-            _sf_sub("Esta semana completa", "📅")
-            week_plans = full_week_plan(df_531)
-            grid_html = '<div class="sf-week-grid">'
-            for dp in week_plans:
-                is_next = (dp["day_num"] == plan["day_num"])
-                grid_html += _sf_week_card_html(dp, is_next=is_next)
-            grid_html += '</div>'
-            st.markdown(grid_html, unsafe_allow_html=True)
+            html.append(_sf_sub_html("Esta semana completa", "📅"))
+            html.append('<div class="sf-week-grid">')
+            html.extend(
+                _sf_week_card_html(dp, is_next=(dp["day_num"] == plan["day_num"]))
+                for dp in _full_week_plan(df_531)
+            )
+            html.append('</div>')
+            st.markdown("".join(html), unsafe_allow_html=True)
 
         st.stop()
 
@@ -1040,10 +2340,10 @@ if is_531:
         st.info("Asegúrate de iniciar el workout desde la rutina BBB en Hevy para que se detecte automáticamente.")
         st.stop()
 
-    summary_531 = global_summary_531(df_531)
-
     if page == "📊 Dashboard":
         _sf_header("531 BBB — Dashboard", "💀")
+        dash = _dashboard_bundle_531(df_531)
+        summary_531 = dash["summary"]
 
         c1, c2, c3, c4 = st.columns(4)
         c1.metric("💀 Sesiones", summary_531.get("total_sessions", 0))
@@ -1053,7 +2353,7 @@ if is_531:
 
         # ── Training Maxes as styled cards ──
         _sf_sub("Training Maxes", "🎯")
-        lift_labels = {"ohp": "OHP", "deadlift": "Deadlift", "bench": "Bench", "squat": "Zercher"}
+        lift_labels = _LIFT_LABELS_531
         lift_emojis = {"ohp": "🏋️", "deadlift": "💀", "bench": "🪑", "squat": "🦵"}
         lift_colors = {"ohp": "#f59e0b", "deadlift": "#dc2626", "bench": "#3b82f6", "squat": "#22c55e"}
 
@@ -1067,32 +2367,30 @@ if is_531:
                     st.metric(f"{lift_emojis[lift]} {label}", "TBD")
 
         # ── AMRAP summary — styled cards ──
-        amraps = amrap_tracking(df_531)
+        amraps = dash["amraps"]
         if not amraps.empty:
-            amraps = amraps.sort_values("date").groupby("lift").tail(1)
             _sf_sub("Últimos AMRAPs", "🎯")
             amrap_html = ""
-            for _, row in amraps.iterrows():
-                lift_label = lift_labels.get(row["lift"], row["lift"])
-                over = row["reps_over_min"]
+            for row in amraps.itertuples(index=False):
+                lift_label = lift_labels.get(row.lift, row.lift)
+                over = row.reps_over_min
                 amrap_html += _sf_amrap_status_html(
-                    lift_label, row["weight_kg"], row["reps"],
-                    row["min_reps"], over, row["e1rm"]
+                    lift_label, row.weight_kg, row.reps,
+                    row.min_reps, over, row.e1rm
                 )
             st.markdown(amrap_html, unsafe_allow_html=True)
 
         # ── BBB compliance — styled cards ──
-        bbb = bbb_compliance(df_531)
+        bbb = dash["bbb"]
         if not bbb.empty:
-            bbb = bbb.sort_values("date").groupby("lift").tail(1)
             _sf_sub("BBB Supplemental", "📦")
             bbb_html = ""
-            for _, row in bbb.iterrows():
-                lift_label = lift_labels.get(row["lift"], str(row["lift"]))
-                ok = row["sets_ok"] and row["reps_ok"]
+            for row in bbb.itertuples(index=False):
+                lift_label = lift_labels.get(row.lift, str(row.lift))
+                ok = row.sets_ok and row.reps_ok
                 tag_cls = "ok" if ok else "warn"
                 tag_text = "OK" if ok else "⚠️"
-                pct = f" ({row['pct_of_tm']}% TM)" if row["pct_of_tm"] else ""
+                pct = f" ({row.pct_of_tm}% TM)" if row.pct_of_tm else ""
                 bbb_html += (
                     f'<div class="sf-card{"" if ok else "-muted"}">'
                     f'  <span style="font-family:Oswald,sans-serif;text-transform:uppercase;'
@@ -1100,25 +2398,24 @@ if is_531:
                     f'  <span class="sf-tag {tag_cls}">{tag_text}</span>'
                     f'  <div style="font-family:IBM Plex Mono,monospace;font-size:0.85rem;'
                     f'color:#a8a29e;margin-top:6px;">'
-                    f'    {row["weight_kg"]}kg{pct} · {row["n_sets"]} sets × {row["avg_reps"]} reps avg '
-                    f'    (total: {row["total_reps"]})'
+                    f'    {row.weight_kg}kg{pct} · {row.n_sets} sets × {row.avg_reps} reps avg '
+                    f'    (total: {row.total_reps})'
                     f'  </div>'
                     f'</div>'
                 )
             st.markdown(bbb_html, unsafe_allow_html=True)
 
         # ── FSL compliance ──
-        fsl = fsl_compliance(df_531)
+        fsl = dash["fsl"]
         if not fsl.empty:
-            fsl = fsl.sort_values("date").groupby("lift").tail(1)
             _sf_sub("FSL (First Set Last)", "🔁")
             fsl_html = ""
-            for _, row in fsl.iterrows():
-                lift_label = lift_labels.get(row["lift"], str(row["lift"]))
-                ok = row["sets_ok"] and row["reps_ok"]
+            for row in fsl.itertuples(index=False):
+                lift_label = lift_labels.get(row.lift, str(row.lift))
+                ok = row.sets_ok and row.reps_ok
                 tag_cls = "ok" if ok else "warn"
                 tag_text = "OK" if ok else "⚠️"
-                pct = f" ({row['pct_of_tm']}% TM)" if row["pct_of_tm"] else ""
+                pct = f" ({row.pct_of_tm}% TM)" if row.pct_of_tm else ""
                 fsl_html += (
                     f'<div class="sf-card-muted">'
                     f'  <span style="font-family:Oswald,sans-serif;text-transform:uppercase;'
@@ -1126,23 +2423,22 @@ if is_531:
                     f'  <span class="sf-tag {tag_cls}">{tag_text}</span>'
                     f'  <div style="font-family:IBM Plex Mono,monospace;font-size:0.85rem;'
                     f'color:#a8a29e;margin-top:6px;">'
-                    f'    {row["weight_kg"]}kg{pct} · {row["n_sets"]} sets × {row["avg_reps"]} reps avg'
+                    f'    {row.weight_kg}kg{pct} · {row.n_sets} sets × {row.avg_reps} reps avg'
                     f'  </div>'
                     f'</div>'
                 )
             st.markdown(fsl_html, unsafe_allow_html=True)
 
         # ── Joker sets ──
-        jokers = joker_sets_summary(df_531)
+        jokers = dash["jokers"]
         if not jokers.empty:
-            jokers = jokers.sort_values("date").groupby("lift").tail(1)
             _sf_sub("Joker Sets", "🃏")
             jk_cols = st.columns(2)
             jk_cols[0].metric("Total Joker Sets", int(jokers["total_sets"].sum()))
             jk_cols[1].metric("Mejor e1RM (Joker)", f"{jokers['best_e1rm'].max():.1f} kg")
             joker_html = ""
-            for _, jrow in jokers.iterrows():
-                lift_label = lift_labels.get(jrow["lift"], str(jrow["lift"]))
+            for jrow in jokers.itertuples(index=False):
+                lift_label = lift_labels.get(jrow.lift, str(jrow.lift))
                 joker_html += (
                     f'<div class="sf-card-muted" style="border-left-color:#f59e0b;">'
                     f'  <span style="font-family:Oswald,sans-serif;text-transform:uppercase;'
@@ -1150,27 +2446,27 @@ if is_531:
                     f'  <span class="sf-tag joker">JOKER</span>'
                     f'  <div style="font-family:IBM Plex Mono,monospace;font-size:0.85rem;'
                     f'color:#a8a29e;margin-top:6px;">'
-                    f'    {jrow["date"].strftime("%d %b")} · '
-                    f'    {jrow["weight_kg"]}kg × {jrow["best_reps"]} ({jrow["total_sets"]} sets) → '
-                    f'    e1RM: <b style="color:#fafaf9">{jrow["best_e1rm"]:.1f}kg</b>'
+                    f'    {jrow.date.strftime("%d %b")} · '
+                    f'    {jrow.weight_kg}kg × {jrow.best_reps} ({jrow.total_sets} sets) → '
+                    f'    e1RM: <b style="color:#fafaf9">{jrow.best_e1rm:.1f}kg</b>'
                     f'  </div>'
                     f'</div>'
                 )
             st.markdown(joker_html, unsafe_allow_html=True)
 
         # ── Accessory summary ──
-        acc = accessory_summary(df_531)
+        acc = dash["acc"]
         if not acc.empty:
             _sf_sub("Accesorios", "🔧")
             acc_html = ""
-            for _, row in acc.iterrows():
+            for row in acc.itertuples(index=False):
                 acc_html += (
                     f'<div class="sf-card-muted" style="border-left-color:#22c55e;">'
                     f'  <span style="font-family:Oswald,sans-serif;text-transform:uppercase;'
-                    f'letter-spacing:1px;color:#fafaf9;font-weight:600;">{row["muscle_group"]}</span>'
+                    f'letter-spacing:1px;color:#fafaf9;font-weight:600;">{row.muscle_group}</span>'
                     f'  <div style="font-family:IBM Plex Mono,monospace;font-size:0.85rem;'
                     f'color:#a8a29e;margin-top:4px;">'
-                    f'    {row["total_sets"]} sets · {row["total_reps"]} reps · {row["total_volume"]:,.0f} kg'
+                    f'    {row.total_sets} sets · {row.total_reps} reps · {row.total_volume:,.0f} kg'
                     f'  </div>'
                     f'</div>'
                 )
@@ -1184,11 +2480,11 @@ if is_531:
         )
 
         # TM Validation alerts — styled cards
-        tm_val = validate_tm(df_531)
+        tm_val = _validate_tm(df_531)
         if tm_val:
             _sf_sub("Estado del Training Max", "⚙️")
             for lift, info in tm_val.items():
-                lift_label = {"ohp": "OHP", "deadlift": "Deadlift", "bench": "Bench", "squat": "Zercher"}.get(lift, lift)
+                lift_label = _LIFT_LABELS_531.get(lift, lift)
                 if info["status"] == "too_light":
                     tag_cls, tag_text = "warn", "⬆️ SUBIR"
                     detail = (
@@ -1221,57 +2517,37 @@ if is_531:
                     unsafe_allow_html=True,
                 )
 
-        amraps = amrap_tracking(df_531)
+        amraps = _amrap_tracking(df_531)
         if amraps.empty:
             st.info("Sin datos de AMRAP aún.")
         else:
             # AMRAP history as styled rows
             _sf_sub("Historial AMRAP", "📋")
-            lift_labels_map = {"ohp": "OHP", "deadlift": "Deadlift", "bench": "Bench", "squat": "Zercher"}
-            for _, row in amraps.sort_values("date", ascending=False).iterrows():
-                ll = lift_labels_map.get(row["lift"], row["lift"])
-                amrap_row = _sf_amrap_status_html(
-                    f'{row["date"].strftime("%d/%m")} · {ll}',
-                    row["weight_kg"], row["reps"], row["min_reps"],
-                    row["reps_over_min"], row["e1rm"]
+            st.markdown("".join(
+                _sf_amrap_status_html(
+                    f'{row.date.strftime("%d/%m")} · {_LIFT_LABELS_531.get(row.lift, row.lift)}',
+                    row.weight_kg, row.reps, row.min_reps,
+                    row.reps_over_min, row.e1rm
                 )
-                st.markdown(amrap_row, unsafe_allow_html=True)
+                for row in amraps.sort_values("date", ascending=False).itertuples(index=False)
+            ), unsafe_allow_html=True)
 
             # AMRAP e1RM chart with 531 plotly theme
             _sf_sub("e1RM desde AMRAPs", "📈")
-            prog = lift_progression(df_531)
+            prog = _lift_progression(df_531)
             if not prog.empty:
-                prog_display = prog.copy()
-                prog_display["lift"] = prog_display["lift"].map(lift_labels_map)
-                fig = px.line(
-                    prog_display, x="date", y="e1rm", color="lift",
-                    markers=True,
-                    labels={"date": "", "e1rm": "e1RM (kg)", "lift": ""},
-                )
-                fig.update_layout(**PL_531, height=380)
-                fig.update_traces(line=dict(width=2.5), marker=dict(size=8))
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(_e1rm_fig_531(prog.assign(lift=_label_lifts(prog["lift"]))),
+                                use_container_width=True, key="e1rm_531")
 
         # Supplemental compliance section
-        bbb = bbb_compliance(df_531)
-        fsl = fsl_compliance(df_531)
-        if not bbb.empty:
+        supp = _supplemental_tables_531(df_531)
+        if supp["bbb"] is not None:
             _sf_sub("BBB Supplemental Compliance", "📦")
-            bbb_display = bbb[["date", "lift", "weight_kg", "n_sets", "total_reps", "avg_reps", "pct_of_tm"]].copy()
-            bbb_display["lift"] = bbb_display["lift"].map(
-                {"ohp": "OHP", "deadlift": "Deadlift", "bench": "Bench", "squat": "Zercher"}
-            )
-            bbb_display.columns = ["Fecha", "Lift", "Peso (kg)", "Sets", "Total Reps", "Avg Reps", "% TM"]
-            st.dataframe(bbb_display, use_container_width=True, hide_index=True)
-        if not fsl.empty:
+            st.dataframe(supp["bbb"], use_container_width=True, hide_index=True)
+        if supp["fsl"] is not None:
             _sf_sub("FSL Compliance", "🔁")
-            fsl_display = fsl[["date", "lift", "weight_kg", "n_sets", "total_reps", "avg_reps", "pct_of_tm"]].copy()
-            fsl_display["lift"] = fsl_display["lift"].map(
-                {"ohp": "OHP", "deadlift": "Deadlift", "bench": "Bench", "squat": "Zercher"}
-            )
-            fsl_display.columns = ["Fecha", "Lift", "Peso (kg)", "Sets", "Total Reps", "Avg Reps", "% TM"]
-            st.dataframe(fsl_display, use_container_width=True, hide_index=True)
-        if bbb.empty and fsl.empty:
+            st.dataframe(supp["fsl"], use_container_width=True, hide_index=True)
+        if supp["bbb"] is None and supp["fsl"] is None:
             st.info("Sin datos de suplementario aún.")
 
     elif page == "📈 Progresión":
@@ -1279,85 +2555,57 @@ if is_531:
 
         # TM progression
         _sf_sub("Training Max vs Estimated", "🎯")
-        tm_prog = tm_progression(df_531)
+        tm_prog = _tm_progression(df_531)
         if not tm_prog.empty:
-            tm_display = tm_prog.copy()
-            tm_display["lift"] = tm_display["lift"].map(
-                {"ohp": "OHP", "deadlift": "Deadlift", "bench": "Bench", "squat": "Zercher"}
+            tm_display = (
+                tm_prog[list(_TM_PROGRESSION_COLS_531)]
+                .assign(lift=_label_lifts(tm_prog["lift"]))
+                .rename(columns=_TM_PROGRESSION_COLS_531)
             )
-            tm_display = tm_display[["lift", "date", "amrap_weight", "amrap_reps", "e1rm", "estimated_tm", "current_tm"]]
-            tm_display.columns = ["Lift", "Fecha", "AMRAP Peso", "AMRAP Reps", "e1RM", "TM Estimado", "TM Actual"]
             st.dataframe(tm_display, use_container_width=True, hide_index=True)
         else:
             st.info("Se necesitan más datos para mostrar progresión de TM.")
 
         # Volume by week
         _sf_sub("Volumen Semanal", "📊")
-        wv = weekly_volume_531(df_531)
+        wv = _weekly_volume_531(df_531)
         if not wv.empty:
-            fig = px.bar(
-                wv, x="week_start", y="total_volume", color="set_type",
-                labels={"week_start": "", "total_volume": "Volumen (kg)", "set_type": "Tipo"},
-                color_discrete_map={
-                    "warmup": "#64748b", "working_531": "#dc2626",
-                    "amrap": "#fbbf24", "bbb": "#3b82f6", "fsl": "#8b5cf6",
-                    "joker": "#f59e0b", "accessory": "#22c55e",
-                },
-            )
-            fig.update_layout(**PL_531, height=380)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(_weekly_volume_fig_531(wv), use_container_width=True, key="volume_531")
 
         # Cycle comparison
         _sf_sub("Ciclo vs Ciclo", "🔄")
-        cyc = cycle_comparison(df_531)
+        cyc = _cycle_comparison(df_531)
         if not cyc.empty and cyc["cycle_num"].nunique() >= 1:
-            cyc_display = cyc.copy()
-            cyc_display["lift"] = cyc_display["lift"].map(
-                {"ohp": "OHP", "deadlift": "Deadlift", "bench": "Bench", "squat": "Zercher"}
-            )
-            cols_show = ["cycle_num", "lift", "amrap_avg_reps", "amrap_best_e1rm", "bbb_total_volume"]
-            col_names = ["Ciclo", "Lift", "AMRAP Reps (avg)", "Mejor e1RM", "BBB Volumen"]
-            if "e1rm_delta" in cyc_display.columns:
-                cols_show.append("e1rm_delta")
-                col_names.append("Δ e1RM (kg)")
-            display_df = cyc_display[cols_show].copy()
-            display_df.columns = col_names
+            cyc_labelled = cyc.assign(lift=_label_lifts(cyc["lift"]))
+            cols_show = [c for c in _CYCLE_COLS_531 if c in cyc.columns]
+            display_df = cyc_labelled[cols_show].rename(columns=_CYCLE_COLS_531)
             st.dataframe(display_df, use_container_width=True, hide_index=True)
 
             if cyc["cycle_num"].nunique() >= 2:
-                cyc_chart = cyc.copy()
-                cyc_chart["lift"] = cyc_chart["lift"].map(
-                    {"ohp": "OHP", "deadlift": "Deadlift", "bench": "Bench", "squat": "Zercher"}
-                )
-                cyc_chart["cycle_label"] = "Ciclo " + cyc_chart["cycle_num"].astype(str)
-                fig = px.bar(
-                    cyc_chart, x="lift", y="amrap_best_e1rm", color="cycle_label",
-                    barmode="group",
-                    labels={"lift": "", "amrap_best_e1rm": "e1RM (kg)", "cycle_label": ""},
-                )
-                fig.update_layout(**PL_531, height=380)
-                st.plotly_chart(fig, use_container_width=True)
+                cyc_chart = cyc_labelled.assign(cycle_label="Ciclo " + cyc["cycle_num"].astype(str))
+                st.plotly_chart(_cycle_fig_531(cyc_chart), use_container_width=True, key="cycles_531")
         else:
             st.info("Se necesita al menos 1 ciclo completo para comparar.")
 
         # Muscle volume
         _sf_sub("Distribución Muscular", "💪")
-        mv = muscle_volume_531(df_531)
+        mv = _muscle_volume_531(df_531)
         if not mv.empty:
-            fig = px.pie(mv, values="total_volume", names="muscle_group")
-            fig.update_layout(**PL_531, height=380)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(_muscle_pie_fig_531(mv), use_container_width=True, key="muscle_pie_531")
 
     elif page == "🏋️ Strength Standards":
         _sf_header("Strength Standards", "🏋️")
 
-        levels = strength_level_531(df_531)
-        lift_labels = {"ohp": "OHP", "deadlift": "Deadlift", "bench": "Bench", "squat": "Zercher"}
+        levels = _strength_level_531(df_531)
+        lift_labels = _LIFT_LABELS_531
         level_colors_map = {
             "Elite": "#a855f7", "Avanzado": "#3b82f6", "Intermedio": "#22c55e",
             "Principiante": "#fbbf24", "Novato": "#78716c", "Sin datos": "#44403c",
         }
+        levels_order = ["beginner", "intermediate", "advanced", "elite"]
 
+        # All lift cards go out in a single markdown element
+        cards = []
         for lift, label in lift_labels.items():
             info = levels.get(lift, {})
             e1rm = info.get("e1rm")
@@ -1368,7 +2616,6 @@ if is_531:
             if e1rm:
                 # Card with progress bar
                 stds = STRENGTH_STANDARDS_531[lift]
-                levels_order = ["beginner", "intermediate", "advanced", "elite"]
                 target_label, target_kg, prev_kg = "", 0, 0
                 reached_max = True
                 for j, lvl in enumerate(levels_order):
@@ -1391,7 +2638,7 @@ if is_531:
                         label_left=f"{e1rm}kg", label_right="🏆 Elite alcanzado",
                     )
 
-                st.markdown(
+                cards.append(
                     f'<div class="sf-card" style="border-left-color:{color};">'
                     f'  <div style="display:flex;align-items:center;justify-content:space-between;">'
                     f'    <span style="font-family:Oswald,sans-serif;text-transform:uppercase;'
@@ -1401,63 +2648,52 @@ if is_531:
                     f'  <div style="font-family:IBM Plex Mono,monospace;font-size:0.85rem;'
                     f'color:#a8a29e;margin-top:6px;">e1RM: {e1rm}kg · {ratio}×BW</div>'
                     f'  {progress_html}'
-                    f'</div>',
-                    unsafe_allow_html=True,
+                    f'</div>'
                 )
             else:
-                st.markdown(
+                cards.append(
                     f'<div class="sf-card-muted">'
                     f'  <span style="font-family:Oswald,sans-serif;text-transform:uppercase;'
                     f'letter-spacing:1px;color:#78716c;font-weight:600;">{label}</span>'
                     f'  <span style="font-family:IBM Plex Mono,monospace;font-size:0.85rem;'
                     f'color:#44403c;margin-left:12px;">Sin datos</span>'
-                    f'</div>',
-                    unsafe_allow_html=True,
+                    f'</div>'
                 )
+        st.markdown("".join(cards), unsafe_allow_html=True)
 
     elif page == "💪 Sesiones":
         _sf_header("Sesiones", "💪")
 
-        sessions = session_summary_531(df_531)
+        sessions = _session_summary_531(df_531)
         if sessions.empty:
             st.info("Sin sesiones registradas.")
         else:
-            for _, s in sessions.iterrows():
-                lift_label = {"ohp": "OHP", "deadlift": "Deadlift", "bench": "Bench", "squat": "Zercher"}.get(s["main_lift"], s["main_lift"])
-                with st.expander(f"📅 {s['date'].strftime('%d %b')} — {lift_label} | {s['total_volume']:,}kg"):
+            accessories = _session_accessories_531(df_531)
+            # Expander headers built column-wise rather than per row
+            headers = (
+                "📅 " + sessions["date"].dt.strftime("%d %b")
+                + " — " + sessions["main_lift"].map(_LIFT_LABELS_531).fillna(sessions["main_lift"])
+                + " | " + sessions["total_volume"].map("{:,}kg".format)
+            )
+            for header, s in zip(headers, sessions.itertuples(index=False)):
+                with st.expander(header):
                     c1, c2, c3 = st.columns(3)
-                    c1.metric("AMRAP", f"{s['amrap_weight']}kg × {s['amrap_reps']}")
-                    c2.metric("BBB", f"{s['bbb_sets']} sets × {s['bbb_avg_reps']} reps")
-                    c3.metric("Accesorios", f"{s['accessory_sets']} sets | {s['accessory_volume']:,}kg")
+                    c1.metric("AMRAP", f"{s.amrap_weight}kg × {s.amrap_reps}")
+                    c2.metric("BBB", f"{s.bbb_sets} sets × {s.bbb_avg_reps} reps")
+                    c3.metric("Accesorios", f"{s.accessory_sets} sets | {s.accessory_volume:,}kg")
 
                     # Show individual accessory exercises
-                    sess_acc = df_531[(df_531["hevy_id"] == s["hevy_id"]) & (~df_531["is_main_lift"])]
-                    if not sess_acc.empty:
-                        acc_rows = []
-                        for ex_name, ex_grp in sess_acc.groupby("exercise", sort=False):
-                            mg = ex_grp["muscle_group"].iloc[0]
-                            n = len(ex_grp)
-                            best_w = ex_grp["weight_kg"].max()
-                            total_r = int(ex_grp["reps"].sum())
-                            vol = int(ex_grp["volume_kg"].sum())
-                            w_str = f"{best_w:.0f}kg" if best_w > 0 else "BW"
-                            acc_rows.append({
-                                "Ejercicio": ex_name,
-                                "Grupo": mg,
-                                "Sets": n,
-                                "Reps": total_r,
-                                "Peso": w_str,
-                                "Vol (kg)": vol,
-                            })
+                    acc_table = accessories.get(s.hevy_id)
+                    if acc_table is not None:
                         st.dataframe(
-                            pd.DataFrame(acc_rows),
-                            use_container_width=True, hide_index=True, height=min(35 + 35 * len(acc_rows), 250),
+                            acc_table,
+                            use_container_width=True, hide_index=True, height=min(35 + 35 * len(acc_table), 250),
                         )
 
     elif page == "🏆 PRs":
         _sf_header("PRs", "🏆")
 
-        prs = pr_table_531(df_531)
+        prs = _pr_table_531(df_531)
         if prs.empty:
             st.info("Sin PRs registrados aún.")
         else:
@@ -1470,23 +2706,16 @@ if is_531:
             )
 
     elif page == "📅 Calendario":
-        from src.config_531 import (
-            get_plan_position, SUPPLEMENTAL_TEMPLATES, MAIN_WORK_MODES,
-            SESSIONS_PER_WEEK,
-        )
-
         _sf_header("Calendario 5/3/1", "📅")
 
-        cal_data = build_enriched_annual_calendar(df_531, year=2026)
+        cal_data = _annual_calendar_531(df_531, 2026, date.today())
 
         if not cal_data["weeks"]:
             st.info("Sin datos para generar calendario.")
         else:
             # ── A) Current Position Card ──
-            active = next(
-                (w for w in cal_data["weeks"] if w["status"] in ("partial", "current")),
-                None,
-            )
+            active_idx = cal_data["active_idx"]
+            active = cal_data["weeks"][active_idx] if active_idx is not None else None
             if active:
                 tms = active["tms"]
                 phase_colors = {
@@ -1546,8 +2775,7 @@ if is_531:
                 "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre",
             ]
             # Default to current month
-            from datetime import date as _date
-            default_month = _date.today().month - 1
+            default_month = date.today().month - 1
 
             selected_month = st.selectbox(
                 "Ir al mes",
@@ -1569,7 +2797,9 @@ if is_531:
             if month_weeks:
                 st.markdown(f"### Detalle: {month_names_list[selected_month]}")
 
-                lift_labels = {"ohp": "OHP", "deadlift": "Deadlift", "bench": "Bench", "squat": "Zercher"}
+                lift_labels = _LIFT_LABELS_531
+
+                upcoming_html = []  # future weeks, flushed as one markdown block
 
                 for w in month_weeks:
                     status = w["status"]
@@ -1591,6 +2821,21 @@ if is_531:
                     else:
                         block_tag = " · Pre-Plan"
 
+                    tm_str = w["tm_str"]
+
+                    # Upcoming weeks have nothing interactive — plain <details> HTML
+                    if status == "upcoming" and not w.get("sessions"):
+                        header = (
+                            f"{icon} <b>W{w['abs_week']}</b> {w['week_name']} "
+                            f"({w['sessions_done']}/4){block_tag}{deload_tag}{bump_tag}"
+                        )
+                        upcoming_html.append(_upcoming_week_html(w, header, tm_str, lift_labels))
+                        continue
+
+                    if upcoming_html:
+                        st.markdown("".join(upcoming_html), unsafe_allow_html=True)
+                        upcoming_html = []
+
                     header = (
                         f"{icon} **W{w['abs_week']}** {w['week_name']} "
                         f"({w['sessions_done']}/4){block_tag}{deload_tag}{bump_tag}"
@@ -1598,8 +2843,6 @@ if is_531:
 
                     with st.expander(header, expanded=(status in ("partial", "current"))):
                         # TMs + template info
-                        tms = w["tms"]
-                        tm_str = " · ".join(f"{lift_labels[l]} {tms[l]:.0f}" for l in lift_labels)
                         st.caption(f"TMs: {tm_str}")
                         if w.get("supplemental_name"):
                             st.caption(
@@ -1608,62 +2851,30 @@ if is_531:
                                 f"TM {w.get('tm_pct', 85)}%"
                             )
 
-                        # Past sessions
-                        if w.get("sessions"):
-                            for s in w["sessions"]:
-                                d = s["date"]
-                                ds = d.strftime("%d/%m/%Y") if hasattr(d, "strftime") else str(d)[:10]
-                                lift = lift_labels.get(s["lift"], s["lift"])
-                                amrap = f" — AMRAP: **{s['amrap']}**" if s["amrap"] else ""
-                                st.markdown(f"&nbsp;&nbsp;&nbsp;&nbsp;📌 {ds} **{lift}**{amrap}")
-
-                        # Upcoming: show expected weights
-                        elif status == "upcoming":
-                            if w["is_deload"]:
-                                st.caption("Semana ligera: 40/50/60% × 5 reps")
-                            else:
-                                ww = w.get("week_weights", {})
-                                if ww:
-                                    for lift_key, lbl in lift_labels.items():
-                                        sets = ww.get(lift_key, [])
-                                        if sets:
-                                            parts = [f"{s['weight']:.0f}kg ×{s['reps']}" for s in sets]
-                                            st.markdown(f"&nbsp;&nbsp;&nbsp;&nbsp;**{lbl}:** {' → '.join(parts)}")
-                                else:
-                                    week_type = w["week_type"]
-                                    scheme = {1: "65/75/85% × 5", 2: "70/80/90% × 3", 3: "75/85/95% × 5/3/1+"}.get(week_type, "?")
-                                    st.caption(f"Esquema: {scheme}")
+                        # Past sessions, one paragraph each in a single markdown element
+                        session_lines = []
+                        for s in w.get("sessions", []):
+                            d = s["date"]
+                            ds = d.strftime("%d/%m/%Y") if hasattr(d, "strftime") else str(d)[:10]
+                            lift = lift_labels.get(s["lift"], s["lift"])
+                            amrap = f" — AMRAP: **{s['amrap']}**" if s["amrap"] else ""
+                            session_lines.append(f"&nbsp;&nbsp;&nbsp;&nbsp;📌 {ds} **{lift}**{amrap}")
+                        if session_lines:
+                            st.markdown("\n\n".join(session_lines))
+
+                if upcoming_html:
+                    st.markdown("".join(upcoming_html), unsafe_allow_html=True)
 
             # ── D) TM Progression (collapsible) ──
             with st.expander("📈 Progresión de TMs"):
-                bump_points = []
-                seen_bumps = set()
-                for w in cal_data["weeks"]:
-                    b = w["tm_bumps"]
-                    if b not in seen_bumps:
-                        seen_bumps.add(b)
-                        tms = w["tms"]
-                        bump_points.append({
-                            "Bumps": b,
-                            "Desde": f"W{w['abs_week']}",
-                            "OHP": f"{tms['ohp']:.0f}",
-                            "DL": f"{tms['deadlift']:.0f}",
-                            "Bench": f"{tms['bench']:.0f}",
-                            "Squat": f"{tms['squat']:.0f}",
-                        })
-                if bump_points:
-                    st.dataframe(pd.DataFrame(bump_points), use_container_width=True, hide_index=True)
+                bump_points = _tm_bump_table(cal_data["weeks"])
+                if not bump_points.empty:
+                    st.dataframe(bump_points, use_container_width=True, hide_index=True)
 
     # ══════════════════════════════════════════════════════════════════════
     # 🗺️ PLAN FOREVER
     # ══════════════════════════════════════════════════════════════════════
     elif page == "🗺️ Plan Forever":
-        from src.config_531 import (
-            get_plan_position, YEARLY_PLAN, get_block_weeks,
-            SUPPLEMENTAL_TEMPLATES, MAIN_WORK_MODES,
-            PLAN_START_SESSION, SESSIONS_PER_WEEK,
-        )
-
         _sf_header("Plan Anual — Forever 5/3/1", "🗺️")
 
         total_sessions = df_531["hevy_id"].nunique() if not df_531.empty else 0
@@ -1814,7 +3025,6 @@ if is_531:
 
         # ── TM Projection Table ──
         st.markdown("### 📈 Proyección de TMs")
-        from src.config_531 import get_effective_tm
         rows = []
         cumul_bumps = 0
         # Pre-plan bumps
@@ -1854,7 +3064,7 @@ if is_531:
         if df_531.empty or df_531[df_531["set_type"] == "amrap"].empty:
             st.info("Necesitas al menos 1 AMRAP registrado para ver métricas de inteligencia.")
         else:
-            lift_names = {"ohp": "OHP", "deadlift": "Peso Muerto", "bench": "Banca", "squat": "Sentadilla"}
+            lift_names = _LIFT_NAMES_531
 
             tab_tm, tab_perf, tab_joker, tab_bbb, tab_1rm = st.tabs([
                 "🎯 Sostenibilidad TM",
@@ -1866,221 +3076,23 @@ if is_531:
 
             # ── Tab 1: TM Sustainability ──
             with tab_tm:
-                _sf_sub("¿Tu Training Max es sostenible?", "🎯")
-                st.markdown(
-                    '<div class="sf-caption">Basado en reps AMRAP vs mínimos de Wendler. '
-                    'Si no llegas al mínimo, el TM es demasiado alto.</div>',
-                    unsafe_allow_html=True,
-                )
-
-                sus = tm_sustainability(df_531)
-
-                if sus["system_health"] is not None:
-                    health = sus["system_health"]
-                    if health >= 0.8:
-                        cls = "good"
-                    elif health >= 0.4:
-                        cls = "mid"
-                    else:
-                        cls = "bad"
-                    st.markdown(
-                        f'<div class="sf-gauge">'
-                        f'  <div class="pct {cls}">{health:.0%}</div>'
-                        f'  <div class="label">Salud del sistema</div>'
-                        f'</div>',
-                        unsafe_allow_html=True,
-                    )
-
-                cols = st.columns(len(sus["lifts"]) or 1)
-                for i, (lift, data) in enumerate(sus["lifts"].items()):
-                    with cols[i % len(cols)]:
-                        trend_icon = {"declining": "📉", "improving": "📈"}.get(data["trend"], "➡️")
-                        trend_color = {"declining": "#ef4444", "improving": "#22c55e"}.get(data["trend"], "#78716c")
-                        st.markdown(
-                            f'<div class="sf-intel-card">'
-                            f'  <div class="title">{lift_names.get(lift, lift)}</div>'
-                            f'  <div class="verdict">{data["verdict"]}</div>'
-                            f'  <div style="margin-top:8px;font-family:IBM Plex Mono,monospace;'
-                            f'font-size:0.8rem;color:{trend_color};">'
-                            f'    {trend_icon} Reps {"en descenso" if data["trend"] == "declining" else "mejorando" if data["trend"] == "improving" else "estables"}'
-                            f'  </div>'
-                            f'</div>',
-                            unsafe_allow_html=True,
-                        )
-                        if data["alerts"]:
-                            for alert in data["alerts"]:
-                                st.warning(alert)
-
-                # TM recommendations table
-                _sf_sub("Recomendaciones TM", "⚙️")
-                vtm = validate_tm(df_531)
-                if vtm:
-                    vtm_rows = []
-                    for lift, info in vtm.items():
-                        vtm_rows.append({
-                            "Lift": lift_names.get(lift, lift),
-                            "Estado": "✅" if info["status"] == "ok" else ("⬆️ Subir" if info["status"] == "too_light" else "⬇️ Bajar"),
-                            "TM Actual": f"{info['current_tm']:.0f} kg",
-                            "TM Recomendado": f"{info['recommended_tm']:.0f} kg",
-                            "Delta": f"{info['tm_delta']:+.0f} kg",
-                            "Avg Reps +Min": f"{info['avg_reps_over_min']:+.1f}",
-                        })
-                    st.dataframe(pd.DataFrame(vtm_rows), use_container_width=True, hide_index=True)
+                _intel_tab_tm(df_531, lift_names)
 
             # ── Tab 2: AMRAP Performance Index ──
             with tab_perf:
-                _sf_sub("Rendimiento AMRAP — Misma semana, ¿más reps?", "📊")
-                st.markdown(
-                    '<div class="sf-caption">Compara tus AMRAP en el mismo tipo de semana (5s/3s/531) '
-                    'a lo largo de los ciclos. Mantener o subir reps con más peso = progreso real.</div>',
-                    unsafe_allow_html=True,
-                )
-
-                api = amrap_performance_index(df_531)
-                if api.empty:
-                    st.info("Necesitas al menos 2 ciclos para comparar.")
-                else:
-                    for lift in api["lift"].unique():
-                        _sf_sub(lift_names.get(lift, lift), "")
-                        lift_api = api[api["lift"] == lift].copy()
-
-                        import plotly.express as px
-                        fig = px.scatter(
-                            lift_api, x="date", y="e1rm",
-                            color="week_label", size="reps",
-                            hover_data=["weight_kg", "reps", "reps_delta", "e1rm_delta"],
-                            labels={"e1rm": "e1RM (kg)", "date": "", "week_label": "Semana"},
-                        )
-                        fig.update_layout(**PL_531, height=320)
-                        fig.update_traces(marker=dict(line=dict(width=1, color="white")))
-                        st.plotly_chart(fig, use_container_width=True)
-
-                        display = lift_api[["date", "week_label", "weight_kg", "reps",
-                                           "e1rm", "reps_delta", "e1rm_delta"]].copy()
-                        display.columns = ["Fecha", "Semana", "Peso", "Reps", "e1RM",
-                                          "Δ Reps", "Δ e1RM"]
-                        display["Fecha"] = display["Fecha"].dt.strftime("%d/%m")
-                        st.dataframe(display, use_container_width=True, hide_index=True)
+                _intel_tab_perf(df_531, lift_names)
 
             # ── Tab 3: Joker Analysis ──
             with tab_joker:
-                _sf_sub("Joker Sets — Uso y tendencia", "⚡")
-                st.markdown(
-                    '<div class="sf-caption">Singles/doubles pesados después del AMRAP. '
-                    'Bien usados aprovechan días buenos. Abusados acumulan fatiga.</div>',
-                    unsafe_allow_html=True,
-                )
-
-                ja = joker_analysis(df_531)
-                c1, c2, c3 = st.columns(3)
-                c1.metric("Total Joker Sets", ja["total_joker_sets"])
-                c2.metric("Sesiones con Jokers", f"{ja['sessions_with_jokers']}/{ja['total_sessions']}")
-                c3.metric("Frecuencia", f"{ja['frequency_pct']}%")
-
-                # Assessment as styled card
-                st.markdown(
-                    f'<div class="sf-card">'
-                    f'  <div style="font-family:Oswald,sans-serif;text-transform:uppercase;'
-                    f'letter-spacing:1px;color:#a8a29e;font-size:0.75rem;margin-bottom:6px;">Valoración</div>'
-                    f'  <div style="font-family:IBM Plex Mono,monospace;font-size:0.9rem;'
-                    f'color:#fafaf9;">{ja["assessment"]}</div>'
-                    f'</div>',
-                    unsafe_allow_html=True,
-                )
-
-                if ja["per_lift"]:
-                    for lift, data in ja["per_lift"].items():
-                        with st.expander(f"{lift_names.get(lift, lift)} — {data['count']} joker sets"):
-                            jc1, jc2, jc3 = st.columns(3)
-                            jc1.metric("Mejor peso", f"{data['best_weight']:.0f} kg")
-                            jc2.metric("Mejor e1RM", f"{data['best_e1rm']:.0f} kg")
-                            if data['avg_pct_of_tm']:
-                                jc3.metric("Media %TM", f"{data['avg_pct_of_tm']:.0f}%")
+                _intel_tab_joker(df_531, lift_names)
 
             # ── Tab 4: BBB Fatigue ──
             with tab_bbb:
-                _sf_sub("Fatiga en BBB 5×10", "🏋️")
-                st.markdown(
-                    '<div class="sf-caption">¿Pierdes reps en las últimas series del 5×10? '
-                    'Si el dropoff es alto, el % BBB puede ser excesivo.</div>',
-                    unsafe_allow_html=True,
-                )
-
-                bf = bbb_fatigue_trend(df_531)
-                if bf.empty:
-                    st.info("Sin datos BBB registrados.")
-                else:
-                    avg_dropoff = bf["rep_dropoff"].mean()
-                    pct_perfect = (bf["all_tens"].sum() / len(bf) * 100)
-                    bc1, bc2, bc3 = st.columns(3)
-                    bc1.metric("Drop-off medio", f"{avg_dropoff:+.1f} reps")
-                    bc2.metric("5×10 completas", f"{pct_perfect:.0f}%")
-                    bc3.metric("Sesiones BBB", len(bf))
-
-                    for lift in bf["lift"].unique():
-                        lf = bf[bf["lift"] == lift].sort_values("date")
-                        _sf_sub(lift_names.get(lift, lift), "")
-
-                        display = lf[["date", "weight_kg", "reps_list", "avg_reps",
-                                      "rep_dropoff", "pct_of_tm", "fatigue_status"]].copy()
-                        display.columns = ["Fecha", "Peso", "Reps", "Media", "Dropoff",
-                                          "%TM", "Estado"]
-                        display["Fecha"] = display["Fecha"].dt.strftime("%d/%m")
-                        display["Reps"] = display["Reps"].apply(lambda x: ", ".join(str(r) for r in x))
-                        st.dataframe(display, use_container_width=True, hide_index=True)
+                _intel_tab_bbb(df_531, lift_names)
 
             # ── Tab 5: True 1RM Trend ──
             with tab_1rm:
-                _sf_sub("1RM Real Estimado", "📈")
-                st.markdown(
-                    '<div class="sf-caption">Tu 1RM real estimado desde AMRAPs — NO es tu Training Max. '
-                    'El TM debería ser ~85-90% de este valor.</div>',
-                    unsafe_allow_html=True,
-                )
-
-                t1rm = true_1rm_trend(df_531)
-                if t1rm.empty:
-                    st.info("Sin AMRAPs para estimar.")
-                else:
-                    import plotly.graph_objects as go
-
-                    for lift in t1rm["lift"].unique():
-                        lt = t1rm[t1rm["lift"] == lift].sort_values("date")
-                        _sf_sub(lift_names.get(lift, lift), "")
-
-                        fig = go.Figure()
-                        fig.add_trace(go.Scatter(
-                            x=lt["date"], y=lt["estimated_1rm"],
-                            mode="lines+markers", name="e1RM estimado",
-                            line=dict(color="#dc2626", width=2.5),
-                            marker=dict(size=8),
-                        ))
-                        fig.add_trace(go.Scatter(
-                            x=lt["date"], y=lt["running_max"],
-                            mode="lines", name="Máximo histórico",
-                            line=dict(color="#fbbf24", dash="dot", width=1.5),
-                        ))
-                        if lt["effective_tm"].notna().any():
-                            fig.add_trace(go.Scatter(
-                                x=lt["date"], y=lt["effective_tm"],
-                                mode="lines", name="Training Max",
-                                line=dict(color="#64748b", dash="dash", width=1.5),
-                            ))
-                        fig.update_layout(**PL_531, height=320, showlegend=True)
-                        fig.update_layout(legend=dict(orientation="h", y=-0.15))
-                        st.plotly_chart(fig, use_container_width=True)
-
-                        latest = lt.iloc[-1]
-                        rc1, rc2, rc3 = st.columns(3)
-                        rc1.metric("e1RM actual", f"{latest['estimated_1rm']:.0f} kg",
-                                  delta=f"{latest['e1rm_delta']:+.0f} kg" if pd.notna(latest.get("e1rm_delta")) else None)
-                        rc2.metric("Running max", f"{latest['running_max']:.0f} kg")
-                        if pd.notna(latest.get("tm_as_pct_of_1rm")):
-                            pct = latest["tm_as_pct_of_1rm"]
-                            rc3.metric("TM como % de 1RM",
-                                      f"{pct:.0f}%",
-                                      delta="OK" if 82 <= pct <= 92 else ("Alto" if pct > 92 else "Bajo"),
-                                      delta_color="normal" if 82 <= pct <= 92 else "inverse")
+                _intel_tab_1rm(df_531, lift_names)
 
     # ══════════════════════════════════════════════════════════════════════
     # ⭐ QUALITY SCORE — 531
@@ -2092,11 +3104,11 @@ if is_531:
             unsafe_allow_html=True,
         )
 
-        qdf = workout_quality_531(df_531)
+        qdf = _workout_quality_531(df_531)
         if qdf.empty:
             st.info("Sin datos suficientes para calcular quality score.")
         else:
-            qt = quality_trend(qdf)
+            qt = _quality_trend(qdf)
             c1, c2, c3, c4 = st.columns(4)
             c1.metric("💀 Media", f"{qt['avg']:.0f}/100")
             c2.metric("🔥 Mejor", f"{qt['best']}/100")
@@ -2104,26 +3116,14 @@ if is_531:
             trend_emoji = {"improving": "📈", "declining": "📉", "stable": "➡️"}
             c4.metric("📊 Tendencia", trend_emoji.get(qt["trend"], "➡️"))
 
-            fig = px.bar(
-                qdf, x="date", y="quality_score", color="grade",
-                color_discrete_map={"S": "#fbbf24", "A": "#22c55e", "B": "#3b82f6",
-                                    "C": "#8b5cf6", "D": "#f97316", "F": "#dc2626"},
-                hover_data=["lift", "amrap_score", "bbb_score", "acc_score", "vol_score"],
-                labels={"quality_score": "Score", "date": "", "grade": "Nota"},
+            st.plotly_chart(_quality_fig_531(qdf, qt["avg"]), use_container_width=True, key="quality_531")
+
+            display = (
+                qdf[list(_QUALITY_COLS_531)]
+                .assign(date=_fmt_dates(qdf["date"], "%d/%m"),
+                        lift=qdf["lift"].map(_LIFT_NAMES_531).fillna(qdf["lift"]))
+                .rename(columns=_QUALITY_COLS_531)
             )
-            fig.update_layout(**PL_531, height=380, showlegend=True)
-            fig.add_hline(y=qt["avg"], line_dash="dot", line_color="#78716c",
-                         annotation_text=f"Media: {qt['avg']:.0f}",
-                         annotation_font=dict(family="IBM Plex Mono", size=11, color="#a8a29e"))
-            st.plotly_chart(fig, use_container_width=True)
-
-            display = qdf[["date", "lift", "quality_score", "grade",
-                          "amrap_score", "bbb_score", "acc_score", "vol_score"]].copy()
-            display.columns = ["Fecha", "Lift", "Score", "Nota",
-                             "AMRAP /40", "BBB /30", "Acc /15", "Vol /15"]
-            display["Fecha"] = display["Fecha"].dt.strftime("%d/%m")
-            lift_names = {"ohp": "OHP", "deadlift": "Peso Muerto", "bench": "Banca", "squat": "Sentadilla"}
-            display["Lift"] = display["Lift"].map(lift_names).fillna(display["Lift"])
             st.dataframe(display.sort_values("Fecha", ascending=False),
                         use_container_width=True, hide_index=True)
 
@@ -2137,26 +3137,20 @@ if is_531:
             unsafe_allow_html=True,
         )
 
-        sessions = (
-            df_531.drop_duplicates("hevy_id")
-            .sort_values("date", ascending=False)[["date", "hevy_id", "workout_title"]]
-            .head(20)
-        )
+        sessions = _recent_sessions(df_531, "workout_title")
         if sessions.empty:
             st.info("Sin sesiones disponibles.")
         else:
-            options = {
-                f"{row['date'].strftime('%d/%m')} — {row['workout_title']}": row["hevy_id"]
-                for _, row in sessions.iterrows()
-            }
+            labels = _fmt_dates(sessions["date"], "%d/%m") + " — " + sessions["workout_title"].astype(str)
+            options = dict(zip(labels, sessions["hevy_id"]))
             selected = st.selectbox("Selecciona sesión", list(options.keys()))
             hid = options[selected]
 
             # Build card data
-            card_data = build_card_data_531(df_531, hid)
+            card_data = _build_card_data_531(df_531, hid)
             if card_data:
                 # Add quality score if available
-                qdf = workout_quality_531(df_531)
+                qdf = _workout_quality_531(df_531)
                 if not qdf.empty:
                     q_row = qdf[qdf["hevy_id"] == hid]
                     if not q_row.empty:
@@ -2164,7 +3158,7 @@ if is_531:
                         card_data["grade"] = q_row["grade"].iloc[0]
 
                 try:
-                    png_bytes = generate_workout_card(card_data, program="531")
+                    png_bytes = _card_png(hid, "531", card_data)
                     st.image(png_bytes, use_container_width=True)
                     st.download_button(
                         "⬇️ Descargar PNG",
@@ -2186,21 +3180,21 @@ if is_531:
             unsafe_allow_html=True,
         )
 
-        unknowns = detect_unknown_exercises(df_531, EXERCISE_DB_531, program_name="531")
+        unknowns = _detect_unknown_exercises(df_531, EXERCISE_DB_531, program_name="531")
         if unknowns.empty:
             st.success("✅ Todos los ejercicios están mapeados en la config.")
         else:
             st.warning(f"⚠️ {len(unknowns)} ejercicio(s) desconocido(s) detectados")
-            for _, row in unknowns.iterrows():
-                with st.expander(f"**{row['hevy_name']}** — {row['session_count']} sesiones"):
+            for row in unknowns.itertuples(index=False):
+                with st.expander(f"**{row.hevy_name}** — {row.session_count} sesiones"):
                     c1, c2, c3 = st.columns(3)
-                    c1.metric("Sesiones", row["session_count"])
-                    c2.metric("Total sets", row["total_sets"])
-                    c3.metric("Grupo muscular", row["suggested_muscle_group"])
-                    st.code(f"Template ID: {row['template_id']}", language=None)
-                    st.caption(f"Visto: {row['first_seen'].strftime('%d/%m')} → {row['last_seen'].strftime('%d/%m')}")
-                    if row["appears_on"]:
-                        st.caption(f"Aparece en: {row['appears_on']}")
+                    c1.metric("Sesiones", row.session_count)
+                    c2.metric("Total sets", row.total_sets)
+                    c3.metric("Grupo muscular", row.suggested_muscle_group)
+                    st.code(f"Template ID: {row.template_id}", language=None)
+                    st.caption(f"Visto: {row.first_seen.strftime('%d/%m')} → {row.last_seen.strftime('%d/%m')}")
+                    if row.appears_on:
+                        st.caption(f"Aparece en: {row.appears_on}")
 
     st.stop()  # Don't fall through to BBD sections
 
@@ -2270,7 +3264,7 @@ if is_candito:
             fig = px.bar(mv, x="muscle_group", y="volume_kg",
                          color="muscle_group", text="volume_kg")
             fig.update_layout(**PL_531, showlegend=False, title="Volumen por grupo muscular")
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, use_container_width=True, key="muscle_volume_candito")
 
         # Weekly volume
         st.markdown("### 📊 Volumen Semanal")
@@ -2279,7 +3273,7 @@ if is_candito:
             fig = px.bar(wv, x="week", y="volume_kg", text="sessions",
                          color_discrete_sequence=["#22c55e"])
             fig.update_layout(**PL_531, title="Volumen semanal (kg)")
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, use_container_width=True, key="volume_candito")
 
     elif page == "📈 Progresión":
         st.markdown("## 📈 Progresión de Levantamientos")
@@ -2302,13 +3296,13 @@ if is_candito:
             fig = px.line(filtered, x="date", y="weight", color="lift_key",
                           markers=True, title="Peso usado por sesión")
             fig.update_layout(**PL_531)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, use_container_width=True, key="weight_candito")
 
             # e1RM progression
             fig2 = px.line(filtered, x="date", y="e1rm", color="lift_key",
                            markers=True, title="e1RM por sesión")
             fig2.update_layout(**PL_531)
-            st.plotly_chart(fig2, use_container_width=True)
+            st.plotly_chart(fig2, use_container_width=True, key="e1rm_candito")
 
     elif page == "🏋️ Strength Standards":
         st.markdown("## 🏋️ Strength Standards")
@@ -2383,7 +3377,67 @@ if df.empty:
     st.warning("No hay entrenamientos BBD registrados.")
     st.stop()
 
-summary = global_summary(df)
+summary = _global_summary(df)
+# Only the pages below read the bundle; the rest (Sesiones, PRs, Titans, …)
+# never pay for building it on a cold cache.
+_BUNDLE_PAGES = {
+    "📈 Progresión", "🎯 Ratios BBD", "🔬 Fatiga Intra-sesión",
+    "⚡ Densidad", "🧠 Inteligencia", "🎮 Niveles",
+}
+bbd = _bbd_bundle(df) if page in _BUNDLE_PAGES else None
+
+# Display tables: source column → header. rename() already returns a new
+# frame, so the formatting below never needs an extra .copy().
+_RECOVERY_COLS = {
+    "week": "Semana", "sessions": "Sesiones", "total_volume": "Volumen", "vol_delta_pct": "Δ Vol %",
+    "avg_fatigue": "Fatiga Media %", "adherence_pct": "Adherencia %", "alert": "Estado",
+}
+_RI_COLS = {
+    "fecha_str": "Fecha", "exercise": "Ejercicio", "max_weight": "Peso (kg)", "e1rm": "e1RM",
+    "pct_of_pr": "% de PR", "pct_of_dl": "% de DL 1RM",
+}
+_DENSITY_COLS = {
+    "fecha_str": "Fecha", "day_name": "Día", "duration_min": "Duración (min)", "total_volume": "Volumen",
+    "total_sets": "Series", "density_kg_min": "kg/min", "sets_per_min": "Sets/min", "reps_per_min": "Reps/min",
+}
+_PLATEAU_COLS = {
+    "exercise": "Ejercicio", "pr_e1rm": "PR (e1RM)", "last_e1rm": "Último e1RM", "pct_of_pr": "% del PR",
+    "weeks_since_pr": "Sem. sin PR", "trend_slope": "Tendencia", "status": "Estado",
+}
+_ACWR_COLS = {
+    "week": "Semana", "acute_volume": "Vol. Agudo", "chronic_volume": "Vol. Crónico",
+    "acwr": "ACWR", "acwr_zone": "Zona", "sessions": "Sesiones",
+}
+_E1RM_HISTORY_COLS = {"date": "Fecha", "max_weight": "Peso", "max_reps_at_max": "Reps", "e1rm": "e1RM", "is_pr": "PR"}
+_PR_COLS = {
+    "exercise": "Ejercicio", "max_weight": "Peso", "max_reps_at_max": "Reps", "e1rm": "e1RM",
+    "date": "Fecha", "day_name": "Día", "bw_ratio": "×BW",
+}
+_QUALITY_COLS_BBD = {
+    "date": "Fecha", "day_name": "Día", "quality_score": "Score", "grade": "Nota",
+    "lift_score": "Lift /35", "vol_score": "Vol /25", "cov_score": "Cov /25", "dur_score": "Dur /15",
+}
+
+
+def _float_styler(df: pd.DataFrame):
+    """``df.style`` with floats shown as the plain frame shows them (140, 83.6).
+
+    st.dataframe renders a Styler's display strings, and the Styler default
+    would otherwise pad every float to six decimals.
+    """
+    return df.style.format("{:g}", subset=list(df.select_dtypes("float").columns), na_rep="")
+
+
+def _red_gradient(s: pd.Series) -> list[str]:
+    """Styler column function: red background whose alpha scales min → max."""
+    span = s.max() - s.min()
+    alpha = (s - s.min()).to_numpy() / span if span else np.zeros(len(s))
+    return [f"background-color: rgba(239, 68, 68, {0.05 + 0.45 * a:.2f})" for a in alpha]
+
+
+def _stale_bg(s: pd.Series) -> np.ndarray:
+    """Styler column function: tint the 🔴 Estancado statuses."""
+    return np.where(s.str.startswith("🔴"), "background-color: rgba(239, 68, 68, 0.2)", "")
 
 
 # ══════════════════════════════════════════════════════════════════════
@@ -2393,7 +3447,7 @@ if page == "📊 Dashboard":
     st.markdown("## 📊 Dashboard General")
 
     # ── Week selector (always visible) ──
-    all_weeks = sorted(int(w) for w in df["week"].unique())
+    all_weeks = np.sort(df["week"].unique().astype(np.int64)).tolist()
     current_week = max(all_weeks) if all_weeks else 1
 
     week_labels = [f"Sem {w}" for w in all_weeks]
@@ -2404,12 +3458,9 @@ if page == "📊 Dashboard":
     sel_week = all_weeks[week_labels.index(chosen_label)]
 
     wk_df = df[df["week"] == sel_week]
-    n_sess = int(wk_df["hevy_id"].nunique())
-    vol = int(wk_df["volume_kg"].sum())
-    sets = int(wk_df["n_sets"].sum())
-    dur_mean = int(wk_df.groupby("hevy_id")["duration_min"].first().mean()) if n_sess > 0 else 0
+    n_sess, vol, sets, dur_mean = (int(v) for v in _weekly_stats(df).loc[sel_week])
 
-    dl_1rm = estimate_dl_1rm(df)
+    dl_1rm = _estimate_dl_1rm(df)
     c1, c2, c3, c4, c5, c6 = st.columns(6)
     c1.metric("Sesiones", n_sess)
     c2.metric("Volumen", f"{vol:,} kg")
@@ -2423,13 +3474,13 @@ if page == "📊 Dashboard":
 
     with col_left:
         st.markdown("### Volumen Semanal")
-        wk = weekly_breakdown(df)
+        wk = _weekly_breakdown(df)
         if not wk.empty:
             colors = ["#ef4444" if int(w) == sel_week else "#7f1d1d" for w in wk["week"]]
             fig = go.Figure()
             fig.add_trace(go.Bar(
-                x=wk["week"].apply(lambda w: f"Sem {int(w)}"), y=wk["total_volume"],
-                marker_color=colors, text=wk["total_volume"].apply(lambda v: f"{v:,.0f}"),
+                x=("Sem " + wk["week"].astype(int).astype(str)).to_numpy(), y=wk["total_volume"],
+                marker_color=colors, text=wk["total_volume"].map("{:,.0f}".format),
                 textposition="outside",
             ))
             fig.update_layout(**PL, yaxis_title="Volumen (kg)", showlegend=False, height=350)
@@ -2437,7 +3488,7 @@ if page == "📊 Dashboard":
 
     with col_right:
         st.markdown("### Volumen por Músculo")
-        mv = muscle_volume(wk_df)
+        mv = _muscle_volume(wk_df)
         if not mv.empty:
             fig = px.pie(mv, values="total_volume", names="muscle_group",
                          color="muscle_group",
@@ -2449,11 +3500,11 @@ if page == "📊 Dashboard":
 
     # Density sparkline — selected week
     st.markdown("### ⚡ Densidad por Sesión (kg/min)")
-    dens = session_density(wk_df)
+    dens = _session_density(wk_df)
     if not dens.empty:
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=dens["date"].dt.strftime("%d %b"), y=dens["density_kg_min"],
+            x=_fmt_dates(dens["date"], "%d %b"), y=dens["density_kg_min"],
             mode="lines+markers+text", text=dens["density_kg_min"],
             textposition="top center", line=dict(color="#fbbf24", width=3),
             marker=dict(size=10),
@@ -2463,11 +3514,10 @@ if page == "📊 Dashboard":
 
     # Targets — selected week
     st.markdown(f"### 🎯 vs Objetivos — Sem {sel_week}")
-    wk_targets = vs_targets(wk_df)
-    tc1, tc2, tc3 = st.columns(3)
-    for col, t in zip([tc1, tc2, tc3], wk_targets):
-        pct = min(t["pct"], 100)
-        status = "🟢" if pct >= 80 else "🟡" if pct >= 50 else "🔴"
+    wk_targets = _vs_targets(wk_df)
+    pct = np.minimum([t["pct"] for t in wk_targets], 100)
+    statuses = np.select([pct >= 80, pct >= 50], ["🟢", "🟡"], default="🔴")
+    for col, t, status in zip(st.columns(3), wk_targets, statuses):
         col.metric(f"{status} {t['metric']}", t["actual"], f"Obj: {t['target']}")
 
 
@@ -2478,14 +3528,11 @@ elif page == "📈 Progresión":
     st.markdown("## 📈 Progresión de Ejercicios Clave")
 
     # Match key lifts by template_id (language-independent)
-    key_df = df[df["exercise_template_id"].isin(KEY_LIFT_IDS)]
-    available = sorted(key_df["exercise"].unique().tolist()) if not key_df.empty else []
-    if not available:
-        available = sorted(df[df["e1rm"] > 0]["exercise"].unique())
+    available = _progression_options(df, tuple(KEY_LIFT_IDS))
 
     selected = st.selectbox("Ejercicio", available)
     if selected:
-        hist = pr_history(df, selected)
+        hist = _pr_history(df, selected)
         if not hist.empty:
             col1, col2 = st.columns([2, 1])
             with col1:
@@ -2502,35 +3549,35 @@ elif page == "📈 Progresión":
                 st.plotly_chart(fig, use_container_width=True, key="chart_4")
             with col2:
                 st.markdown("#### Historial")
-                disp = hist[["date", "max_weight", "max_reps_at_max", "e1rm", "is_pr"]].copy()
-                disp.columns = ["Fecha", "Peso", "Reps", "e1RM", "PR"]
-                disp["Fecha"] = disp["Fecha"].dt.strftime("%d %b")
-                disp["PR"] = disp["PR"].map({True: "🏆", False: ""})
+                disp = (
+                    hist[list(_E1RM_HISTORY_COLS)]
+                    .assign(date=_fmt_dates(hist["date"], "%d %b"), is_pr=hist["is_pr"].map({True: "🏆", False: ""}))
+                    .rename(columns=_E1RM_HISTORY_COLS)
+                )
                 st.dataframe(disp, hide_index=True, use_container_width=True)
 
     # Weekly muscle volume stacked
     st.divider()
     st.markdown("### Volumen Semanal por Grupo Muscular")
-    wmv = weekly_muscle_volume(df)
+    wmv = _weekly_muscle_volume(df)
     if not wmv.empty:
+        x_labels = [f"Sem {int(w)}" for w in wmv.index]
         fig = go.Figure()
         for muscle in wmv.columns:
             color = MUSCLE_GROUP_COLORS.get(muscle, "#666")
-            fig.add_trace(go.Bar(x=wmv.index.map(lambda w: f"Sem {w}"), y=wmv[muscle],
+            fig.add_trace(go.Bar(x=x_labels, y=wmv[muscle],
                                   name=muscle, marker_color=color))
         fig.update_layout(**PL, barmode="stack", yaxis_title="Volumen (kg)", height=400)
         st.plotly_chart(fig, use_container_width=True, key="chart_5")
 
     # Recovery
     st.markdown("### 🩺 Indicadores de Recuperación")
-    rec = recovery_indicators(df)
+    rec = bbd.rec
     if not rec.empty:
-        disp = rec[["week", "sessions", "total_volume", "vol_delta_pct",
-                     "avg_fatigue", "adherence_pct", "alert"]].copy()
-        disp.columns = ["Semana", "Sesiones", "Volumen", "Δ Vol %", "Fatiga Media %", "Adherencia %", "Estado"]
-        disp["Volumen"] = disp["Volumen"].apply(lambda v: f"{v:,.0f}")
-        disp["Δ Vol %"] = disp["Δ Vol %"].apply(lambda v: f"{v:+.1f}%" if pd.notna(v) else "—")
-        disp["Fatiga Media %"] = disp["Fatiga Media %"].apply(lambda v: f"{v:.1f}%" if pd.notna(v) else "—")
+        disp = rec[list(_RECOVERY_COLS)].rename(columns=_RECOVERY_COLS)
+        disp["Volumen"] = disp["Volumen"].map("{:,.0f}".format)
+        disp["Δ Vol %"] = ["—" if pd.isna(v) else f"{v:+.1f}%" for v in disp["Δ Vol %"].to_numpy()]
+        disp["Fatiga Media %"] = ["—" if pd.isna(v) else f"{v:.1f}%" for v in disp["Fatiga Media %"].to_numpy()]
         st.dataframe(disp, hide_index=True, use_container_width=True)
 
 
@@ -2540,7 +3587,7 @@ elif page == "📈 Progresión":
 elif page == "🎯 Ratios BBD":
     st.markdown("## 🎯 Ratios BBD — Intensidad Relativa")
 
-    dl_1rm = estimate_dl_1rm(df)
+    dl_1rm = _estimate_dl_1rm(df)
     st.metric("Deadlift 1RM estimado", f"{dl_1rm:.0f} kg",
               help="e1RM del peso muerto convencional, o inferido de Shrugs")
 
@@ -2550,36 +3597,16 @@ elif page == "🎯 Ratios BBD":
     st.markdown("### Cargas vs Prescripción BBD")
     st.caption("El programa BBD prescribe cargas relativas al peso muerto 1RM. ¿Estás cargando lo que deberías?")
 
-    ratios = bbd_ratios(df)
+    ratios = bbd.ratios
     if not ratios.empty:
+        gauge_cols = ["label", "current_weight", "pct_of_dl", "target_low", "target_high"]
+        st.plotly_chart(_ratio_gauges_fig(ratios[gauge_cols]), use_container_width=True, key="bbd_gauges")
         cols = st.columns(len(ratios))
-        for col, (_, row) in zip(cols, ratios.iterrows()):
+        for col, row in zip(cols, ratios.itertuples(index=False)):
             with col:
-                st.markdown(f"**{row['label']}**")
-                if row["current_weight"] > 0:
-                    # Gauge chart
-                    fig = go.Figure(go.Indicator(
-                        mode="gauge+number",
-                        value=row["pct_of_dl"],
-                        number={"suffix": "%", "font": {"size": 32, "color": "#f1f5f9"}},
-                        gauge={
-                            "axis": {"range": [0, 120], "tickcolor": "#4a5568"},
-                            "bar": {"color": "#ef4444"},
-                            "bgcolor": "#1a1a2e",
-                            "steps": [
-                                {"range": [row["target_low"], row["target_high"]], "color": "rgba(34, 197, 94, 0.19)"},
-                            ],
-                            "threshold": {
-                                "line": {"color": "#22c55e", "width": 3},
-                                "value": (row["target_low"] + row["target_high"]) / 2,
-                            },
-                        },
-                    ))
-                    fig.update_layout(height=200, margin=dict(l=20, r=20, t=20, b=20),
-                                      paper_bgcolor="rgba(0,0,0,0)", font=dict(color="#e2e8f0"))
-                    st.plotly_chart(fig, use_container_width=True, key=f'gauge_{row["label"]}')
-                    st.caption(f"{row['current_weight']}kg · Rango: {row['target_low']}-{row['target_high']}%")
-                    st.markdown(row["status"])
+                if row.current_weight > 0:
+                    st.caption(f"{row.current_weight}kg · Rango: {row.target_low}-{row.target_high}%")
+                    st.markdown(row.status)
                 else:
                     st.markdown("⬜ Sin datos aún")
     else:
@@ -2588,7 +3615,7 @@ elif page == "🎯 Ratios BBD":
     # Dominadas progress
     st.divider()
     st.markdown("### 🏊 Dominadas — Objetivo: 75 reps/sesión")
-    dom = dominadas_progress(df)
+    dom = bbd.dom
     if dom["best"] > 0:
         st.progress(min(dom["pct"] / 100, 1.0), text=f"{dom['best']}/{dom['target']} reps (mejor sesión)")
         c1, c2, c3 = st.columns(3)
@@ -2601,14 +3628,11 @@ elif page == "🎯 Ratios BBD":
     # Relative intensity per exercise
     st.divider()
     st.markdown("### Intensidad Relativa por Ejercicio")
-    df_ri = relative_intensity(df)
+    df_ri = bbd.ri
     if not df_ri.empty:
-        ri_display = df_ri[df_ri["e1rm"] > 0][
-            ["date", "exercise", "max_weight", "e1rm", "pct_of_pr", "pct_of_dl"]
-        ].copy()
-        ri_display.columns = ["Fecha", "Ejercicio", "Peso (kg)", "e1RM", "% de PR", "% de DL 1RM"]
-        ri_display["Fecha"] = ri_display["Fecha"].dt.strftime("%d %b")
-        st.dataframe(ri_display.sort_values("% de DL 1RM", ascending=False),
+        ri_display = df_ri.loc[df_ri["e1rm"] > 0, list(_RI_COLS)].rename(columns=_RI_COLS)
+        ri_display = ri_display.sort_values("% de DL 1RM", ascending=False)
+        st.dataframe(_float_styler(ri_display).apply(_red_gradient, subset=["% de DL 1RM"]),
                      hide_index=True, use_container_width=True)
 
 
@@ -2620,7 +3644,7 @@ elif page == "🔬 Fatiga Intra-sesión":
     st.caption("Dropoff de repeticiones dentro de las series de un mismo ejercicio. "
                "Si haces 8×8 Shrugs y acabas haciendo 8,8,8,7,6,5 → fatiga alta.")
 
-    fatigue = intra_session_fatigue(df)
+    fatigue = bbd.fatigue
     if fatigue.empty:
         st.info("Se necesitan ejercicios con ≥3 series para analizar fatiga.")
         st.stop()
@@ -2630,54 +3654,29 @@ elif page == "🔬 Fatiga Intra-sesión":
     c1.metric("Fatiga Media", f"{fatigue['fatigue_pct'].mean():.1f}%")
     c2.metric("CV Reps Medio", f"{fatigue['cv_reps'].mean():.1f}%",
               help="Coeficiente de variación — mayor = más inconsistente")
-    stable = (fatigue["pattern"].str.contains("Estable")).sum()
+    stable = (fatigue["pattern_code"] == 0).sum()
     c3.metric("Ejercicios Estables", f"{stable}/{len(fatigue)}")
 
     st.divider()
 
     # Fatigue by exercise
     st.markdown("### Fatiga por Ejercicio")
-    fig = go.Figure()
-    colors = fatigue["pattern"].map({"🟢 Estable": "#22c55e", "🟡 Moderada": "#f59e0b", "🔴 Alta": "#ef4444"})
-    fig.add_trace(go.Bar(
-        x=fatigue["exercise"], y=fatigue["fatigue_pct"],
-        marker_color=colors, text=fatigue["pattern"],
-        hovertemplate="%{x}<br>Fatiga: %{y:.1f}%<br>%{text}<extra></extra>",
-    ))
-    fig.add_hline(y=10, line_dash="dot", line_color="#22c55e", annotation_text="Umbral estable (10%)")
-    fig.add_hline(y=25, line_dash="dot", line_color="#ef4444", annotation_text="Umbral alto (25%)")
-    fig.update_layout(**PL, height=350, showlegend=False, yaxis_title="Fatiga (%)")
-    st.plotly_chart(fig, use_container_width=True, key="chart_7")
+    st.plotly_chart(_fatigue_bar_fig(fatigue[["exercise", "fatigue_pct", "pattern", "pattern_code"]]),
+                    use_container_width=True, key="chart_7")
 
     # Rep curves
     st.markdown("### Curvas de Repeticiones")
-    for _, row in fatigue.iterrows():
-        reps = row["reps_list"]
-        with st.expander(f"{row['exercise']} — {row['weight']}kg · {row['pattern']} · Fatiga {row['fatigue_pct']}%"):
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=list(range(1, len(reps) + 1)), y=reps,
-                mode="lines+markers+text", text=reps, textposition="top center",
-                line=dict(color="#ef4444" if row["fatigue_pct"] > 25 else "#fbbf24" if row["fatigue_pct"] > 10 else "#22c55e", width=3),
-                marker=dict(size=12),
-            ))
-            fig.add_hline(y=reps[0], line_dash="dot", line_color="#4a5568",
-                          annotation_text=f"Serie 1: {reps[0]} reps")
-            fig.update_layout(**PL, height=200, xaxis_title="Serie #", yaxis_title="Reps", showlegend=False)
-            st.plotly_chart(fig, use_container_width=True, key=f'fatigue_{row["exercise"]}_{row["date"]}')
+    for row in fatigue.itertuples(index=False):
+        with st.expander(f"{row.exercise} — {row.weight}kg · {row.pattern} · Fatiga {row.fatigue_pct}%"):
+            st.plotly_chart(_rep_curve_fig(tuple(row.reps_list), row.fatigue_pct),
+                            use_container_width=True, key=f'fatigue_{row.exercise}_{row.date}')
 
     # Weekly fatigue trend
-    ft = fatigue_trend(df)
+    ft = bbd.ft
     if not ft.empty and len(ft) > 1:
         st.divider()
         st.markdown("### Tendencia Semanal de Fatiga")
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=ft["week"].apply(lambda w: f"Sem {w}"), y=ft["avg_fatigue"],
-                                  mode="lines+markers", name="Media", line=dict(color="#f59e0b", width=3)))
-        fig.add_trace(go.Scatter(x=ft["week"].apply(lambda w: f"Sem {w}"), y=ft["max_fatigue"],
-                                  mode="lines+markers", name="Máxima", line=dict(color="#ef4444", width=2, dash="dot")))
-        fig.update_layout(**PL, height=300, yaxis_title="Fatiga (%)")
-        st.plotly_chart(fig, use_container_width=True, key="chart_9")
+        st.plotly_chart(_fatigue_trend_fig(ft), use_container_width=True, key="chart_9")
 
 
 # ══════════════════════════════════════════════════════════════════════
@@ -2688,7 +3687,7 @@ elif page == "⚡ Densidad":
     st.caption("Volumen por minuto — mide eficiencia y capacidad de trabajo. "
                "Más kg/min = mejor condición y descansos más productivos.")
 
-    dens = session_density(df)
+    dens = bbd.dens
     if dens.empty:
         st.info("No hay sesiones registradas.")
         st.stop()
@@ -2702,25 +3701,12 @@ elif page == "⚡ Densidad":
 
     # Density per session
     st.markdown("### Densidad por Sesión")
-    fig = go.Figure()
-    colors = [DAY_CONFIG.get(d, {}).get("color", "#666") for d in dens["day_num"]]
-    fig.add_trace(go.Bar(
-        x=dens["date"].dt.strftime("%d %b") + " — " + dens["day_name"],
-        y=dens["density_kg_min"],
-        marker_color=colors,
-        text=dens["density_kg_min"].apply(lambda v: f"{v:.0f}"),
-        textposition="outside",
-    ))
-    fig.update_layout(**PL, height=350, yaxis_title="kg/min", showlegend=False)
-    st.plotly_chart(fig, use_container_width=True, key="chart_10")
+    st.plotly_chart(_density_fig(dens), use_container_width=True, key="chart_10")
 
     # Breakdown table
     st.markdown("### Detalle")
-    disp = dens[["date", "day_name", "duration_min", "total_volume", "total_sets",
-                  "density_kg_min", "sets_per_min", "reps_per_min"]].copy()
-    disp.columns = ["Fecha", "Día", "Duración (min)", "Volumen", "Series", "kg/min", "Sets/min", "Reps/min"]
-    disp["Fecha"] = disp["Fecha"].dt.strftime("%d %b %Y")
-    disp["Volumen"] = disp["Volumen"].apply(lambda v: f"{v:,.0f}")
+    disp = dens[list(_DENSITY_COLS)].rename(columns=_DENSITY_COLS)
+    disp["Volumen"] = disp["Volumen"].map("{:,.0f}".format)
     st.dataframe(disp, hide_index=True, use_container_width=True)
 
 
@@ -2733,7 +3719,7 @@ elif page == "🏋️ Strength Standards":
                "DOTS es el estándar de la IPF para comparaciones de fuerza relativa.")
 
     bw = st.number_input("Peso corporal (kg)", value=BODYWEIGHT, min_value=40.0, max_value=200.0, step=0.5)
-    standards = strength_standards(df, bw)
+    standards = _strength_standards(df, bw)
 
     if standards.empty:
         st.info("No hay datos de ejercicios principales.")
@@ -2741,40 +3727,23 @@ elif page == "🏋️ Strength Standards":
 
     # Level badges
     st.divider()
-    for _, row in standards.iterrows():
-        col1, col2, col3, col4 = st.columns([3, 1, 1, 2])
-        with col1:
-            st.markdown(f"**{row['exercise'][:35]}**")
-            st.caption(f"e1RM: {row['best_e1rm']}kg · {row['bw_ratio']}×BW · DOTS: {row['dots_score']}")
-        with col2:
-            st.markdown(f"### {row['level']}")
-        with col3:
-            st.metric("Percentil", f"~{row['percentile']}%")
-        with col4:
-            if row["kg_to_next"] > 0:
-                st.metric("Siguiente nivel", row["next_threshold"],
-                          delta=f"+{row['kg_to_next']:.0f} kg")
-            else:
-                st.markdown("### 🏆")
+    rows_html = "".join(
+        _STD_ROW_HTML.format(
+            exercise=_html.escape(row.exercise[:35]),
+            detail=f"e1RM: {row.best_e1rm}kg · {row.bw_ratio}×BW · DOTS: {row.dots_score}",
+            level=row.level,
+            percentile=row.percentile,
+            nxt=(f'{row.next_threshold}<div class="std-delta">+{row.kg_to_next:.0f} kg</div>'
+                 if row.kg_to_next > 0 else "🏆"),
+        )
+        for row in standards.itertuples(index=False)
+    )
+    st.markdown(_STD_STYLE + rows_html, unsafe_allow_html=True)
 
     # Bar chart
     st.divider()
     st.markdown("### Ratio Peso/BW por Ejercicio")
-    fig = go.Figure()
-    colors = ["#22c55e" if "Avanzado" in r["level"] or "Elite" in r["level"]
-              else "#f59e0b" if "Intermedio" in r["level"]
-              else "#94a3b8" for _, r in standards.iterrows()]
-    fig.add_trace(go.Bar(
-        x=standards["exercise"].apply(lambda x: x[:20]),
-        y=standards["bw_ratio"],
-        marker_color=colors,
-        text=standards["bw_ratio"].apply(lambda v: f"{v:.2f}×"),
-        textposition="outside",
-    ))
-    fig.add_hline(y=1.0, line_dash="dot", line_color="#4a5568", annotation_text="1×BW")
-    fig.add_hline(y=2.0, line_dash="dot", line_color="#f59e0b", annotation_text="2×BW")
-    fig.update_layout(**PL, height=350, yaxis_title="×BW", showlegend=False)
-    st.plotly_chart(fig, use_container_width=True, key="chart_11")
+    st.plotly_chart(_standards_bar_fig(standards), use_container_width=True, key="chart_11")
 
 
 # ══════════════════════════════════════════════════════════════════════
@@ -2793,36 +3762,32 @@ elif page == "🧠 Inteligencia":
         st.markdown("### 🔴 Detección de Estancamiento")
         st.caption("Si un ejercicio no mejora su e1RM en 3+ semanas → alerta de plateau.")
 
-        plateaus = plateau_detection(df)
+        plateaus = bbd.plateaus
         if plateaus.empty:
             st.info("Se necesitan ≥2 semanas de datos por ejercicio para detectar estancamientos.")
         else:
             # Summary cards
-            stuck = (plateaus["status"].str.contains("Estancado")).sum()
-            watch = (plateaus["status"].str.contains("Vigilar")).sum()
-            rising = (plateaus["status"].str.contains("Subiendo")).sum()
+            vc = plateaus["status_cat"].value_counts()
             c1, c2, c3 = st.columns(3)
-            c1.metric("🔴 Estancados", stuck)
-            c2.metric("🟡 Vigilar", watch)
-            c3.metric("🟢 Progresando", rising + (plateaus["status"].str.contains("Estable")).sum())
+            c1.metric("🔴 Estancados", int(vc["Estancado"]))
+            c2.metric("🟡 Vigilar", int(vc["Vigilar"]))
+            c3.metric("🟢 Progresando", int(vc["Subiendo"] + vc["Estable"]))
 
             st.divider()
 
             # Table
-            disp = plateaus[["exercise", "pr_e1rm", "last_e1rm", "pct_of_pr",
-                             "weeks_since_pr", "trend_slope", "status"]].copy()
-            disp.columns = ["Ejercicio", "PR (e1RM)", "Último e1RM", "% del PR",
-                            "Sem. sin PR", "Tendencia", "Estado"]
+            disp = plateaus[list(_PLATEAU_COLS)].rename(columns=_PLATEAU_COLS)
 
             # Color-code rows via status
-            st.dataframe(disp, hide_index=True, use_container_width=True)
+            st.dataframe(_float_styler(disp).apply(_stale_bg, subset=["Estado"]),
+                         hide_index=True, use_container_width=True)
 
             # Alerts
-            stale = plateaus[plateaus["status"].str.contains("Estancado")]
+            stale = plateaus[plateaus["status_cat"] == "Estancado"]
             if not stale.empty:
                 st.warning(
                     "⚠️ **Ejercicios estancados:** "
-                    + ", ".join(f"{r['exercise']} ({r['weeks_since_pr']} sem sin PR)" for _, r in stale.iterrows())
+                    + ", ".join(f"{e} ({w} sem sin PR)" for e, w in zip(stale["exercise"], stale["weeks_since_pr"]))
                     + "\n\nConsidera: variar reps/series, deload, o cambiar variante."
                 )
 
@@ -2832,7 +3797,7 @@ elif page == "🧠 Inteligencia":
         st.caption("Compara volumen reciente vs media de últimas 4 semanas. "
                    "Zona segura: 0.8–1.3. Sobre 1.5 = riesgo de lesión/overtraining.")
 
-        acwr_df = acwr(df)
+        acwr_df = bbd.acwr
         if acwr_df.empty or acwr_df["acwr"].isna().all():
             st.info("Se necesitan al menos 2 semanas de datos para calcular ACWR.")
         else:
@@ -2841,54 +3806,19 @@ elif page == "🧠 Inteligencia":
                 latest = valid.iloc[-1]
 
                 # Big ACWR gauge
-                fig = go.Figure(go.Indicator(
-                    mode="gauge+number+delta",
-                    value=latest["acwr"],
-                    number={"font": {"size": 48, "color": "#f1f5f9"}},
-                    delta={"reference": 1.0, "position": "bottom"},
-                    gauge={
-                        "axis": {"range": [0.4, 2.0], "tickcolor": "#4a5568"},
-                        "bar": {"color": "#ef4444"},
-                        "bgcolor": "#1a1a2e",
-                        "steps": [
-                            {"range": [0.4, 0.8], "color": "rgba(59, 130, 246, 0.2)"},
-                            {"range": [0.8, 1.3], "color": "rgba(34, 197, 94, 0.2)"},
-                            {"range": [1.3, 1.5], "color": "rgba(234, 179, 8, 0.2)"},
-                            {"range": [1.5, 2.0], "color": "rgba(239, 68, 68, 0.2)"},
-                        ],
-                    },
-                ))
-                fig.update_layout(
-                    height=250, margin=dict(l=30, r=30, t=30, b=10),
-                    paper_bgcolor="rgba(0,0,0,0)", font=dict(color="#e2e8f0"),
-                )
-                st.plotly_chart(fig, use_container_width=True, key="acwr_gauge")
+                st.plotly_chart(_acwr_gauge_fig(latest["acwr"]), use_container_width=True, key="acwr_gauge")
                 st.markdown(f"**Semana {int(latest['week'])}:** {latest['acwr_zone']}")
 
                 # ACWR trend line
                 st.divider()
                 st.markdown("### Tendencia ACWR")
-                fig2 = go.Figure()
-                fig2.add_trace(go.Scatter(
-                    x=valid["week"].apply(lambda w: f"Sem {int(w)}"), y=valid["acwr"],
-                    mode="lines+markers+text", text=valid["acwr"].apply(lambda v: f"{v:.2f}"),
-                    textposition="top center", line=dict(color="#ef4444", width=3),
-                    marker=dict(size=10),
-                ))
-                # Zone bands
-                fig2.add_hrect(y0=0.8, y1=1.3, fillcolor="rgba(34,197,94,0.08)", line_width=0,
-                               annotation_text="Zona segura", annotation_position="top left")
-                fig2.add_hrect(y0=1.3, y1=1.5, fillcolor="rgba(234,179,8,0.08)", line_width=0)
-                fig2.add_hrect(y0=1.5, y1=2.0, fillcolor="rgba(239,68,68,0.08)", line_width=0)
-                fig2.add_hline(y=1.0, line_dash="dot", line_color="#4a5568")
-                fig2.update_layout(**PL, height=300, yaxis_title="ACWR", showlegend=False)
-                st.plotly_chart(fig2, use_container_width=True, key="acwr_trend")
+                st.plotly_chart(_acwr_trend_fig(valid[["week_str", "acwr"]]),
+                                use_container_width=True, key="acwr_trend")
 
                 # Table
-                disp = valid[["week", "acute_volume", "chronic_volume", "acwr", "acwr_zone", "sessions"]].copy()
-                disp.columns = ["Semana", "Vol. Agudo", "Vol. Crónico", "ACWR", "Zona", "Sesiones"]
-                disp["Vol. Agudo"] = disp["Vol. Agudo"].apply(lambda v: f"{v:,.0f}")
-                disp["Vol. Crónico"] = disp["Vol. Crónico"].apply(lambda v: f"{v:,.0f}" if pd.notna(v) else "—")
+                disp = valid[list(_ACWR_COLS)].rename(columns=_ACWR_COLS)
+                disp["Vol. Agudo"] = disp["Vol. Agudo"].map("{:,.0f}".format)
+                disp["Vol. Crónico"] = ["—" if pd.isna(v) else f"{v:,.0f}" for v in disp["Vol. Crónico"].to_numpy()]
                 st.dataframe(disp, hide_index=True, use_container_width=True)
 
     # ── Tab 3: Mesocycles ──
@@ -2896,45 +3826,37 @@ elif page == "🧠 Inteligencia":
         st.markdown("### 📦 Mesociclos — Bloques de 4 Semanas")
         st.caption("Agrupación automática del programa BBD en mesociclos de 4 semanas con comparativas.")
 
-        meso = mesocycle_summary(df)
+        meso = bbd.meso
         if meso.empty or len(meso) < 1:
             st.info("Se necesita al menos 1 mesociclo completo (4 semanas) para análisis significativo.")
         else:
             # Mesocycle cards
-            for _, m in meso.iterrows():
-                weeks_label = f"Sem {int(m['week_start'])}–{int(m['week_end'])}"
-                vol_delta = f" ({m['vol_delta_pct']:+.1f}%)" if pd.notna(m["vol_delta_pct"]) else ""
-                fat_str = f"{m['avg_fatigue']:.1f}%" if pd.notna(m["avg_fatigue"]) else "—"
+            for m in meso.itertuples(index=False):
+                weeks_label = f"Sem {int(m.week_start)}–{int(m.week_end)}"
+                vol_delta = f" ({m.vol_delta_pct:+.1f}%)" if pd.notna(m.vol_delta_pct) else ""
+                fat_str = f"{m.avg_fatigue:.1f}%" if pd.notna(m.avg_fatigue) else "—"
 
                 with st.expander(
-                    f"📦 Mesociclo {int(m['mesocycle'])} — {weeks_label} | "
-                    f"{int(m['total_sessions'])} sesiones · "
-                    f"{m['avg_weekly_volume']:,.0f} kg/sem{vol_delta}"
+                    f"📦 Mesociclo {int(m.mesocycle)} — {weeks_label} | "
+                    f"{int(m.total_sessions)} sesiones · "
+                    f"{m.avg_weekly_volume:,.0f} kg/sem{vol_delta}"
                 ):
                     c1, c2, c3, c4 = st.columns(4)
-                    c1.metric("Sesiones", int(m["total_sessions"]))
-                    c2.metric("Vol. medio/sem", f"{m['avg_weekly_volume']:,.0f} kg",
-                              delta=f"{m['vol_delta_pct']:+.1f}%" if pd.notna(m["vol_delta_pct"]) else None)
-                    c3.metric("e1RM medio", f"{m['avg_e1rm']:.1f} kg",
-                              delta=f"{m['e1rm_delta']:+.1f}" if pd.notna(m["e1rm_delta"]) else None)
+                    c1.metric("Sesiones", int(m.total_sessions))
+                    c2.metric("Vol. medio/sem", f"{m.avg_weekly_volume:,.0f} kg",
+                              delta=f"{m.vol_delta_pct:+.1f}%" if pd.notna(m.vol_delta_pct) else None)
+                    c3.metric("e1RM medio", f"{m.avg_e1rm:.1f} kg",
+                              delta=f"{m.e1rm_delta:+.1f}" if pd.notna(m.e1rm_delta) else None)
                     c4.metric("Fatiga media", fat_str,
-                              delta=f"{m['fatigue_delta']:+.1f}pp" if pd.notna(m["fatigue_delta"]) else None,
+                              delta=f"{m.fatigue_delta:+.1f}pp" if pd.notna(m.fatigue_delta) else None,
                               delta_color="inverse")
 
             # Mesocycle comparison chart
             if len(meso) >= 2:
                 st.divider()
                 st.markdown("### Evolución por Mesociclo")
-                fig = go.Figure()
-                x_labels = [f"Meso {int(m)}" for m in meso["mesocycle"]]
-                fig.add_trace(go.Bar(
-                    x=x_labels, y=meso["avg_weekly_volume"],
-                    name="Vol. medio/sem", marker_color="#ef4444",
-                    text=meso["avg_weekly_volume"].apply(lambda v: f"{v:,.0f}"),
-                    textposition="outside",
-                ))
-                fig.update_layout(**PL, height=300, yaxis_title="Volumen (kg/sem)", showlegend=False)
-                st.plotly_chart(fig, use_container_width=True, key="meso_vol")
+                st.plotly_chart(_meso_volume_fig(meso[["mesocycle", "avg_weekly_volume"]]),
+                                use_container_width=True, key="meso_vol")
 
     # ── Tab 4: Historical Comparison ──
     with tab4:
@@ -2955,7 +3877,7 @@ elif page == "🧠 Inteligencia":
                 weeks_ago = st.select_slider("Comparar vs hace X semanas", options=available_weeks,
                                              value=available_weeks[0])
 
-            comp = historical_comparison(df, weeks_ago=weeks_ago)
+            comp = _historical_comparison(df, weeks_ago=weeks_ago)
             if "error" in comp:
                 st.info(comp["error"])
             elif comp:
@@ -2971,42 +3893,22 @@ elif page == "🧠 Inteligencia":
                     st.divider()
                     st.markdown("### Progresión por Ejercicio")
                     ex_df = pd.DataFrame(comp["exercise_deltas"])
-                    disp = ex_df[["exercise", "e1rm_then", "e1rm_now", "delta_kg", "delta_pct", "trend"]].copy()
-                    disp.columns = ["Ejercicio", f"e1RM (sem {comp['compare_week']})",
-                                    "e1RM actual", "Δ kg", "Δ %", ""]
+                    ex_cols = {
+                        "exercise": "Ejercicio", "e1rm_then": f"e1RM (sem {comp['compare_week']})",
+                        "e1rm_now": "e1RM actual", "delta_kg": "Δ kg", "delta_pct": "Δ %", "trend": "",
+                    }
+                    disp = ex_df[list(ex_cols)].rename(columns=ex_cols)
                     st.dataframe(disp, hide_index=True, use_container_width=True)
 
                 # Radar chart — strength profile
                 if comp.get("profile_now") and comp.get("profile_then"):
                     st.divider()
                     st.markdown("### Perfil de Fuerza — Radar")
-                    axes = list(comp["profile_now"].keys())
-                    now_vals = [comp["profile_now"].get(a, 0) for a in axes]
-                    then_vals = [comp["profile_then"].get(a, 0) for a in axes]
-
-                    fig = go.Figure()
-                    fig.add_trace(go.Scatterpolar(
-                        r=now_vals + [now_vals[0]], theta=axes + [axes[0]],
-                        fill="toself", name="Ahora",
-                        fillcolor="rgba(239, 68, 68, 0.2)", line_color="#ef4444",
-                    ))
-                    fig.add_trace(go.Scatterpolar(
-                        r=then_vals + [then_vals[0]], theta=axes + [axes[0]],
-                        fill="toself", name=f"Hace {weeks_ago} sem",
-                        fillcolor="rgba(59, 130, 246, 0.2)", line_color="#3b82f6",
-                    ))
-                    fig.update_layout(
-                        polar=dict(
-                            bgcolor="rgba(0,0,0,0)",
-                            radialaxis=dict(range=[0, 100], showticklabels=True,
-                                            gridcolor="#2d3748", tickfont=dict(color="#94a3b8")),
-                            angularaxis=dict(gridcolor="#2d3748",
-                                             tickfont=dict(color="#e2e8f0", size=12)),
-                        ),
-                        **PL, height=450, showlegend=True,
-                        legend=dict(x=0.85, y=1.1),
-                    )
-                    st.plotly_chart(fig, use_container_width=True, key="radar_yo_vs_yo")
+                    axes = tuple(comp["profile_now"].keys())
+                    now_vals = tuple(comp["profile_now"].get(a, 0) for a in axes)
+                    then_vals = tuple(comp["profile_then"].get(a, 0) for a in axes)
+                    st.plotly_chart(_profile_radar_fig(axes, now_vals, then_vals, weeks_ago),
+                                    use_container_width=True, key="radar_yo_vs_yo")
             else:
                 st.info("No hay datos suficientes para la comparativa seleccionada.")
 
@@ -3018,29 +3920,11 @@ elif page == "🎮 Niveles":
     st.markdown("## 🎮 Niveles de Fuerza")
     st.caption("Sistema RPG: desbloquea logros para ganar XP y subir de nivel.")
 
-    gam = gamification_status(df, BODYWEIGHT)
+    gam = bbd.gam
+    banner_html, grid_by_cat = _gamification_html(gam)
 
     # ── Level banner ──
-    level_colors = {
-        1: "#6b7280", 2: "#6b7280", 3: "#22c55e", 4: "#22c55e",
-        5: "#3b82f6", 6: "#3b82f6", 7: "#a855f7", 8: "#f59e0b",
-        9: "#ef4444", 10: "#ef4444",
-    }
-    color = level_colors.get(gam["level"], "#6b7280")
-
-    st.markdown(f"""
-    <div style="background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
-        border: 2px solid {color}; border-radius: 16px; padding: 24px; text-align: center;
-        margin-bottom: 20px;">
-        <div style="font-size: 3.5rem; margin-bottom: 4px;">⚔️</div>
-        <div style="font-size: 2rem; font-weight: 700; color: {color};">
-            Nivel {gam['level']} — {gam['title']}
-        </div>
-        <div style="color: #94a3b8; margin-top: 8px;">
-            {gam['xp']} XP · {gam['unlocked']}/{gam['total']} logros desbloqueados
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(banner_html, unsafe_allow_html=True)
 
     # XP bar to next level
     if gam["level"] < 10:
@@ -3052,65 +3936,27 @@ elif page == "🎮 Niveles":
     st.divider()
 
     # ── Achievement categories ──
-    achievements = gam["achievements"]
     categories = {}
-    for a in achievements:
+    for a in gam["achievements"]:
         categories.setdefault(a["cat"], []).append(a)
 
     for cat_name, cat_achs in categories.items():
         unlocked_in_cat = sum(1 for a in cat_achs if a["unlocked"])
-        st.markdown(f"### {cat_name}  ({unlocked_in_cat}/{len(cat_achs)})")
-
-        cols_per_row = 3
-        for i in range(0, len(cat_achs), cols_per_row):
-            cols = st.columns(cols_per_row)
-            for j, col in enumerate(cols):
-                idx = i + j
-                if idx >= len(cat_achs):
-                    break
-                a = cat_achs[idx]
-                with col:
-                    if a["unlocked"]:
-                        border_color = "#22c55e"
-                        icon = "✅"
-                        opacity = "1"
-                    else:
-                        border_color = "#2d3748"
-                        icon = "🔒"
-                        opacity = "0.6"
-
-                    pct = int(a["progress"] * 100)
-                    bar_w = min(pct, 100)
-
-                    st.markdown(f"""
-                    <div style="background: #1a1a2e; border: 1px solid {border_color};
-                        border-radius: 12px; padding: 14px; margin-bottom: 10px; opacity: {opacity};">
-                        <div style="display: flex; justify-content: space-between; align-items: center;">
-                            <span style="font-weight: 600; color: #f1f5f9;">{icon} {a['name']}</span>
-                            <span style="color: #fbbf24; font-size: 0.8rem; font-weight: 600;">{a['xp']} XP</span>
-                        </div>
-                        <div style="color: #94a3b8; font-size: 0.8rem; margin: 6px 0;">{a['desc']}</div>
-                        <div style="background: #0f172a; border-radius: 4px; height: 8px; margin-top: 8px;">
-                            <div style="background: {border_color}; width: {bar_w}%; height: 100%;
-                                border-radius: 4px;"></div>
-                        </div>
-                        <div style="color: #64748b; font-size: 0.75rem; margin-top: 4px;">
-                            {a['current']} · {pct}%
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+        st.markdown(f"### {cat_name}  ({unlocked_in_cat}/{len(cat_achs)})\n\n{grid_by_cat[cat_name]}",
+                    unsafe_allow_html=True)
 
     # ── Level roadmap ──
     st.divider()
-    st.markdown("### 🗺️ Roadmap de Niveles")
-    from src.analytics import LEVEL_TABLE
+    roadmap = ["### 🗺️ Roadmap de Niveles"]
     for lvl, xp_req, title in LEVEL_TABLE:
         if lvl <= gam["level"]:
-            st.markdown(f"**✅ Nivel {lvl} — {title}** ({xp_req} XP)")
+            roadmap.append(f"**✅ Nivel {lvl} — {title}** ({xp_req} XP)")
         elif lvl == gam["level"] + 1:
-            st.markdown(f"**→ Nivel {lvl} — {title}** ({xp_req} XP) — *siguiente*")
+            roadmap.append(f"**→ Nivel {lvl} — {title}** ({xp_req} XP) — *siguiente*")
         else:
-            st.caption(f"🔒 Nivel {lvl} — {title} ({xp_req} XP)")
+            roadmap.append(f'<span style="color: #94a3b8; font-size: 0.875rem;">'
+                           f'🔒 Nivel {lvl} — {title} ({xp_req} XP)</span>')
+    st.markdown("\n\n".join(roadmap), unsafe_allow_html=True)
 
 
 # ══════════════════════════════════════════════════════════════════════
@@ -3139,8 +3985,9 @@ elif page == "🏛️ Hall of Titans":
         """, unsafe_allow_html=True)
 
         st.divider()
-        st.markdown("### 📱 Cómo añadir un vídeo")
         st.markdown("""
+### 📱 Cómo añadir un vídeo
+
 1. **Graba** el levantamiento con el móvil
 2. **Sube a YouTube** → Ajustes → Visibilidad: **No listado** → Publicar → Copia el enlace
 3. **Abre Notion** → Base de datos **🏛️ Hall of Titans** → **+ Nuevo**
@@ -3153,13 +4000,13 @@ elif page == "🏛️ Hall of Titans":
 
     else:
         # Stats bar
-        total = len(titans)
-        prs = sum(1 for t in titans if "PR" in t.get("epico", ""))
-        heaviest = max((t["peso"] for t in titans if t.get("peso")), default=0)
+        titans_df = pd.DataFrame(titans)
+        prs = int(titans_df["epico"].str.contains("PR", regex=False).sum())
+        heaviest = titans_df["peso"].max()  # NaN when no entry has a weight
         c1, c2, c3 = st.columns(3)
-        c1.metric("⚔️ Hazañas", total)
+        c1.metric("⚔️ Hazañas", len(titans_df))
         c2.metric("🔥 PRs grabados", prs)
-        c3.metric("🏋️ Máximo registrado", f"{heaviest:.0f} kg" if heaviest else "—")
+        c3.metric("🏋️ Máximo registrado", f"{heaviest:.0f} kg" if heaviest > 0 else "—")
 
         st.link_button("➕ Añadir levantamiento",
                         "https://www.notion.so/34d213072fb14686910d35f3fec1062f",
@@ -3168,60 +4015,7 @@ elif page == "🏛️ Hall of Titans":
         st.divider()
 
         # Video grid
-        for i in range(0, len(titans), 2):
-            cols = st.columns(2)
-            for j, col in enumerate(cols):
-                idx = i + j
-                if idx >= len(titans):
-                    break
-                t = titans[idx]
-                with col:
-                    # Badge color
-                    badge_colors = {
-                        "🔥 PR": "#ef4444", "💪 Heavy": "#f59e0b",
-                        "🎯 Técnica": "#3b82f6", "😤 Grind": "#a855f7",
-                        "⭐ Hito": "#eab308",
-                    }
-                    badge_color = badge_colors.get(t["epico"], "#6b7280")
-
-                    # Header
-                    peso_str = f"{t['peso']:.0f}kg" if t.get("peso") else ""
-                    bw_str = f" ({t['bw_ratio']:.2f}×BW)" if t.get("bw_ratio") else ""
-                    fecha_str = t.get("fecha", "")
-
-                    st.markdown(f"""
-                    <div style="background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
-                        border: 1px solid #2d3748; border-radius: 12px; padding: 16px; margin-bottom: 16px;">
-                        <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 8px;">
-                            <span style="font-weight: 700; font-size: 1.1rem; color: #f1f5f9;">
-                                {t['title']}
-                            </span>
-                            <span style="background: {badge_color}; color: white; padding: 2px 10px;
-                                border-radius: 12px; font-size: 0.8rem; font-weight: 600;">
-                                {t['epico']}
-                            </span>
-                        </div>
-                        <div style="color: #94a3b8; font-size: 0.85rem; margin-bottom: 10px;">
-                            {t['ejercicio']} · {peso_str}{bw_str} · {fecha_str}
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                    # Embed YouTube video
-                    embed = _youtube_embed_url(t["url"])
-                    if embed:
-                        st.markdown(
-                            f'<iframe width="100%" height="280" src="{embed}" '
-                            f'frameborder="0" allow="accelerometer; autoplay; clipboard-write; '
-                            f'encrypted-media; gyroscope; picture-in-picture" '
-                            f'allowfullscreen style="border-radius: 8px;"></iframe>',
-                            unsafe_allow_html=True,
-                        )
-                    else:
-                        st.markdown(f"[🔗 Ver vídeo]({t['url']})")
-
-                    if t.get("comentario"):
-                        st.caption(f'💬 "{t["comentario"]}"')
+        st.markdown(_titans_grid_html(titans), unsafe_allow_html=True)
 
 
 # ══════════════════════════════════════════════════════════════════════
@@ -3229,34 +4023,29 @@ elif page == "🏛️ Hall of Titans":
 # ══════════════════════════════════════════════════════════════════════
 elif page == "💪 Sesiones":
     st.markdown("## 💪 Historial de Sesiones")
-    sessions = session_summary(df)
+    sessions = _session_summary(df)
     if sessions.empty:
         st.info("No hay sesiones.")
     else:
+        details = _session_details(df)
+        sessions = sessions.assign(fecha_str=_fmt_dates(sessions["date"], "%d %b %Y"))
         for _, s in sessions.iterrows():
-            color = DAY_CONFIG.get(s["day_num"], {}).get("color", "#666")
+            color = DAY_COLORS.get(s["day_num"], "#666")
             dens = s["total_volume"] / s["duration_min"] if s["duration_min"] > 0 else 0
             with st.expander(
-                f"📅 {s['date'].strftime('%d %b %Y')} — {s['day_name']} | "
+                f"📅 {s['fecha_str']} — {s['day_name']} | "
                 f"{s['total_sets']} sets · {s['total_volume']:,.0f} kg · "
                 f"{s['duration_min']} min · {dens:.0f} kg/min"
             ):
-                detail = session_detail(df, s["hevy_id"])
+                disp, fatigue_lines = details[s["hevy_id"]]
                 if s["description"]:
                     st.caption(f'💬 "{s["description"]}"')
-                disp = detail[["exercise", "n_sets", "reps_str", "max_weight", "volume_kg", "top_set", "e1rm"]].copy()
-                disp.columns = ["Ejercicio", "Series", "Reps", "Peso", "Volumen", "Top Set", "e1RM"]
-                disp["Volumen"] = disp["Volumen"].apply(lambda v: f"{v:,.0f}" if v > 0 else "—")
-                disp["e1RM"] = disp["e1RM"].apply(lambda v: f"{v:.1f}" if v > 0 else "—")
-                disp["Peso"] = disp["Peso"].apply(lambda v: f"{v:.0f}" if v > 0 else "BW")
                 st.dataframe(disp, hide_index=True, use_container_width=True)
 
                 # Fatigue mini-analysis
-                fatigue = intra_session_fatigue(detail)
-                if not fatigue.empty:
+                if fatigue_lines:
                     st.markdown("**Análisis de fatiga:**")
-                    for _, fr in fatigue.iterrows():
-                        st.caption(f"  {fr['exercise']}: {fr['pattern']} (dropoff {fr['fatigue_pct']}%, CV {fr['cv_reps']}%)")
+                    st.caption("  \n".join(fatigue_lines))
 
 
 # ══════════════════════════════════════════════════════════════════════
@@ -3264,24 +4053,27 @@ elif page == "💪 Sesiones":
 # ══════════════════════════════════════════════════════════════════════
 elif page == "🏆 PRs":
     st.markdown("## 🏆 Records Personales — BBD")
-    prs = pr_table(df)
+    prs = _pr_table(df, BODYWEIGHT)
     if prs.empty:
         st.info("Aún no hay PRs.")
     else:
         top3 = prs.head(3)
-        cols = st.columns(3)
-        medals = ["🥇", "🥈", "🥉"]
-        for i, (col, (_, row)) in enumerate(zip(cols, top3.iterrows())):
-            with col:
-                st.markdown(f"### {medals[i]} {row['exercise'][:25]}")
-                st.metric("e1RM", f"{row['e1rm']} kg")
-                bw_ratio = row["e1rm"] / BODYWEIGHT
-                st.caption(f"{row['max_weight']}kg × {row['max_reps_at_max']} · {bw_ratio:.2f}×BW · {row['date'].strftime('%d %b')}")
+        cards = [
+            _PR_CARD_HTML.format(medal=medal, exercise=ex[:25], e1rm=e1rm, weight=w, reps=r,
+                                 bw=bw, fecha=fecha)
+            for medal, ex, e1rm, w, r, bw, fecha in zip(
+                ["🥇", "🥈", "🥉"], top3["exercise"], top3["e1rm"], top3["max_weight"],
+                top3["max_reps_at_max"], top3["bw_ratio"], _fmt_dates(top3["date"], "%d %b"),
+            )
+        ]
+        for col, card in zip(st.columns(3), cards):
+            col.markdown(card, unsafe_allow_html=True)
         st.divider()
-        disp = prs[["exercise", "max_weight", "max_reps_at_max", "e1rm", "date", "day_name"]].copy()
-        disp.columns = ["Ejercicio", "Peso", "Reps", "e1RM", "Fecha", "Día"]
-        disp["Fecha"] = disp["Fecha"].dt.strftime("%d %b %Y")
-        disp["×BW"] = (disp["e1RM"] / BODYWEIGHT).round(2)
+        disp = (
+            prs[list(_PR_COLS)]
+            .assign(date=_fmt_dates(prs["date"], "%d %b %Y"))
+            .rename(columns=_PR_COLS)
+        )
         st.dataframe(disp, hide_index=True, use_container_width=True, height=400)
 
 
@@ -3290,33 +4082,25 @@ elif page == "🏆 PRs":
 # ══════════════════════════════════════════════════════════════════════
 elif page == "🎯 Adherencia":
     st.markdown("## 🎯 Adherencia al Programa")
-    adh = day_adherence(df)
-    cols = st.columns(3)
-    for i, (_, row) in enumerate(adh.iterrows()):
-        with cols[i % 3]:
-            color = DAY_CONFIG.get(row["day_num"], {}).get("color", "#666")
-            last = row["last_date"].strftime("%d %b") if pd.notna(row["last_date"]) else "—"
-            st.markdown(f"""
-            <div style="background: linear-gradient(135deg, #1a1a2e, #16213e);
-                border-left: 4px solid {color}; border-radius: 8px; padding: 16px; margin-bottom: 12px;">
-                <div style="font-size: 1.5rem;">{row['status']}</div>
-                <div style="font-weight: 600; color: #f1f5f9;">{row['day_name']}</div>
-                <div style="color: #94a3b8; font-size: 0.85rem;">{row['focus']}</div>
-                <div style="color: #e2e8f0; margin-top: 8px;">{row['times_completed']}× · Última: {last}</div>
-            </div>""", unsafe_allow_html=True)
+    adh = _day_adherence(df)
+    colors = adh["day_num"].map(DAY_COLORS).fillna("#666")
+    lasts = pd.to_datetime(adh["last_date"]).dt.strftime("%d %b").fillna("—")
+    cards = [
+        _ADH_CARD_HTML.format(color=c, status=status, day=d, focus=f, n=n, last=l)
+        for c, status, d, f, n, l in zip(colors, adh["status"], adh["day_name"], adh["focus"],
+                                          adh["times_completed"], lasts)
+    ]
+    # One markdown per column; card i still lands in column i % 3
+    for i, col in enumerate(st.columns(3)):
+        col.markdown("".join(cards[i::3]), unsafe_allow_html=True)
 
     completed = adh["times_completed"].gt(0).sum()
     st.progress(completed / 6, text=f"Cobertura: {completed}/6 días completados al menos 1 vez")
 
-    wk = weekly_breakdown(df)
+    wk = _weekly_breakdown(df)
     if not wk.empty:
         st.markdown("### Sesiones por Semana")
-        fig = go.Figure()
-        fig.add_trace(go.Bar(x=wk["week"].apply(lambda w: f"Sem {w}"), y=wk["sessions"],
-                              marker_color="#22c55e", text=wk["sessions"], textposition="outside"))
-        fig.add_hline(y=5, line_dash="dot", line_color="#ef4444", annotation_text="Objetivo: 5-6")
-        fig.update_layout(**PL, height=300, yaxis_title="Sesiones", showlegend=False)
-        st.plotly_chart(fig, use_container_width=True, key="chart_12")
+        st.plotly_chart(_sessions_per_week_fig(wk[["week", "sessions"]]), use_container_width=True, key="chart_12")
 
 # ══════════════════════════════════════════════════════════════════════
 # ⭐ QUALITY SCORE — BBD
@@ -3325,11 +4109,11 @@ elif page == "⭐ Quality Score":
     st.markdown("## ⭐ Quality Score")
     st.caption("Puntuación compuesta: Key Lift (35%) + Volumen (25%) + Cobertura (25%) + Consistencia (15%)")
 
-    qdf = workout_quality_bbd(df, DAY_CONFIG, EXERCISE_DB)
+    qdf = _workout_quality_bbd(df, DAY_CONFIG, EXERCISE_DB)
     if qdf.empty:
         st.info("Sin datos suficientes.")
     else:
-        qt = quality_trend(qdf)
+        qt = _quality_trend(qdf)
         c1, c2, c3, c4 = st.columns(4)
         c1.metric("Media", f"{qt['avg']:.0f}/100")
         c2.metric("Mejor", f"{qt['best']}/100")
@@ -3337,23 +4121,14 @@ elif page == "⭐ Quality Score":
         trend_emoji = {"improving": "📈", "declining": "📉", "stable": "➡️"}
         c4.metric("Tendencia", trend_emoji.get(qt["trend"], "➡️"))
 
-        fig = px.bar(
-            qdf, x="date", y="quality_score", color="grade",
-            color_discrete_map={"S": "#f59e0b", "A": "#10b981", "B": "#3b82f6",
-                                "C": "#8b5cf6", "D": "#f97316", "F": "#ef4444"},
-            hover_data=["day_name", "lift_score", "vol_score", "cov_score", "dur_score"],
-            labels={"quality_score": "Score", "date": "", "grade": "Nota"},
+        st.plotly_chart(_quality_fig_bbd(qdf, qt["avg"]), use_container_width=True,
+                        key="chart_quality_bbd")
+
+        display = (
+            qdf[list(_QUALITY_COLS_BBD)]
+            .assign(date=_fmt_dates(qdf["date"], "%d/%m"))
+            .rename(columns=_QUALITY_COLS_BBD)
         )
-        fig.update_layout(**PL, height=350, showlegend=True)
-        fig.add_hline(y=qt["avg"], line_dash="dot", line_color="#94a3b8",
-                     annotation_text=f"Media: {qt['avg']:.0f}")
-        st.plotly_chart(fig, use_container_width=True, key="chart_quality_bbd")
-
-        display = qdf[["date", "day_name", "quality_score", "grade",
-                      "lift_score", "vol_score", "cov_score", "dur_score"]].copy()
-        display.columns = ["Fecha", "Día", "Score", "Nota",
-                         "Lift /35", "Vol /25", "Cov /25", "Dur /15"]
-        display["Fecha"] = display["Fecha"].dt.strftime("%d/%m")
         st.dataframe(display.sort_values("Fecha", ascending=False),
                     use_container_width=True, hide_index=True)
 
@@ -3364,24 +4139,18 @@ elif page == "📸 Workout Card":
     st.markdown("## 📸 Workout Card")
     st.caption("Genera una tarjeta PNG compartible de cualquier sesión.")
 
-    sessions = (
-        df.drop_duplicates("hevy_id")
-        .sort_values("date", ascending=False)[["date", "hevy_id", "day_name"]]
-        .head(20)
-    )
+    sessions = _recent_sessions(df, "day_name")
     if sessions.empty:
         st.info("Sin sesiones disponibles.")
     else:
-        options = {
-            f"{row['date'].strftime('%d/%m')} — {row['day_name']}": row["hevy_id"]
-            for _, row in sessions.iterrows()
-        }
+        labels = _fmt_dates(sessions["date"], "%d/%m") + " — " + sessions["day_name"]
+        options = dict(zip(labels, sessions["hevy_id"]))
         selected = st.selectbox("Selecciona sesión", list(options.keys()))
         hid = options[selected]
 
-        card_data = build_card_data_bbd(df, hid, EXERCISE_DB)
+        card_data = _build_card_data_bbd(df, hid, EXERCISE_DB)
         if card_data:
-            qdf = workout_quality_bbd(df, DAY_CONFIG, EXERCISE_DB)
+            qdf = _workout_quality_bbd(df, DAY_CONFIG, EXERCISE_DB)
             if not qdf.empty:
                 q_row = qdf[qdf["hevy_id"] == hid]
                 if not q_row.empty:
@@ -3389,7 +4158,7 @@ elif page == "📸 Workout Card":
                     card_data["grade"] = q_row["grade"].iloc[0]
 
             try:
-                png_bytes = generate_workout_card(card_data, program="BBD")
+                png_bytes = _card_png(hid, "BBD", card_data)
                 st.image(png_bytes, use_container_width=True)
                 st.download_button(
                     "⬇️ Descargar PNG",
@@ -3408,21 +4177,21 @@ elif page == "🔍 Sustituciones":
     st.caption("Ejercicios en tus sesiones que no están en EXERCISE_DB. "
                "Posibles sustituciones que necesitan mapear.")
 
-    unknowns = detect_unknown_exercises(df, EXERCISE_DB, program_name="BBD")
+    unknowns = _detect_unknown_exercises(df, EXERCISE_DB, program_name="BBD")
     if unknowns.empty:
         st.success("✅ Todos los ejercicios están mapeados en EXERCISE_DB.")
     else:
         st.warning(f"⚠️ {len(unknowns)} ejercicio(s) desconocido(s) detectados")
-        for _, row in unknowns.iterrows():
-            with st.expander(f"**{row['hevy_name']}** — {row['session_count']} sesiones"):
+        for row in unknowns.itertuples(index=False):
+            with st.expander(f"**{row.hevy_name}** — {row.session_count} sesiones"):
                 c1, c2, c3 = st.columns(3)
-                c1.metric("Sesiones", row["session_count"])
-                c2.metric("Total sets", row["total_sets"])
-                c3.metric("Grupo muscular", row["suggested_muscle_group"])
-                st.code(f"Template ID: {row['template_id']}", language=None)
-                st.caption(f"Visto: {row['first_seen'].strftime('%d/%m')} → {row['last_seen'].strftime('%d/%m')}")
-                if row["appears_on"]:
-                    st.caption(f"Aparece en día(s): {row['appears_on']}")
+                c1.metric("Sesiones", row.session_count)
+                c2.metric("Total sets", row.total_sets)
+                c3.metric("Grupo muscular", row.suggested_muscle_group)
+                st.code(f"Template ID: {row.template_id}", language=None)
+                st.caption(f"Visto: {row.first_seen.strftime('%d/%m')} → {row.last_seen.strftime('%d/%m')}")
+                if row.appears_on:
+                    st.caption(f"Aparece en día(s): {row.appears_on}")
 
 # ── Footer ───────────────────────────────────────────────────────────
 st.sidebar.divider()
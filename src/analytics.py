@@ -153,7 +153,8 @@ def session_detail(df: pd.DataFrame, hevy_id: str = None) -> pd.DataFrame:
 # 2. PR TRACKING
 # ═══════════════════════════════════════════════════════════════════════
 
-def pr_table(df: pd.DataFrame) -> pd.DataFrame:
+def pr_table(df: pd.DataFrame, bodyweight: float = 86.0) -> pd.DataFrame:
+    """Best e1RM set per exercise, strongest first, with its ×bodyweight ratio."""
     if df.empty:
         return pd.DataFrame()
     weighted = df[df["e1rm"] > 0].copy()
@@ -162,6 +163,7 @@ def pr_table(df: pd.DataFrame) -> pd.DataFrame:
     idx = weighted.groupby("exercise")["e1rm"].idxmax()
     prs = weighted.loc[idx, ["exercise", "max_weight", "max_reps_at_max", "e1rm", "date", "day_name"]].copy()
     prs = prs.sort_values("e1rm", ascending=False).reset_index(drop=True)
+    prs["bw_ratio"] = (prs["e1rm"] / bodyweight).round(2)
     prs.index = prs.index + 1
     return prs
 
@@ -326,24 +328,26 @@ def intra_session_fatigue(df: pd.DataFrame) -> pd.DataFrame:
         mean_reps = np.mean(reps)
         cv = round(np.std(reps) / mean_reps * 100, 1) if mean_reps > 0 else 0
         if fatigue_pct <= 10:
-            pattern = "🟢 Estable"
+            pattern, pattern_code = "🟢 Estable", 0
         elif fatigue_pct <= 25:
-            pattern = "🟡 Moderada"
+            pattern, pattern_code = "🟡 Moderada", 1
         else:
-            pattern = "🔴 Alta"
+            pattern, pattern_code = "🔴 Alta", 2
         rows.append({
-            "date": row["date"], "week": row.get("week", 0),
+            "date": row["date"], "week": row.get("week", 0), "hevy_id": row.get("hevy_id"),
             "exercise": row["exercise"], "day_name": row["day_name"],
             "n_sets": len(reps), "reps_first": first_rep, "reps_last": last_rep,
             "reps_mean": round(mean_reps, 1), "fatigue_pct": fatigue_pct,
-            "cv_reps": cv, "pattern": pattern, "reps_list": reps,
+            "cv_reps": cv, "pattern": pattern, "pattern_code": pattern_code, "reps_list": reps,
             "weight": row["max_weight"],
         })
     return pd.DataFrame(rows)
 
 
-def fatigue_trend(df: pd.DataFrame) -> pd.DataFrame:
-    fatigue = intra_session_fatigue(df)
+def fatigue_trend(df: pd.DataFrame, fatigue: pd.DataFrame = None) -> pd.DataFrame:
+    """Weekly fatigue rollup. Pass a precomputed `intra_session_fatigue(df)` to skip the per-row scan."""
+    if fatigue is None:
+        fatigue = intra_session_fatigue(df)
     if fatigue.empty:
         return pd.DataFrame()
     trend = (
@@ -356,6 +360,21 @@ def fatigue_trend(df: pd.DataFrame) -> pd.DataFrame:
     return trend
 
 
+def weekly_rollups(df: pd.DataFrame) -> dict:
+    """
+    Shared week-level inputs for recovery, ACWR and mesocycle analytics.
+    Computes `weekly_breakdown` and the intra-session fatigue scan once so
+    callers can pass them to `recovery_indicators`, `acwr` and
+    `mesocycle_summary` instead of each re-grouping the raw sessions.
+    """
+    fatigue = intra_session_fatigue(df)
+    return {
+        "weekly": weekly_breakdown(df),
+        "fatigue": fatigue,
+        "trend": fatigue_trend(df, fatigue),
+    }
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # 6. TRAINING DENSITY & EFFICIENCY
 # ═══════════════════════════════════════════════════════════════════════
@@ -500,11 +519,13 @@ def strength_standards(df: pd.DataFrame, bodyweight: float = 86.0) -> pd.DataFra
 # 9. RECOVERY INDICATORS
 # ═══════════════════════════════════════════════════════════════════════
 
-def recovery_indicators(df: pd.DataFrame) -> pd.DataFrame:
-    weekly = weekly_breakdown(df)
+def recovery_indicators(df: pd.DataFrame, weekly: pd.DataFrame = None,
+                        trend: pd.DataFrame = None) -> pd.DataFrame:
+    """Weekly deload signals. `weekly`/`trend` accept precomputed rollups (see `weekly_rollups`)."""
+    weekly = weekly_breakdown(df) if weekly is None else weekly.copy()
     if weekly.empty:
         return pd.DataFrame()
-    fatigue = fatigue_trend(df)
+    fatigue = fatigue_trend(df) if trend is None else trend
     if not fatigue.empty:
         weekly = weekly.merge(
             fatigue[["week", "avg_fatigue", "max_fatigue", "fatigue_delta"]],
@@ -775,6 +796,9 @@ def gamification_status(df: pd.DataFrame, bodyweight: float = 86.0) -> dict:
 # 11. PLATEAU DETECTION — Phase 1
 # ═══════════════════════════════════════════════════════════════════════
 
+PLATEAU_STATUSES = ["Estancado", "Vigilar", "Subiendo", "Estable"]
+
+
 def plateau_detection(df: pd.DataFrame, stale_weeks: int = 3) -> pd.DataFrame:
     """
     Detect exercises where e1RM has not improved in `stale_weeks` or more.
@@ -817,13 +841,13 @@ def plateau_detection(df: pd.DataFrame, stale_weeks: int = 3) -> pd.DataFrame:
 
         # Classification
         if weeks_since_pr >= stale_weeks and slope < 0.5:
-            status = "🔴 Estancado"
+            status, status_cat = "🔴 Estancado", "Estancado"
         elif weeks_since_pr >= 2 and slope < 0.5:
-            status = "🟡 Vigilar"
+            status, status_cat = "🟡 Vigilar", "Vigilar"
         elif slope > 1.0:
-            status = "🟢 Subiendo"
+            status, status_cat = "🟢 Subiendo", "Subiendo"
         else:
-            status = "🟢 Estable"
+            status, status_cat = "🟢 Estable", "Estable"
 
         # Last week vs PR
         last_week_best = weekly_best.iloc[-1]["e1rm"]
@@ -839,10 +863,12 @@ def plateau_detection(df: pd.DataFrame, stale_weeks: int = 3) -> pd.DataFrame:
             "trend_slope": round(slope, 2),
             "weeks_tracked": weeks_present,
             "status": status,
+            "status_cat": status_cat,
         })
 
     result = pd.DataFrame(rows)
     if not result.empty:
+        result["status_cat"] = pd.Categorical(result["status_cat"], categories=PLATEAU_STATUSES)
         result = result.sort_values("weeks_since_pr", ascending=False).reset_index(drop=True)
     return result
 
@@ -851,14 +877,16 @@ def plateau_detection(df: pd.DataFrame, stale_weeks: int = 3) -> pd.DataFrame:
 # 12. ACWR — Acute:Chronic Workload Ratio — Phase 1
 # ═══════════════════════════════════════════════════════════════════════
 
-def acwr(df: pd.DataFrame, acute_weeks: int = 1, chronic_weeks: int = 4) -> pd.DataFrame:
+def acwr(df: pd.DataFrame, acute_weeks: int = 1, chronic_weeks: int = 4,
+         weekly: pd.DataFrame = None) -> pd.DataFrame:
     """
     Acute:Chronic Workload Ratio per week.
     Acute = last `acute_weeks` volume. Chronic = rolling avg of last `chronic_weeks`.
     Safe zone: 0.8 – 1.3. Warning: 1.3 – 1.5. Risk: >1.5 or <0.8.
     Requires at least `chronic_weeks` of data to compute.
+    `weekly` accepts a precomputed `weekly_breakdown(df)`.
     """
-    wk = weekly_breakdown(df)
+    wk = weekly_breakdown(df) if weekly is None else weekly
     if wk.empty or len(wk) < 2:
         return pd.DataFrame()
 
@@ -904,21 +932,23 @@ def calc_mesocycle(week: int) -> int:
     return max(1, ((week - 1) // 4) + 1)
 
 
-def mesocycle_summary(df: pd.DataFrame) -> pd.DataFrame:
+def mesocycle_summary(df: pd.DataFrame, weekly: pd.DataFrame = None,
+                      trend: pd.DataFrame = None) -> pd.DataFrame:
     """
     Group training into 4-week mesocycle blocks.
     Compare volume, intensity, fatigue, and sessions across mesocycles.
+    `weekly`/`trend` accept precomputed rollups (see `weekly_rollups`).
     """
     if df.empty:
         return pd.DataFrame()
 
-    wk = weekly_breakdown(df)
+    wk = weekly_breakdown(df) if weekly is None else weekly
     if wk.empty:
         return pd.DataFrame()
 
-    wk["mesocycle"] = wk["week"].apply(calc_mesocycle)
+    wk = wk.assign(mesocycle=wk["week"].apply(calc_mesocycle))
 
-    fatigue_data = fatigue_trend(df)
+    fatigue_data = fatigue_trend(df) if trend is None else trend
 
     meso = wk.groupby("mesocycle").agg(
         weeks=("week", "nunique"),
@@ -939,7 +969,7 @@ def mesocycle_summary(df: pd.DataFrame) -> pd.DataFrame:
 
     # Merge fatigue if available
     if not fatigue_data.empty:
-        fatigue_data["mesocycle"] = fatigue_data["week"].apply(calc_mesocycle)
+        fatigue_data = fatigue_data.assign(mesocycle=fatigue_data["week"].apply(calc_mesocycle))
         meso_fatigue = fatigue_data.groupby("mesocycle").agg(
             avg_fatigue=("avg_fatigue", "mean"),
         ).reset_index().round(1)
@@ -76,6 +76,12 @@ def fetch_bbb_workouts() -> list[dict]:
     return [w for w in all_wk if is_bbb_workout(w)]
 
 
+def fetch_latest_bbb_workout() -> dict | None:
+    """Fetch only the most recent BBB workout from Hevy API."""
+    from src.hevy_client import fetch_latest_workout
+    return fetch_latest_workout(is_bbb_workout)
+
+
 def classify_sets(exercise: dict, all_exercises: list[dict]) -> str:
     """
     Classify an exercise within a BBB workout as:
@@ -557,7 +563,7 @@ def bbb_compliance(df: pd.DataFrame) -> pd.DataFrame:
     if bbb.empty:
         return pd.DataFrame()
 
-    grouped = bbb.groupby(["date", "hevy_id", "lift"]).agg(
+    grouped = bbb.groupby(["date", "hevy_id", "lift"], observed=True).agg(
         weight_kg=("weight_kg", "first"),  # Should be constant
         n_sets=("reps", "count"),
         total_reps=("reps", "sum"),
@@ -594,7 +600,7 @@ def fsl_compliance(df: pd.DataFrame) -> pd.DataFrame:
     if fsl.empty:
         return pd.DataFrame()
 
-    grouped = fsl.groupby(["date", "hevy_id", "lift"]).agg(
+    grouped = fsl.groupby(["date", "hevy_id", "lift"], observed=True).agg(
         weight_kg=("weight_kg", "first"),
         n_sets=("reps", "count"),
         total_reps=("reps", "sum"),
@@ -625,7 +631,7 @@ def accessory_volume(df: pd.DataFrame) -> pd.DataFrame:
     if acc.empty:
         return pd.DataFrame()
 
-    grouped = acc.groupby(["date", "muscle_group"]).agg(
+    grouped = acc.groupby(["date", "muscle_group"], observed=True).agg(
         n_sets=("reps", "count"),
         total_reps=("reps", "sum"),
         total_volume=("volume_kg", "sum"),
@@ -640,7 +646,7 @@ def accessory_summary(df: pd.DataFrame) -> pd.DataFrame:
     if acc.empty:
         return pd.DataFrame()
 
-    grouped = acc.groupby(["muscle_group"]).agg(
+    grouped = acc.groupby(["muscle_group"], observed=True).agg(
         exercises=("exercise", "nunique"),
         total_sets=("reps", "count"),
         total_reps=("reps", "sum"),
@@ -662,7 +668,7 @@ def tm_progression(df: pd.DataFrame) -> pd.DataFrame:
         return pd.DataFrame()
 
     # Group by cycle and lift, take the AMRAP from each
-    result = amraps.groupby(["cycle_num", "lift"]).agg(
+    result = amraps.groupby(["cycle_num", "lift"], observed=True).agg(
         date=("date", "last"),
         amrap_weight=("weight_kg", "last"),
         amrap_reps=("reps", "last"),
@@ -746,14 +752,16 @@ def strength_level_531(df: pd.DataFrame) -> dict:
 
     Returns dict: {lift: {e1rm, ratio_bw, level}}.
     """
+    # One AMRAP scan for all lifts rather than a full-frame mask per lift
+    best = df.loc[df["set_type"] == "amrap"].groupby("lift", observed=True)["e1rm"].max()
+
     result = {}
     for lift_name, standards in STRENGTH_STANDARDS_531.items():
-        amraps = df[(df["set_type"] == "amrap") & (df["lift"] == lift_name)]
-        if amraps.empty:
+        if lift_name not in best.index:
             result[lift_name] = {"e1rm": None, "ratio_bw": None, "level": "Sin datos"}
             continue
 
-        best_e1rm = amraps["e1rm"].max()
+        best_e1rm = best[lift_name]
         ratio = best_e1rm / BODYWEIGHT
 
         if ratio >= standards["elite"]:
@@ -782,7 +790,7 @@ def joker_sets_summary(df: pd.DataFrame) -> pd.DataFrame:
     if jokers.empty:
         return pd.DataFrame()
 
-    result = jokers.groupby(["date", "hevy_id", "lift"]).agg(
+    result = jokers.groupby(["date", "hevy_id", "lift"], observed=True).agg(
         weight_kg=("weight_kg", "max"),
         total_sets=("reps", "count"),
         best_reps=("reps", "max"),
@@ -866,7 +874,7 @@ def cycle_comparison(df: pd.DataFrame) -> pd.DataFrame:
         return pd.DataFrame()
 
     # AMRAP metrics per cycle per lift
-    amrap_agg = amraps.groupby(["cycle_num", "lift"]).agg(
+    amrap_agg = amraps.groupby(["cycle_num", "lift"], observed=True).agg(
         amrap_avg_reps=("reps", "mean"),
         amrap_best_e1rm=("e1rm", "max"),
         amrap_avg_e1rm=("e1rm", "mean"),
@@ -878,7 +886,7 @@ def cycle_comparison(df: pd.DataFrame) -> pd.DataFrame:
 
     # BBB volume per cycle per lift
     if not bbb.empty:
-        bbb_agg = bbb.groupby(["cycle_num", "lift"]).agg(
+        bbb_agg = bbb.groupby(["cycle_num", "lift"], observed=True).agg(
             bbb_total_volume=("volume_kg", "sum"),
             bbb_sets=("reps", "count"),
         ).reset_index()
@@ -888,13 +896,13 @@ def cycle_comparison(df: pd.DataFrame) -> pd.DataFrame:
         result["bbb_total_volume"] = 0
         result["bbb_sets"] = 0
 
-    result = result.fillna(0)
+    result = result.fillna({"bbb_total_volume": 0, "bbb_sets": 0})
 
     # Add deltas vs previous cycle
     result = result.sort_values(["lift", "cycle_num"])
-    result["e1rm_delta"] = result.groupby("lift")["amrap_best_e1rm"].diff()
+    result["e1rm_delta"] = result.groupby("lift", observed=True)["amrap_best_e1rm"].diff()
     result["e1rm_delta_pct"] = (
-        result.groupby("lift")["amrap_best_e1rm"]
+        result.groupby("lift", observed=True)["amrap_best_e1rm"]
         .pct_change() * 100
     ).round(1)
 
@@ -910,7 +918,7 @@ def weekly_volume_531(df: pd.DataFrame) -> pd.DataFrame:
     # ISO week
     df_c["week_start"] = df_c["date"].dt.to_period("W").apply(lambda p: p.start_time)
 
-    grouped = df_c.groupby(["week_start", "set_type"]).agg(
+    grouped = df_c.groupby(["week_start", "set_type"], observed=True).agg(
         total_sets=("reps", "count"),
         total_reps=("reps", "sum"),
         total_volume=("volume_kg", "sum"),
@@ -924,7 +932,7 @@ def muscle_volume_531(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return pd.DataFrame()
 
-    grouped = df.groupby("muscle_group").agg(
+    grouped = df.groupby("muscle_group", observed=True).agg(
         total_sets=("reps", "count"),
         total_reps=("reps", "sum"),
         total_volume=("volume_kg", "sum"),
@@ -1849,15 +1857,21 @@ def attach_calendar_dates(calendar: list[dict]) -> tuple[list[dict], dict]:
     return calendar, pace_info
 
 
-def build_annual_calendar(df: pd.DataFrame, year: int = 2026) -> dict:
+def build_annual_calendar(
+    df: pd.DataFrame, year: int = 2026, calendar: list[dict] | None = None,
+) -> dict:
     """
     Build annual calendar grid ready for visualization.
 
+    Args:
+        calendar: Precomputed ``training_calendar(df, weeks_ahead=52)``, so
+            callers that also need the raw weeks build them only once.
+
     Returns grid data structure for both Streamlit and Notion.
     """
     from src.config_531 import CYCLE_WEEKS
 
-    cal = training_calendar(df, weeks_ahead=52)
+    cal = calendar if calendar is not None else training_calendar(df, weeks_ahead=52)
 
     # Color mapping
     type_colors = {
@@ -1921,13 +1935,13 @@ def build_enriched_annual_calendar(df: pd.DataFrame, year: int = 2026) -> dict:
         MAIN_WORK_MODES, expected_weights, TRAINING_MAX,
     )
 
-    base = build_annual_calendar(df, year=year)
+    raw_cal = training_calendar(df, weeks_ahead=52)
+    base = build_annual_calendar(df, year=year, calendar=raw_cal)
     if not base["weeks"]:
         return base
 
     # Merge session data from training_calendar (build_annual_calendar strips it)
     # and attach real calendar dates based on actual session pace
-    raw_cal = training_calendar(df, weeks_ahead=52)
     raw_cal, pace_info = attach_calendar_dates(raw_cal)
     sessions_by_week = {w["abs_week"]: w for w in raw_cal}
     for w in base["weeks"]:
@@ -2139,6 +2153,11 @@ def get_kanban_data(df: pd.DataFrame) -> dict:
 # PHASE 4: 531-NATIVE INTELLIGENCE
 # ═════════════════════════════════════════════════════════════════════
 
+def _nan_to_none(s: pd.Series) -> pd.Series:
+    """Object series with None where ``s`` is missing (first row of a delta)."""
+    return s.astype(object).where(s.notna(), None)
+
+
 def amrap_performance_index(df: pd.DataFrame) -> pd.DataFrame:
     """
     Compare AMRAP reps at the same %TM across mini-cycles.
@@ -2166,41 +2185,30 @@ def amrap_performance_index(df: pd.DataFrame) -> pd.DataFrame:
     grouped = (
         amraps.sort_values("e1rm", ascending=False)
         .drop_duplicates(subset=["date", "lift"])
-        .sort_values("date")
+        .sort_values(["lift", "week_type", "date"])
+        .reset_index(drop=True)
     )
 
-    # Build comparison rows
-    rows = []
-    for (lift, wtype), grp in grouped.groupby(["lift", "week_type"]):
-        grp = grp.sort_values("date").reset_index(drop=True)
-        for i, row in grp.iterrows():
-            entry = {
-                "lift": lift,
-                "week_type": wtype,
-                "week_label": week_labels.get(wtype, "?"),
-                "date": row["date"],
-                "mini_cycle": row.get("mini_cycle"),
-                "macro_num": row.get("macro_num", 1),
-                "weight_kg": row["weight_kg"],
-                "reps": row["reps"],
-                "e1rm": row["e1rm"],
-                "pct_of_tm": row.get("pct_of_tm"),
-                "effective_tm": row.get("effective_tm"),
-            }
-            # Deltas vs previous same week_type
-            if i > 0:
-                prev = grp.iloc[i - 1]
-                entry["reps_delta"] = row["reps"] - prev["reps"]
-                entry["e1rm_delta"] = round(row["e1rm"] - prev["e1rm"], 1)
-                entry["weight_delta"] = row["weight_kg"] - prev["weight_kg"]
-            else:
-                entry["reps_delta"] = None
-                entry["e1rm_delta"] = None
-                entry["weight_delta"] = None
-            rows.append(entry)
-
-    result = pd.DataFrame(rows)
-    return result.sort_values(["lift", "week_type", "date"]).reset_index(drop=True)
+    # Deltas vs the previous occurrence of the same (lift, week_type)
+    by_week = grouped.groupby(["lift", "week_type"], observed=True)
+
+    result = pd.DataFrame({
+        "lift": grouped["lift"],
+        "week_type": grouped["week_type"],
+        "week_label": grouped["week_type"].map(week_labels).fillna("?"),
+        "date": grouped["date"],
+        "mini_cycle": grouped.get("mini_cycle"),
+        "macro_num": grouped["macro_num"] if "macro_num" in grouped else 1,
+        "weight_kg": grouped["weight_kg"],
+        "reps": grouped["reps"],
+        "e1rm": grouped["e1rm"],
+        "pct_of_tm": grouped.get("pct_of_tm"),
+        "effective_tm": grouped.get("effective_tm"),
+        "reps_delta": _nan_to_none(by_week["reps"].diff()),
+        "e1rm_delta": _nan_to_none(by_week["e1rm"].diff().round(1)),
+        "weight_delta": _nan_to_none(by_week["weight_kg"].diff()),
+    })
+    return result
 
 
 def tm_sustainability(df: pd.DataFrame) -> dict:
@@ -2368,54 +2376,53 @@ def bbb_fatigue_trend(df: pd.DataFrame) -> pd.DataFrame:
     if bbb.empty:
         return pd.DataFrame()
 
-    rows = []
-    for (hevy_id, lift), grp in bbb.groupby(["hevy_id", "lift"]):
-        grp = grp.sort_values("set_number")
-        reps_list = grp["reps"].tolist()
-        n_sets = len(reps_list)
-        if n_sets == 0:
-            continue
-
-        avg_reps = sum(reps_list) / n_sets
-        first_half = reps_list[:n_sets // 2] if n_sets >= 4 else reps_list[:1]
-        second_half = reps_list[n_sets // 2:] if n_sets >= 4 else reps_list[1:]
-
-        avg_first = sum(first_half) / len(first_half) if first_half else 0
-        avg_second = sum(second_half) / len(second_half) if second_half else 0
-        rep_dropoff = round(avg_first - avg_second, 1)
-
-        # % of TM
-        tm = grp["effective_tm"].iloc[0] if "effective_tm" in grp.columns else None
-        pct_tm = round(grp["weight_kg"].iloc[0] / tm * 100, 1) if tm and tm > 0 else None
-
-        rows.append({
-            "date": grp["date"].iloc[0],
-            "lift": lift,
-            "hevy_id": hevy_id,
-            "weight_kg": grp["weight_kg"].iloc[0],
-            "n_sets": n_sets,
-            "reps_list": reps_list,
-            "avg_reps": round(avg_reps, 1),
-            "rep_dropoff": rep_dropoff,
-            "min_reps": min(reps_list),
-            "all_tens": all(r >= 10 for r in reps_list),
-            "pct_of_tm": pct_tm,
-            "macro_num": grp["macro_num"].iloc[0] if "macro_num" in grp.columns else None,
-        })
-
-    result = pd.DataFrame(rows).sort_values("date").reset_index(drop=True)
+    keys = ["hevy_id", "lift"]
+    bbb = bbb.sort_values(keys + ["set_number"], kind="stable")
+    by_set = bbb.groupby(keys, sort=True, observed=True)
+
+    # First vs second half of the sets (first set vs the rest when < 4 sets)
+    pos = by_set.cumcount().to_numpy()
+    n = by_set["reps"].transform("size").to_numpy()
+    in_first = pos < np.where(n >= 4, n // 2, 1)
+    reps = bbb["reps"].to_numpy(dtype=float)
+    halves = pd.DataFrame({
+        "hevy_id": bbb["hevy_id"].to_numpy(),
+        "lift": bbb["lift"].to_numpy(),
+        "first": np.where(in_first, reps, np.nan),
+        "second": np.where(in_first, np.nan, reps),
+    }).groupby(keys, sort=True)[["first", "second"]].mean().fillna(0)
+
+    first_rows = by_set.head(1).set_index(keys)
+    stats = by_set["reps"].agg(["size", "mean", "min", list])
+    stats["all_tens"] = by_set["reps"].min() >= 10
+
+    tm = first_rows["effective_tm"] if "effective_tm" in first_rows else pd.Series(np.nan, index=first_rows.index)
+    pct_tm = (first_rows["weight_kg"] / tm * 100).round(1).where(tm > 0)
+
+    result = pd.DataFrame({
+        "date": first_rows["date"],
+        "lift": first_rows.index.get_level_values("lift"),
+        "hevy_id": first_rows.index.get_level_values("hevy_id"),
+        "weight_kg": first_rows["weight_kg"],
+        "n_sets": stats["size"],
+        "reps_list": stats["list"],
+        "reps_str": [", ".join(map(str, r)) for r in stats["list"]],
+        "avg_reps": stats["mean"].round(1),
+        "rep_dropoff": (halves["first"] - halves["second"]).round(1),
+        "min_reps": stats["min"],
+        "all_tens": stats["all_tens"],
+        "pct_of_tm": pct_tm,
+        "macro_num": first_rows["macro_num"] if "macro_num" in first_rows else None,
+    })
+    result = result.sort_values("date").reset_index(drop=True)
 
     # Overall fatigue classification per session
-    def _classify(row):
-        if row["all_tens"]:
-            return "🟢 Sin fatiga"
-        elif row["rep_dropoff"] <= 1:
-            return "🟡 Fatiga leve"
-        else:
-            return "🔴 Fatiga alta"
-
     if not result.empty:
-        result["fatigue_status"] = result.apply(_classify, axis=1)
+        result["fatigue_status"] = np.select(
+            [result["all_tens"], result["rep_dropoff"] <= 1],
+            ["🟢 Sin fatiga", "🟡 Fatiga leve"],
+            default="🔴 Fatiga alta",
+        )
 
     return result
 
@@ -2434,47 +2441,33 @@ def true_1rm_trend(df: pd.DataFrame) -> pd.DataFrame:
     if amraps.empty:
         return pd.DataFrame()
 
-    # One best AMRAP per lift per session
+    # One best AMRAP per lift per session, in (lift, date) order
     best = (
         amraps.sort_values("e1rm", ascending=False)
         .drop_duplicates(subset=["date", "lift"])
-        .sort_values("date")
+        .sort_values(["lift", "date"])
+        .reset_index(drop=True)
     )
-
-    rows = []
-    for lift in best["lift"].unique():
-        lift_data = best[best["lift"] == lift].sort_values("date").reset_index(drop=True)
-        for i, row in lift_data.iterrows():
-            entry = {
-                "date": row["date"],
-                "lift": lift,
-                "weight_kg": row["weight_kg"],
-                "reps": row["reps"],
-                "estimated_1rm": round(row["e1rm"], 1),
-                "effective_tm": row.get("effective_tm"),
-                "macro_num": row.get("macro_num", 1),
-            }
-            # TM as % of estimated 1RM
-            if entry["effective_tm"] and entry["estimated_1rm"] > 0:
-                entry["tm_as_pct_of_1rm"] = round(
-                    entry["effective_tm"] / entry["estimated_1rm"] * 100, 1
-                )
-            else:
-                entry["tm_as_pct_of_1rm"] = None
-
-            # Delta vs previous
-            if i > 0:
-                prev = lift_data.iloc[i - 1]
-                entry["e1rm_delta"] = round(row["e1rm"] - prev["e1rm"], 1)
-            else:
-                entry["e1rm_delta"] = None
-
-            rows.append(entry)
-
-    result = pd.DataFrame(rows)
+    estimated = best["e1rm"].round(1)
+    tm = best["effective_tm"] if "effective_tm" in best else pd.Series(None, index=best.index, dtype=object)
+    tm_pct = (tm.astype(float) / estimated * 100).round(1)
+
+    result = pd.DataFrame({
+        "date": best["date"],
+        "lift": best["lift"],
+        "weight_kg": best["weight_kg"],
+        "reps": best["reps"],
+        "estimated_1rm": estimated,
+        "effective_tm": tm,
+        "macro_num": best["macro_num"] if "macro_num" in best else 1,
+        # TM as % of estimated 1RM
+        "tm_as_pct_of_1rm": _nan_to_none(tm_pct.where((tm.fillna(0) != 0) & (estimated > 0))),
+        # Delta vs previous
+        "e1rm_delta": _nan_to_none(best.groupby("lift", observed=True)["e1rm"].diff().round(1)),
+    })
 
     # Running max (all-time best) per lift
     if not result.empty:
-        result["running_max"] = result.groupby("lift")["estimated_1rm"].cummax()
+        result["running_max"] = result.groupby("lift", observed=True)["estimated_1rm"].cummax()
 
     return result.sort_values(["lift", "date"]).reset_index(drop=True)
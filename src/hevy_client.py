@@ -99,6 +99,25 @@ def fetch_all_workouts(since: str = None) -> list[dict]:
     return all_workouts
 
 
+def fetch_latest_workout(match) -> dict | None:
+    """
+    Newest workout for which ``match(workout)`` is true, or None.
+
+    Hevy returns newest first, so this usually stops after the first page
+    instead of paginating the whole history like fetch_all_workouts.
+    """
+    page = 1
+    while True:
+        data = _get("/workouts", {"page": page, "pageSize": 10})
+        wks = data.get("workouts", [])
+        for w in wks:
+            if match(w):
+                return w
+        if not wks or page >= data.get("page_count", 1):
+            return None
+        page += 1
+
+
 def fetch_bbd_workouts() -> list[dict]:
     """Fetch only BBD workouts (filtered)."""
     all_wk = fetch_all_workouts()
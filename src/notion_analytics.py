@@ -272,7 +272,7 @@ def build_analytics_blocks(df: pd.DataFrame) -> list[dict]:
             medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else str(i)
             weight_str = f"{p['max_weight']:.0f} kg" if p["max_weight"] > 0 else "BW"
             e1rm_str = f"{p['e1rm']:.1f}" if p["e1rm"] > 0 else "—"
-            bw_ratio = f"{p['e1rm']/86:.2f}×" if p["e1rm"] > 0 else "—"
+            bw_ratio = f"{p['bw_ratio']:.2f}×" if p["e1rm"] > 0 else "—"
             rows.append([
                 medal, p["exercise"], weight_str,
                 str(int(p["max_reps_at_max"])), e1rm_str, bw_ratio,
@@ -17,6 +17,28 @@ import pandas as pd
 # 1. AUTO-DETECT EXERCISE SUBSTITUTIONS
 # ═════════════════════════════════════════════════════════════════════
 
+def _guess_muscle_group(hevy_name: str) -> str:
+    """Guess a muscle group from Spanish/English name patterns."""
+    name_lower = hevy_name.lower()
+    if any(w in name_lower for w in ["curl", "bícep", "bicep"]):
+        return "Bíceps"
+    if any(w in name_lower for w in ["trícep", "tricep", "skull", "press francés"]):
+        return "Tríceps"
+    if any(w in name_lower for w in ["press", "bench", "banca", "pecho"]):
+        return "Pecho"
+    if any(w in name_lower for w in ["sentadilla", "squat", "pierna", "leg", "lunge"]):
+        return "Piernas"
+    if any(w in name_lower for w in ["pull", "row", "remo", "jalón", "lat"]):
+        return "Espalda"
+    if any(w in name_lower for w in ["hombro", "shoulder", "lateral", "ohp"]):
+        return "Hombros"
+    if any(w in name_lower for w in ["dead", "muerto", "trap", "shrug"]):
+        return "Espalda Baja"
+    if any(w in name_lower for w in ["abdom", "core", "plank"]):
+        return "Core"
+    return "?"
+
+
 def detect_unknown_exercises(
     df: pd.DataFrame,
     known_db: dict,
@@ -37,63 +59,32 @@ def detect_unknown_exercises(
     if df.empty or "exercise_template_id" not in df.columns:
         return pd.DataFrame()
 
-    known_ids = set(known_db.keys())
-    all_ids = set(df["exercise_template_id"].unique())
-    unknown_ids = all_ids - known_ids - {""}  # exclude empty
-
-    if not unknown_ids:
+    tids = df["exercise_template_id"]
+    unknown = df[~tids.isin(list(known_db)) & tids.notna() & (tids != "")]  # exclude empty
+    if unknown.empty:
         return pd.DataFrame()
 
-    rows = []
-    for tid in unknown_ids:
-        ex_data = df[df["exercise_template_id"] == tid]
+    # One groupby pass over the unknown rows instead of a full-frame filter per template
+    by_tid = unknown.groupby("exercise_template_id", observed=True)
+    result = by_tid.agg(first_seen=("date", "min"), last_seen=("date", "max"))
+    # Hevy exercise name (may be in Spanish)
+    result["hevy_name"] = by_tid["exercise"].first() if "exercise" in unknown.columns else "?"
+    result["session_count"] = by_tid["hevy_id"].nunique() if "hevy_id" in unknown.columns else by_tid.size()
+    result["total_sets"] = by_tid.size()
 
-        # Get Hevy exercise name (may be in Spanish)
-        hevy_name = ex_data["exercise"].iloc[0] if "exercise" in ex_data.columns else "?"
+    # Context: which days does it appear on?
+    day_col = "day_num" if "day_num" in unknown.columns else "lift" if "lift" in unknown.columns else None
+    days = {tid: sorted(s.dropna().unique().tolist()) for tid, s in by_tid[day_col]} if day_col else {}
+    result["appears_on"] = [days.get(tid, []) for tid in result.index]
 
-        # Context: which days does it appear on?
-        if "day_num" in ex_data.columns:
-            days = sorted(ex_data["day_num"].dropna().unique().tolist())
-        elif "lift" in ex_data.columns:
-            days = sorted(ex_data["lift"].dropna().unique().tolist())
-        else:
-            days = []
-
-        # Try to guess muscle group from name patterns
-        name_lower = hevy_name.lower()
-        if any(w in name_lower for w in ["curl", "bícep", "bicep"]):
-            guess_mg = "Bíceps"
-        elif any(w in name_lower for w in ["trícep", "tricep", "skull", "press francés"]):
-            guess_mg = "Tríceps"
-        elif any(w in name_lower for w in ["press", "bench", "banca", "pecho"]):
-            guess_mg = "Pecho"
-        elif any(w in name_lower for w in ["sentadilla", "squat", "pierna", "leg", "lunge"]):
-            guess_mg = "Piernas"
-        elif any(w in name_lower for w in ["pull", "row", "remo", "jalón", "lat"]):
-            guess_mg = "Espalda"
-        elif any(w in name_lower for w in ["hombro", "shoulder", "lateral", "ohp"]):
-            guess_mg = "Hombros"
-        elif any(w in name_lower for w in ["dead", "muerto", "trap", "shrug"]):
-            guess_mg = "Espalda Baja"
-        elif any(w in name_lower for w in ["abdom", "core", "plank"]):
-            guess_mg = "Core"
-        else:
-            guess_mg = "?"
+    result["suggested_muscle_group"] = result["hevy_name"].map(_guess_muscle_group)
+    result["program"] = program_name
 
-        rows.append({
-            "template_id": tid,
-            "hevy_name": hevy_name,
-            "program": program_name,
-            "first_seen": ex_data["date"].min(),
-            "last_seen": ex_data["date"].max(),
-            "session_count": ex_data["hevy_id"].nunique() if "hevy_id" in ex_data.columns else len(ex_data),
-            "total_sets": len(ex_data),
-            "appears_on": days,
-            "suggested_muscle_group": guess_mg,
-        })
-
-    result = pd.DataFrame(rows).sort_values("session_count", ascending=False).reset_index(drop=True)
-    return result
+    result = result.rename_axis("template_id").reset_index()[[
+        "template_id", "hevy_name", "program", "first_seen", "last_seen",
+        "session_count", "total_sets", "appears_on", "suggested_muscle_group",
+    ]]
+    return result.sort_values("session_count", ascending=False).reset_index(drop=True)
 
 
 # ═════════════════════════════════════════════════════════════════════
@@ -225,6 +216,12 @@ def workout_quality_bbd(df: pd.DataFrame, day_config: dict, exercise_db: dict) -
     # Best e1RM per exercise (running)
     running_best = {}
 
+    # Exercise-DB lookups are session-independent: resolve them once
+    key_ids = {tid for tid, e in exercise_db.items() if e.get("is_key_lift")}
+    planned_by_day = {}
+    for tid, e in exercise_db.items():
+        planned_by_day.setdefault(e.get("day"), set()).add(tid)
+
     rows = []
     for hid, grp in df.sort_values("date").groupby("hevy_id", sort=False):
         date = grp["date"].iloc[0]
@@ -232,7 +229,6 @@ def workout_quality_bbd(df: pd.DataFrame, day_config: dict, exercise_db: dict) -
         day_cfg = day_config.get(day_num, {}) if day_num else {}
 
         # ── Key Lift Performance (0-35) ──
-        key_ids = {tid for tid, e in exercise_db.items() if e.get("is_key_lift")}
         key_rows = grp[grp["exercise_template_id"].isin(key_ids)]
         if not key_rows.empty:
             best_e1rm = key_rows["e1rm"].max()
@@ -249,9 +245,8 @@ def workout_quality_bbd(df: pd.DataFrame, day_config: dict, exercise_db: dict) -
             else:
                 lift_score = 5
             # Update running best
-            for _, kr in key_rows.iterrows():
-                eid = kr["exercise_template_id"]
-                running_best[eid] = max(running_best.get(eid, 0), kr["e1rm"])
+            for eid, e1rm in key_rows.groupby("exercise_template_id", observed=True)["e1rm"].max().items():
+                running_best[eid] = max(running_best.get(eid, 0), e1rm)
         else:
             lift_score = 10
 
@@ -271,7 +266,7 @@ def workout_quality_bbd(df: pd.DataFrame, day_config: dict, exercise_db: dict) -
 
         # ── Exercise Coverage (0-25) ──
         if day_num:
-            planned_ids = {tid for tid, e in exercise_db.items() if e.get("day") == day_num}
+            planned_ids = planned_by_day.get(day_num, set())
             done_ids = set(grp["exercise_template_id"].unique())
             if planned_ids:
                 coverage = len(done_ids & planned_ids) / len(planned_ids)
@@ -206,6 +206,89 @@ class TestPrDetection:
         assert result["is_pr"].iloc[0] == True  # First OHP ever = PR
 
 
+class TestPrTable:
+    """Best e1RM per exercise."""
+
+    def test_bw_ratio_uses_bodyweight(self):
+        from src.analytics import pr_table
+        df = _make_bbd_df([
+            {"exercise": "Deadlift", "e1rm": 160.0},
+            {"exercise": "Deadlift", "e1rm": 150.0},
+            {"exercise": "OHP", "e1rm": 60.0},
+        ])
+        result = pr_table(df, bodyweight=80.0)
+        assert result["exercise"].tolist() == ["Deadlift", "OHP"]
+        assert result["bw_ratio"].tolist() == [2.0, 0.75]
+
+
+class TestIntraSessionFatigue:
+    """Rep dropoff classification within a single exercise."""
+
+    def test_pattern_code_matches_pattern(self):
+        from src.analytics import intra_session_fatigue
+        df = _make_bbd_df([
+            {"exercise": "Stable", "reps_list": [10, 10, 10]},
+            {"exercise": "Moderate", "reps_list": [10, 9, 8]},
+            {"exercise": "High", "reps_list": [10, 8, 6]},
+        ])
+        result = intra_session_fatigue(df).set_index("exercise")
+        assert result.loc["Stable", "pattern"] == "🟢 Estable"
+        assert result["pattern_code"].to_dict() == {"Stable": 0, "Moderate": 1, "High": 2}
+
+    def test_rows_carry_session_id(self):
+        from src.analytics import intra_session_fatigue
+        df = _make_bbd_df([
+            {"hevy_id": "s1", "exercise": "Deadlift", "reps_list": [6, 6, 5]},
+            {"hevy_id": "s2", "exercise": "Deadlift", "reps_list": [6, 5, 4]},
+            {"hevy_id": "s2", "exercise": "Short", "reps_list": [6, 5]},
+        ])
+        result = intra_session_fatigue(df)
+        assert result["hevy_id"].tolist() == ["s1", "s2"]
+
+
+class TestPlateauDetection:
+    """Plateau status per exercise from weekly best e1RM."""
+
+    def test_status_cat_counts_every_status(self):
+        from src.analytics import plateau_detection
+        df = _make_bbd_df([
+            {"date": "2026-02-12", "week": 1, "exercise": "Deadlift", "e1rm": 150},
+            {"date": "2026-02-19", "week": 2, "exercise": "Deadlift", "e1rm": 140},
+            {"date": "2026-02-26", "week": 3, "exercise": "Deadlift", "e1rm": 140},
+            {"date": "2026-03-05", "week": 4, "exercise": "Deadlift", "e1rm": 140},
+            {"date": "2026-02-12", "week": 1, "exercise": "OHP", "e1rm": 50},
+            {"date": "2026-03-05", "week": 4, "exercise": "OHP", "e1rm": 60},
+        ])
+        result = plateau_detection(df).set_index("exercise")
+        assert result.loc["Deadlift", "status_cat"] == "Estancado"
+        assert result.loc["OHP", "status_cat"] == "Subiendo"
+        counts = result["status_cat"].value_counts()
+        assert counts["Vigilar"] == 0 and counts["Estable"] == 0
+
+
+class TestWeeklyRollups:
+    """Precomputed weekly rollups give the same results as recomputing."""
+
+    def test_shared_rollups_match_recompute(self):
+        from src.analytics import weekly_rollups, recovery_indicators, acwr, mesocycle_summary
+        df = _make_bbd_df([
+            {"hevy_id": f"w{w}", "date": f"2026-0{2 + w // 4}-{10 + w % 4:02d}", "week": w,
+             "volume_kg": 1000 + 100 * w, "reps_list": [10, 9, 7 - w % 2]}
+            for w in range(1, 7)
+        ])
+        roll = weekly_rollups(df)
+        weekly_before = roll["weekly"].copy()
+        pd.testing.assert_frame_equal(
+            recovery_indicators(df, weekly=roll["weekly"], trend=roll["trend"]),
+            recovery_indicators(df))
+        pd.testing.assert_frame_equal(acwr(df, weekly=roll["weekly"]), acwr(df))
+        pd.testing.assert_frame_equal(
+            mesocycle_summary(df, weekly=roll["weekly"], trend=roll["trend"]),
+            mesocycle_summary(df))
+        # Consumers must not mutate the shared frame
+        pd.testing.assert_frame_equal(roll["weekly"], weekly_before)
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # 531 SET CLASSIFICATION TESTS
 # ═══════════════════════════════════════════════════════════════════════
@@ -463,6 +546,21 @@ class TestBbbFatigueTrend:
         assert result.iloc[0]["rep_dropoff"] > 0
         assert result.iloc[0]["all_tens"] == False
 
+    def test_short_session_compares_first_set(self):
+        from src.analytics_531 import bbb_fatigue_trend
+        reps = [10, 8, 8]
+        df = _make_531_df([
+            {"date": "2026-02-20", "set_type": "bbb", "hevy_id": "a", "lift": "ohp",
+             "set_number": i + 1, "reps": reps[i], "weight_kg": 30, "volume_kg": 30 * reps[i],
+             "effective_tm": 58, "macro_num": 1}
+            for i in range(3)
+        ])
+        result = bbb_fatigue_trend(df)
+        assert result.iloc[0]["reps_list"] == [10, 8, 8]
+        assert result.iloc[0]["reps_str"] == "10, 8, 8"
+        assert result.iloc[0]["rep_dropoff"] == 2.0
+        assert result.iloc[0]["fatigue_status"] == "🔴 Fatiga alta"
+
 
 class TestTrue1rmTrend:
     """True 1RM estimation from AMRAP performance."""
@@ -491,6 +589,88 @@ class TestTrue1rmTrend:
         # TM 58 / e1RM 66.7 ≈ 86.9%
         assert 85 < result.iloc[0]["tm_as_pct_of_1rm"] < 90
 
+    def test_delta_is_per_lift(self):
+        from src.analytics_531 import true_1rm_trend
+        df = _make_531_df([
+            {"date": "2026-02-20", "lift": "ohp", "set_type": "amrap", "e1rm": 66.7},
+            {"date": "2026-02-21", "lift": "bench", "set_type": "amrap", "e1rm": 90.0},
+            {"date": "2026-03-13", "lift": "ohp", "set_type": "amrap", "e1rm": 68.0},
+        ])
+        result = true_1rm_trend(df)
+        bench = result[result["lift"] == "bench"].iloc[0]
+        ohp = result[result["lift"] == "ohp"]
+        assert bench["e1rm_delta"] is None
+        assert ohp.iloc[1]["e1rm_delta"] == 1.3
+
+
+class TestStrengthLevel531:
+    """Strength level per main lift from the best AMRAP e1RM."""
+
+    def test_best_amrap_per_lift(self):
+        from src.analytics_531 import strength_level_531
+        from src.config import BODYWEIGHT
+        df = _make_531_df([
+            {"lift": "ohp", "e1rm": 60.0},
+            {"lift": "ohp", "e1rm": 66.0},
+            {"lift": "ohp", "set_type": "bbb", "e1rm": 90.0},
+            {"lift": "bench", "e1rm": 90.0},
+        ])
+        result = strength_level_531(df)
+        assert result["ohp"]["e1rm"] == 66.0
+        assert result["ohp"]["ratio_bw"] == round(66.0 / BODYWEIGHT, 2)
+        assert result["bench"]["e1rm"] == 90.0
+        assert result["deadlift"] == {"e1rm": None, "ratio_bw": None, "level": "Sin datos"}
+
+    def test_categorical_lift(self):
+        from src.analytics_531 import strength_level_531
+        df = _make_531_df([{"lift": "squat", "e1rm": 100.0}]).astype({"lift": "category", "set_type": "category"})
+        result = strength_level_531(df)
+        assert result["squat"]["e1rm"] == 100.0
+        assert result["ohp"]["level"] == "Sin datos"
+
+
+class TestCategoricalColumns:
+    """The dashboard loads lift/set_type as category — no phantom groups."""
+
+    def _categorical(self, df):
+        return df.astype({"lift": "category", "set_type": "category"})
+
+    def test_bbb_compliance_one_row_per_session(self):
+        from src.analytics_531 import bbb_compliance
+        df = self._categorical(_make_531_df([
+            {"date": "2026-02-20", "set_type": "bbb", "hevy_id": "a", "lift": "ohp", "reps": 10},
+            {"date": "2026-02-20", "set_type": "bbb", "hevy_id": "a", "lift": "ohp", "reps": 10},
+            {"date": "2026-02-21", "set_type": "amrap", "hevy_id": "b", "lift": "deadlift"},
+        ]))
+        result = bbb_compliance(df)
+        assert len(result) == 1
+        assert result.iloc[0]["n_sets"] == 2
+
+    def test_cycle_comparison(self):
+        from src.analytics_531 import cycle_comparison
+        df = self._categorical(_make_531_df([
+            {"date": "2026-02-20", "lift": "ohp", "cycle_num": 1, "e1rm": 63.0},
+            {"date": "2026-02-21", "lift": "bench", "cycle_num": 1, "e1rm": 90.0},
+        ]))
+        result = cycle_comparison(df)
+        assert len(result) == 2
+        assert (result["bbb_sets"] == 0).all()
+
+
+class TestAnnualCalendar:
+    """Annual calendar grid built from a shared training calendar."""
+
+    def test_precomputed_calendar_matches_recompute(self):
+        from src.analytics_531 import build_annual_calendar, training_calendar
+        df = _make_531_df([
+            {"date": "2026-02-20", "set_type": "amrap", "hevy_id": "a", "lift": "ohp", "tm_bumps": 0},
+            {"date": "2026-02-21", "set_type": "amrap", "hevy_id": "b", "lift": "deadlift", "tm_bumps": 0},
+        ])
+        raw = training_calendar(df, weeks_ahead=52)
+        shared = build_annual_calendar(df, calendar=raw)
+        assert shared == build_annual_calendar(df)
+        assert len(shared["weeks"]) == len(raw)
+
 
 # ═══════════════════════════════════════════════════════════════════════
 # SHARED ANALYTICS TESTS
@@ -533,6 +713,44 @@ class TestDetectUnknownExercises:
         assert mg_map["X1"] == "Bíceps"
         assert mg_map["X2"] == "Piernas"
 
+    def test_per_template_aggregates_with_categorical_lift(self):
+        from src.shared_analytics import detect_unknown_exercises
+        df = pd.DataFrame([
+            {"exercise_template_id": "AAA", "exercise": "Curl", "date": pd.Timestamp("2026-02-20"), "hevy_id": "a", "lift": "ohp"},
+            {"exercise_template_id": "ZZZ", "exercise": "Remo", "date": pd.Timestamp("2026-02-20"), "hevy_id": "a", "lift": "squat"},
+            {"exercise_template_id": "ZZZ", "exercise": "Remo", "date": pd.Timestamp("2026-02-22"), "hevy_id": "b", "lift": "bench"},
+            {"exercise_template_id": "ZZZ", "exercise": "Remo", "date": pd.Timestamp("2026-02-22"), "hevy_id": "b", "lift": "bench"},
+            {"exercise_template_id": "YYY", "exercise": "Plank", "date": pd.Timestamp("2026-02-21"), "hevy_id": "c", "lift": "ohp"},
+        ]).astype({"lift": "category"})
+        result = detect_unknown_exercises(df, {"AAA": {}}, program_name="531")
+        assert result["template_id"].tolist() == ["ZZZ", "YYY"]
+        zzz = result.iloc[0]
+        assert (zzz["session_count"], zzz["total_sets"]) == (2, 3)
+        assert zzz["appears_on"] == ["bench", "squat"]
+        assert zzz["first_seen"] == pd.Timestamp("2026-02-20")
+        assert zzz["last_seen"] == pd.Timestamp("2026-02-22")
+        assert result.iloc[1]["suggested_muscle_group"] == "Core"
+
+
+class TestWorkoutQualityBbd:
+    """BBD quality score."""
+
+    def test_key_lift_scored_against_running_best(self):
+        from src.shared_analytics import workout_quality_bbd
+        db = {"KEY": {"is_key_lift": True, "day": 1}, "ACC": {"day": 1}}
+        df = _make_bbd_df([
+            {"hevy_id": "s1", "date": "2026-02-12", "exercise_template_id": "KEY", "e1rm": 150.0},
+            {"hevy_id": "s1", "date": "2026-02-12", "exercise_template_id": "KEY", "e1rm": 160.0},
+            {"hevy_id": "s2", "date": "2026-02-19", "exercise_template_id": "KEY", "e1rm": 155.0},
+            {"hevy_id": "s2", "date": "2026-02-19", "exercise_template_id": "ACC", "e1rm": 50.0},
+            {"hevy_id": "s3", "date": "2026-02-26", "exercise_template_id": "KEY", "e1rm": 130.0},
+        ])
+        result = workout_quality_bbd(df, {}, db).set_index("hevy_id")
+        # 155 vs best 160 → ≥95%; 130 vs 160 → <90%
+        assert result["lift_score"].to_dict() == {"s1": 35, "s2": 25, "s3": 5}
+        # Coverage: s2 did both planned day-1 exercises, the others half
+        assert result["cov_score"].to_dict() == {"s1": 12, "s2": 25, "s3": 12}
+
 
 class TestWorkoutQuality531:
     """531 quality score."""